@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 
 from app.api.schemas.auth import RegisterRequest, LoginRequest, TokenResponse
 from app.core.security import hash_password, verify_password, create_access_token
+from app.db.query_budget import query_budget
 from app.db.session import SessionLocal
 from app.models.user import User
 
@@ -18,6 +19,7 @@ def get_db():
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     existing = db.query(User).filter(User.email == payload.email).first()
     if existing:
@@ -39,6 +41,7 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
+@query_budget(1)
 def login(payload: LoginRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == payload.email).first()
     if not user or not verify_password(payload.password, user.password_hash):
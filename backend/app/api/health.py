@@ -1,9 +1,24 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+
+from app.services.readiness import readiness
 
 router = APIRouter()
 
+# Liveness: the process is up
 @router.get("/")
 def health_check():
     return {
         "status": "ok"
     }
+
+
+# Readiness: warmed up and dependencies reachable (cached, time-bounded checks)
+@router.get("/ready")
+def readiness_check(response: Response):
+    ready, checks = readiness.status()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if ready else "not_ready",
+        "checks": checks,
+    }
@@ -0,0 +1,325 @@
+"""
+Playlists. Entries are ordered by fractional ordering keys (app.services.ordering):
+adding or moving entries computes keys between the neighbours of the target spot, so a
+move is a single-row UPDATE whatever the playlist length, and reads are keyset pages over
+(position, id). Writers lock the playlist row first, so two moves into the same gap
+cannot pick the same key.
+"""
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import BigInteger, Integer, any_, bindparam, delete, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.api.schemas.common import PaginatedResponse
+from app.api.schemas.playlist import (
+    MAX_TRACKS_PAGE,
+    PlaylistCreate,
+    PlaylistItemRef,
+    PlaylistResponse,
+    PlaylistTrack,
+    PlaylistTrackMove,
+    PlaylistTracksAdd,
+    PlaylistTracksPage,
+    PlaylistTracksRemove,
+    PlaylistTracksResponse,
+    PlaylistUpdate,
+    TrackPlacement,
+)
+from app.api.songs import song_to_response
+from app.core.auth import get_current_user, get_optional_user
+from app.db.query_budget import query_budget
+from app.db.session import get_db
+from app.models.playlist import Playlist, PlaylistItem
+from app.models.song import Song
+from app.models.user import User
+from app.services.ordering import key_between, keys_between
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Keys grow when entries keep landing in the same gap; past this length the playlist's
+# keys are rewritten evenly spaced (one executemany, amortized over many moves). The two
+# statements of a rebalance count towards the query budgets of add and move.
+MAX_POSITION_LENGTH = 48
+
+
+def _get_playlist(db: Session, playlist_id: int, user: User | None, write: bool = False) -> Playlist:
+    """Visible playlist (public or mine); write=True locks it and requires ownership."""
+    query = select(Playlist).where(Playlist.id == playlist_id)
+    if write:
+        query = query.with_for_update()
+    playlist = db.scalars(query).first()
+    is_owner = playlist is not None and user is not None and playlist.owner_id == user.id
+    if playlist is None or not (playlist.is_public or is_owner):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    if write and not is_owner:
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return playlist
+
+
+def _visible_songs(user: User | None) -> list:
+    conditions = [Song.is_deleted.is_(False)]
+    if user is None:
+        conditions.append(Song.is_public.is_(True))
+    else:
+        conditions.append(or_(Song.is_public.is_(True), Song.owner_id == user.id))
+    return conditions
+
+
+def _gap(db: Session, playlist_id: int, placement: TrackPlacement, moving: int | None = None) -> tuple[str | None, str | None]:
+    """Ordering keys around the target spot (None = open end), ignoring entry `moving`."""
+    others = [PlaylistItem.playlist_id == playlist_id]
+    if moving is not None:
+        others.append(PlaylistItem.id != moving)
+    anchor_id = placement.after_item_id if placement.after_item_id is not None else placement.before_item_id
+    if anchor_id is None:
+        last = db.scalar(
+            select(PlaylistItem.position).where(*others).order_by(PlaylistItem.position.desc()).limit(1)
+        )
+        return last, None
+    if anchor_id == moving:
+        raise HTTPException(status_code=400, detail="An entry cannot be placed next to itself")
+    anchor = select(PlaylistItem.position).where(
+        PlaylistItem.id == anchor_id, PlaylistItem.playlist_id == playlist_id
+    ).scalar_subquery()
+    if placement.after_item_id is not None:
+        neighbour = (
+            select(PlaylistItem.position)
+            .where(*others, PlaylistItem.position > anchor)
+            .order_by(PlaylistItem.position)
+            .limit(1)
+        )
+    else:
+        neighbour = (
+            select(PlaylistItem.position)
+            .where(*others, PlaylistItem.position < anchor)
+            .order_by(PlaylistItem.position.desc())
+            .limit(1)
+        )
+    row = db.execute(select(anchor, neighbour.scalar_subquery())).one()
+    if row[0] is None:
+        raise HTTPException(status_code=400, detail="Anchor entry not found in this playlist")
+    return (row[0], row[1]) if placement.after_item_id is not None else (row[1], row[0])
+
+
+def _rebalance(db: Session, playlist_id: int) -> dict[int, str]:
+    """Rewrite every key of the playlist, evenly spaced and short; returns id -> key."""
+    ids = db.scalars(
+        select(PlaylistItem.id)
+        .where(PlaylistItem.playlist_id == playlist_id)
+        .order_by(PlaylistItem.position, PlaylistItem.id)
+    ).all()
+    positions = dict(zip(ids, keys_between(None, None, len(ids))))
+    db.execute(update(PlaylistItem), [{"id": i, "position": key} for i, key in positions.items()])
+    logger.info("playlist keys rebalanced", extra={"playlist_id": playlist_id, "items": len(ids)})
+    return positions
+
+
+# Auth – create a playlist
+@router.post("", response_model=PlaylistResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
+def create_playlist(
+    payload: PlaylistCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    playlist = Playlist(name=payload.name, is_public=payload.is_public, owner_id=current_user.id)
+    db.add(playlist)
+    db.commit()
+    db.refresh(playlist)
+    return playlist
+
+
+# Auth – my playlists, most recently changed first
+@router.get("/me", response_model=PaginatedResponse[PlaylistResponse])
+@query_budget(3)
+def list_my_playlists(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    query = db.query(Playlist).filter(Playlist.owner_id == current_user.id)
+    total = query.count()
+    playlists = query.order_by(Playlist.updated_at.desc(), Playlist.id.desc()).limit(limit).offset(offset).all()
+    return {"items": playlists, "total": total, "limit": limit, "offset": offset}
+
+
+# Public (or mine if private)
+@router.get("/{playlist_id}", response_model=PlaylistResponse)
+@query_budget(2)
+def get_playlist(
+    playlist_id: int,
+    db: Session = Depends(get_db),
+    current_user: User | None = Depends(get_optional_user),
+):
+    return _get_playlist(db, playlist_id, current_user)
+
+
+# Auth + ownership – rename / change visibility
+@router.put("/{playlist_id}", response_model=PlaylistResponse)
+@query_budget(4)
+def update_playlist(
+    playlist_id: int,
+    payload: PlaylistUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    playlist = _get_playlist(db, playlist_id, current_user, write=True)
+    for field, value in payload.model_dump(exclude_unset=True, exclude_none=True).items():
+        setattr(playlist, field, value)
+    db.commit()
+    db.refresh(playlist)
+    return playlist
+
+
+# Auth + ownership – delete a playlist and its entries (songs are untouched)
+@router.delete("/{playlist_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(3)
+def delete_playlist(
+    playlist_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    _get_playlist(db, playlist_id, current_user, write=True)
+    db.execute(delete(Playlist).where(Playlist.id == playlist_id))
+    db.commit()
+
+
+# Public (or mine) – entries in order, keyset-paginated; deleted / hidden songs are skipped
+@router.get("/{playlist_id}/tracks", response_model=PlaylistTracksPage)
+@query_budget(3)
+def list_playlist_tracks(
+    playlist_id: int,
+    db: Session = Depends(get_db),
+    current_user: User | None = Depends(get_optional_user),
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_TRACKS_PAGE),
+):
+    """cursor: next_cursor of the previous page ("<position>.<item id>"; opaque to clients)."""
+    _get_playlist(db, playlist_id, current_user)
+    query = (
+        select(PlaylistItem, Song)
+        .join(Song, Song.id == PlaylistItem.song_id)
+        .where(PlaylistItem.playlist_id == playlist_id, *_visible_songs(current_user))
+    )
+    if cursor:
+        position, _, item_id = cursor.rpartition(".")
+        if not position or not item_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(PlaylistItem.position, PlaylistItem.id) > (position, int(item_id)))
+    rows = db.execute(query.order_by(PlaylistItem.position, PlaylistItem.id).limit(limit + 1)).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1][0]
+        next_cursor = f"{last.position}.{last.id}"
+    return PlaylistTracksPage(
+        items=[
+            PlaylistTrack(item_id=item.id, position=item.position, added_at=item.added_at, song=song_to_response(song))
+            for item, song in page
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+# Auth + ownership – add songs (in the given order) at the end or next to an entry
+@router.post("/{playlist_id}/tracks", response_model=PlaylistTracksResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(8)
+def add_playlist_tracks(
+    playlist_id: int,
+    payload: PlaylistTracksAdd,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    playlist = _get_playlist(db, playlist_id, current_user, write=True)
+    wanted = set(payload.song_ids)
+    found = set(db.scalars(
+        select(Song.id).where(
+            Song.id == any_(bindparam("ids", list(wanted), type_=ARRAY(Integer))),
+            *_visible_songs(current_user),
+        )
+    ))
+    if missing := sorted(wanted - found):
+        raise HTTPException(status_code=404, detail=f"Songs not found: {missing}")
+
+    low, high = _gap(db, playlist_id, payload)
+    keys = keys_between(low, high, len(payload.song_ids))
+    item_ids = db.scalars(
+        insert(PlaylistItem).returning(PlaylistItem.id, sort_by_parameter_order=True),
+        [
+            {"playlist_id": playlist_id, "song_id": song_id, "position": key}
+            for song_id, key in zip(payload.song_ids, keys)
+        ],
+    ).all()
+    if max(map(len, keys)) > MAX_POSITION_LENGTH:
+        rebalanced = _rebalance(db, playlist_id)
+        keys = [rebalanced[i] for i in item_ids]
+    playlist.track_count += len(item_ids)
+    track_count = playlist.track_count
+    db.commit()
+    return PlaylistTracksResponse(
+        affected=len(item_ids),
+        track_count=track_count,
+        items=[
+            PlaylistItemRef(item_id=item_id, song_id=song_id, position=key)
+            for item_id, song_id, key in zip(item_ids, payload.song_ids, keys)
+        ],
+    )
+
+
+# Auth + ownership – remove entries by id (one DELETE)
+@router.delete("/{playlist_id}/tracks", response_model=PlaylistTracksResponse)
+@query_budget(4)
+def remove_playlist_tracks(
+    playlist_id: int,
+    payload: PlaylistTracksRemove,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    playlist = _get_playlist(db, playlist_id, current_user, write=True)
+    removed = db.scalars(
+        delete(PlaylistItem)
+        .where(
+            PlaylistItem.playlist_id == playlist_id,
+            PlaylistItem.id == any_(bindparam("ids", payload.item_ids, type_=ARRAY(BigInteger))),
+        )
+        .returning(PlaylistItem.id)
+    ).all()
+    playlist.track_count -= len(removed)
+    track_count = playlist.track_count
+    db.commit()
+    return PlaylistTracksResponse(affected=len(removed), track_count=track_count)
+
+
+# Auth + ownership – drag-to-reorder: one entry goes right after / before another
+@router.post("/{playlist_id}/tracks/{item_id}/move", response_model=PlaylistTracksResponse)
+@query_budget(6)
+def move_playlist_track(
+    playlist_id: int,
+    item_id: int,
+    payload: PlaylistTrackMove,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    playlist = _get_playlist(db, playlist_id, current_user, write=True)
+    key = key_between(*_gap(db, playlist_id, payload, moving=item_id))
+    song_id = db.scalar(
+        update(PlaylistItem)
+        .where(PlaylistItem.id == item_id, PlaylistItem.playlist_id == playlist_id)
+        .values(position=key)
+        .returning(PlaylistItem.song_id)
+    )
+    if song_id is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    if len(key) > MAX_POSITION_LENGTH:
+        key = _rebalance(db, playlist_id)[item_id]
+    track_count = playlist.track_count
+    db.commit()
+    return PlaylistTracksResponse(
+        affected=1,
+        track_count=track_count,
+        items=[PlaylistItemRef(item_id=item_id, song_id=song_id, position=key)],
+    )
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.api.schemas.song import MAX_BULK_IDS, SongResponse
+
+MAX_TRACKS_PAGE = 500
+
+
+class PlaylistCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    is_public: bool = False
+
+
+class PlaylistUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    is_public: Optional[bool] = None
+
+
+class PlaylistResponse(BaseModel):
+    id: int
+    owner_id: int
+    name: str
+    is_public: bool
+    track_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TrackPlacement(BaseModel):
+    """Where entries go: right after or right before an entry of the playlist."""
+    after_item_id: Optional[int] = None
+    before_item_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def at_most_one_anchor(self) -> "TrackPlacement":
+        if self.after_item_id is not None and self.before_item_id is not None:
+            raise ValueError("provide at most one of after_item_id or before_item_id")
+        return self
+
+
+class PlaylistTracksAdd(TrackPlacement):
+    """Songs in the given order; no anchor appends them at the end."""
+    song_ids: list[int] = Field(min_length=1, max_length=MAX_BULK_IDS)
+
+
+class PlaylistTracksRemove(BaseModel):
+    item_ids: list[int] = Field(min_length=1, max_length=MAX_BULK_IDS)
+
+
+class PlaylistTrackMove(TrackPlacement):
+    @model_validator(mode="after")
+    def one_anchor(self) -> "PlaylistTrackMove":
+        if self.after_item_id is None and self.before_item_id is None:
+            raise ValueError("provide after_item_id or before_item_id")
+        return self
+
+
+class PlaylistItemRef(BaseModel):
+    item_id: int
+    song_id: int
+    position: str  # ordering key; compare bytewise
+
+
+class PlaylistTracksResponse(BaseModel):
+    affected: int
+    track_count: int
+    items: list[PlaylistItemRef] = []  # added / moved entries
+
+
+class PlaylistTrack(BaseModel):
+    item_id: int
+    position: str
+    added_at: datetime
+    song: SongResponse
+
+
+class PlaylistTracksPage(BaseModel):
+    items: list[PlaylistTrack]
+    next_cursor: Optional[str] = None  # pass back as ?cursor=; None on the last page
@@ -1,6 +1,6 @@
 from datetime import datetime
 import re
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
 
 
@@ -55,6 +55,54 @@ class SongUpdate(BaseModel):
     is_public: Optional[bool] = None
 
 
+# Bulk mutations (PATCH / DELETE /songs): an id list or a filter over my songs
+MAX_BULK_IDS = 1000
+
+
+class SongFilter(BaseModel):
+    q: Optional[str] = None  # title/artist substring, as GET /songs/me?q=
+    artist: Optional[str] = None  # exact
+    is_public: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def not_empty(self) -> "SongFilter":
+        if self.q is None and self.artist is None and self.is_public is None:
+            raise ValueError("filter needs at least one condition")
+        return self
+
+
+class SongBulkSelect(BaseModel):
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=MAX_BULK_IDS)
+    filter: Optional[SongFilter] = None
+
+    @model_validator(mode="after")
+    def ids_or_filter(self) -> "SongBulkSelect":
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("provide exactly one of ids or filter")
+        return self
+
+
+class SongBulkUpdate(SongBulkSelect):
+    changes: SongUpdate
+
+    @field_validator("changes")
+    @classmethod
+    def changes_not_empty(cls, v: SongUpdate) -> SongUpdate:
+        if not v.model_fields_set:
+            raise ValueError("changes must set at least one field")
+        return v
+
+
+class SongBulkOutcome(BaseModel):
+    id: int
+    status: str  # updated | deleted | not_found | forbidden
+
+
+class SongBulkResponse(BaseModel):
+    affected: int
+    results: list[SongBulkOutcome]
+
+
 # Response (API output) — id, title, file_url, s3_key, created_at (+ owner_id, artist, audio_url, is_public)
 class SongResponse(SongBase):
     id: int
@@ -62,22 +110,59 @@ class SongResponse(SongBase):
     title: str | None = None  # override: DB allows null
     s3_key: str | None = None
     file_url: str | None = None
+    processing_status: str | None = None  # pending | ready | failed
+    has_cover: bool = False  # GET /songs/{id}/cover
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+# Delta sync (GET /songs/changes)
+class SongChange(BaseModel):
+    id: int
+    change_seq: int
+    deleted: bool = False
+    song: SongResponse | None = None  # None for deletions (tombstones)
+
+
+class SongChangesResponse(BaseModel):
+    changes: list[SongChange]
+    next_token: str  # pass back as ?since= on the next call
+    has_more: bool
+
+
+# Exact seek from the MP3 frame index (GET /songs/{id}/seek)
+class SeekResponse(BaseModel):
+    song_id: int
+    time: float  # start time (s) of the frame containing the requested time
+    frame: int
+    byte_offset: int  # use as Range: bytes={byte_offset}- on file_url
+    duration: float
+
+
+# Typeahead (GET /songs/suggest)
+class SuggestItem(BaseModel):
+    text: str
+    kind: str  # "title" | "artist"
+
+
+class SuggestResponse(BaseModel):
+    prefix: str
+    items: list[SuggestItem]
+
+
 # Confirm upload (POST /songs/confirm-upload) — save metadata after S3 upload
 class ConfirmUploadRequest(BaseModel):
     key: str
     title: str | None = None
+    # Fingerprint the upload right away and report acoustically similar existing songs
+    report_duplicates: bool = False
 
     @field_validator("key")
     @classmethod
     def key_must_be_songs_mp3(cls, v: str) -> str:
-        pattern = r"^songs/[0-9a-f]{8}\\.mp3$"
-        if not re.fullmatch(pattern, v):
+        if not S3_KEY_PATTERN.fullmatch(v):
             raise ValueError("key must match pattern 'songs/{8-hex}.mp3'")
         return v
 
@@ -89,6 +174,16 @@ class ConfirmUploadRequest(BaseModel):
         return v
 
 
+class DuplicateMatch(BaseModel):
+    song_id: int
+    s3_key: str
+    similarity: float  # estimated, 0..1
+
+
+class ConfirmUploadResponse(SongResponse):
+    likely_duplicates: list[DuplicateMatch] | None = None  # only with report_duplicates
+
+
 # Allowed content type for upload (production: only audio/mpeg)
 ALLOWED_UPLOAD_CONTENT_TYPE = "audio/mpeg"
 
@@ -115,6 +210,8 @@ class UploadUrlRequest(BaseModel):
     filename: str
     content_type: str  # Must be "audio/mpeg"
     file_hash: str
+    # Checked against the storage quota and signed into the URL (S3 rejects another size)
+    size_bytes: int | None = Field(default=None, gt=0)
 
     @field_validator("file_hash")
     @classmethod
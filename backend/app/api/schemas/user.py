@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class UserStatsResponse(BaseModel):
+    song_count: int
+    bytes_stored: int
+    deduped_bytes: int  # part of bytes_stored shared with objects already in the catalog
+    uploaded_bytes: int  # bytes_stored - deduped_bytes; what QUOTA_MAX_BYTES limits
+    max_songs: int | None = None  # None = unlimited
+    max_bytes: int | None = None
+    updated_at: datetime | None = None
+    reconciled_at: datetime | None = None
@@ -1,9 +1,17 @@
+import itertools
+import json
 import logging
+import math
 import re
+import zlib
+from typing import Iterator
 from urllib.parse import unquote, urlparse
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Integer, any_, bindparam, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.api.schemas.common import PaginatedResponse
@@ -12,22 +20,47 @@ from app.api.schemas.song import (
     CheckFileRequest,
     CheckFileResponse,
     ConfirmUploadRequest,
+    ConfirmUploadResponse,
+    DuplicateMatch,
+    SeekResponse,
+    SongBulkOutcome,
+    SongBulkResponse,
+    SongBulkSelect,
+    SongBulkUpdate,
+    SongChange,
+    SongChangesResponse,
     SongCreate,
     SongResponse,
     SongUpdate,
+    SuggestItem,
+    SuggestResponse,
     UploadUrlRequest,
     UploadUrlResponse,
 )
 from app.core.auth import get_current_user
-from app.db.session import get_db
-from app.models.song import Song
+from app.core.negotiation import MSGPACK_MEDIA_TYPE, negotiate, packb, wants_msgpack
+from app.db.query_budget import query_budget, untracked
+from app.db.session import SessionLocal, get_db
+from app.models.song import ORIGINAL_SONG_WHERE, SONG_ARCHIVE, SONG_CHANGE_SETTLED, Song
 from app.models.user import User
 from app.services.s3 import (
     build_s3_key,
     generate_presigned_upload_url,
     get_file_url,
-    object_exists,
+    get_file_urls,
+    get_object_bytes,
+    get_object_range,
+    head_object_size,
 )
+from app.services.events import event_bus
+from app.services import archive, covers, library_stats, waveform
+from app.services.audio import AudioDecodeError
+from app.services.fingerprint import fingerprint_index, sync_fingerprint_index
+from app.services.jobs import enqueue_jobs
+from app.services.processing import fingerprint_audio, load_frame_index, waveform_key
+from app.services.song_cache import song_cache
+from app.services.song_sync import songs_changed
+from app.services.suggest import suggest_index
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -53,16 +86,35 @@ def song_to_response(song: Song) -> SongResponse:
         is_public=song.is_public,
         s3_key=song.s3_key,
         file_url=file_url,
+        processing_status=song.processing_status,
+        has_cover=song.cover_hash is not None,
         created_at=song.created_at,
     )
 
 
+def _reindex_song(song: Song) -> None:
+    """After a committed write: song cache and typeahead of every worker (song_sync)."""
+    if song.is_public and not song.is_deleted:
+        songs_changed([song.id], upserts=[(song.id, song.title, song.artist)])
+    else:
+        songs_changed([song.id], removals=[song.id])
+
+
+def _publish_song_created(song: Song, response: SongResponse) -> None:
+    """Push a newly committed public song to SSE subscribers (GET /songs/events)."""
+    if song.is_public:
+        event_bus.publish("song_created", response.model_dump(mode="json"), event_id=song.id)
+
+
 # Public – ai cũng xem được
 @router.get(
     "",
     response_model=PaginatedResponse[SongResponse],
 )
+@query_budget(2)
 def list_public_songs(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = 20,
     offset: int = 0,
@@ -92,12 +144,13 @@ def list_public_songs(
         .all()
     )
 
-    return {
+    page = {
         "items": [song_to_response(s) for s in songs],
         "total": total,
         "limit": limit,
         "offset": offset,
     }
+    return negotiate(request, response, page, PaginatedResponse[SongResponse])
 
 # Auth – bài của tôi
 @router.get(
@@ -105,7 +158,10 @@ def list_public_songs(
     response_model=PaginatedResponse[SongResponse],
     operation_id="list_my_songs",
 )
+@query_budget(3)
 def list_my_songs(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = 20,
@@ -132,23 +188,196 @@ def list_my_songs(
         .all()
     )
 
-    return {
+    page = {
         "items": [song_to_response(s) for s in songs],
         "total": total,
         "limit": limit,
         "offset": offset,
     }
+    return negotiate(request, response, page, PaginatedResponse[SongResponse])
 
 
-# Public – single song by id (from DB only)
+# Auth – delta sync of my library: inserts, updates and soft-deletes since a token
+@router.get(
+    "/changes",
+    response_model=SongChangesResponse,
+)
+@query_budget(3)
+def list_song_changes(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    since: str | None = None,
+    limit: int = Query(500, ge=1, le=1000),
+):
+    """
+    Token = last change_seq the client has applied (opaque to clients).
+    No token: full snapshot of live songs, paged the same way.
+    A page ends before the first change a transaction still open may precede
+    (SONG_CHANGE_SETTLED); has_more is false then, the next poll picks it up.
+    """
+    try:
+        since_seq = int(since) if since else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since token")
+
+    query = db.query(Song, SONG_CHANGE_SETTLED.label("settled")).filter(
+        Song.owner_id == current_user.id,
+        Song.change_seq > since_seq,
+    )
+    if not since_seq:
+        query = query.filter(Song.is_deleted.is_(False))
+
+    rows = query.order_by(Song.change_seq).limit(limit + 1).all()
+    settled = list(itertools.takewhile(lambda row: row.settled, rows))
+    cut = rows[len(settled)].Song.change_seq if len(settled) < len(rows) else None
+    changes = [
+        SongChange(id=s.id, change_seq=s.change_seq, deleted=True)
+        if s.is_deleted
+        else SongChange(id=s.id, change_seq=s.change_seq, song=song_to_response(s))
+        for s, _ in settled
+    ]
+    if since_seq:
+        # Songs deleted long ago live in songs_archive (app.services.archive): tombstones.
+        changes.extend(
+            SongChange(id=row.id, change_seq=row.change_seq, deleted=True)
+            for row in db.execute(
+                select(SONG_ARCHIVE.c.id, SONG_ARCHIVE.c.change_seq)
+                .where(SONG_ARCHIVE.c.owner_id == current_user.id, SONG_ARCHIVE.c.change_seq > since_seq)
+                .order_by(SONG_ARCHIVE.c.change_seq)
+                .limit(limit + 1)
+            )
+            if cut is None or row.change_seq < cut
+        )
+        changes.sort(key=lambda c: c.change_seq)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_seq = changes[-1].change_seq if changes else since_seq
+    return SongChangesResponse(
+        changes=changes,
+        next_token=str(next_seq),
+        has_more=has_more,
+    )
+
+
+# Public – typeahead; served from the in-memory prefix index (no DB, no threadpool hop)
+@router.get(
+    "/suggest",
+    response_model=SuggestResponse,
+)
+@query_budget(0)
+async def suggest_songs(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    items = suggest_index.suggest(prefix, limit)
+    return SuggestResponse(
+        prefix=prefix,
+        items=[SuggestItem(text=text, kind=kind) for text, kind in items],
+    )
+
+
+# Public – live feed of new public songs (SSE) instead of polling GET /songs
+@router.get("/events")
+async def song_events():
+    return StreamingResponse(
+        event_bus.broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable proxy buffering (nginx)
+        },
+    )
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _iter_export(compress: bool, binary: bool = False) -> Iterator[bytes]:
+    """
+    Stream every public song as NDJSON (same fields as SongResponse), ordered by id;
+    with binary, as a sequence of MessagePack maps instead (one per song, same fields).
+    Rows come through a server-side cursor (yield_per) and URLs are generated per batch,
+    so memory stays flat whatever the catalog size. Owns its session: the response body
+    outlives the request dependencies.
+    """
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31 -> gzip container
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(
+                Song.id,
+                Song.owner_id,
+                Song.title,
+                Song.artist,
+                Song.s3_key,
+                Song.audio_url,
+                Song.created_at,
+            )
+            .where(Song.is_public.is_(True), Song.is_deleted.is_(False))
+            .order_by(Song.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for rows in result.partitions():
+            urls = get_file_urls(list({r.s3_key for r in rows if r.s3_key}))
+            records = []
+            for r in rows:
+                file_url = urls.get(r.s3_key) if r.s3_key else None
+                if file_url is None and r.audio_url:
+                    file_url = r.audio_url
+                records.append({
+                    "id": r.id,
+                    "owner_id": r.owner_id,
+                    "title": r.title,
+                    "artist": r.artist,
+                    "audio_url": file_url or "",
+                    "is_public": True,
+                    "s3_key": r.s3_key,
+                    "file_url": file_url,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                })
+            if binary:
+                chunk = b"".join(packb(record) for record in records)
+            else:
+                chunk = ("\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n").encode()
+            yield gz.compress(chunk) if gz else chunk
+        if gz:
+            yield gz.flush()
+    finally:
+        db.close()
+
+
+# Public – full catalog as NDJSON (or msgpack, per Accept) in one pass (replaces paging through GET /songs)
+@router.get("/export")
+def export_songs(request: Request, gzip: bool = False):
+    binary = wants_msgpack(request)
+    filename = "songs.msgpack" if binary else "songs.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _iter_export(gzip, binary),
+        media_type=MSGPACK_MEDIA_TYPE if binary else "application/x-ndjson",
+        headers=headers,
+    )
+
+
+# Public – single song by id (hot songs from the in-process cache; see song_cache)
 @router.get(
     "/{song_id}",
     response_model=SongResponse,
 )
+@query_budget(1)
 def get_song(
     song_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
+    song = song_cache.get(song_id, lambda: song_to_response(_get_public_song(db, song_id)))
+    return negotiate(request, response, song, SongResponse)
+
+
+def _get_public_song(db: Session, song_id: int) -> Song:
     song = (
         db.query(Song)
         .filter(Song.id == song_id, Song.is_deleted.is_(False))
@@ -158,7 +387,147 @@ def get_song(
         raise HTTPException(status_code=404, detail="Song not found")
     if not song.is_public:
         raise HTTPException(status_code=404, detail="Song not found")
-    return song_to_response(song)
+    return song
+
+
+HLS_SEGMENT_SECONDS = 6.0
+# Enough for the header of any blob the pyramid builder produces (< 32 levels).
+WAVEFORM_HEADER_FETCH = waveform.header_size(32)
+
+
+# Public – exact byte offset for a time position (VBR-safe seeking over range requests)
+@router.get(
+    "/{song_id}/seek",
+    response_model=SeekResponse,
+)
+@query_budget(2)
+def seek_song(
+    song_id: int,
+    t: float = Query(..., ge=0),
+    db: Session = Depends(get_db),
+):
+    song = _get_public_song(db, song_id)
+    index = load_frame_index(db, song.s3_key)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Audio index not ready")
+    frame, offset = index.seek(t)
+    return SeekResponse(
+        song_id=song.id,
+        time=frame * index.frame_duration,
+        frame=frame,
+        byte_offset=offset,
+        duration=index.duration_seconds,
+    )
+
+
+# Public – waveform peaks at one zoom level (a few KB), from the blob stored next to the MP3
+@router.get("/{song_id}/waveform")
+@query_budget(1)
+def get_song_waveform(
+    song_id: int,
+    level: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    song = _get_public_song(db, song_id)
+    key = waveform_key(song.s3_key)
+    try:
+        head = get_object_range(key, 0, WAVEFORM_HEADER_FETCH - 1)
+        if head is None:
+            raise HTTPException(status_code=404, detail="Waveform not ready")
+        bits, sample_rate, levels = waveform.parse_header(head)
+        if level >= len(levels):
+            raise HTTPException(
+                status_code=400,
+                detail=f"level must be < {len(levels)}",
+            )
+        offset, length = waveform.level_byte_range(bits, levels[level])
+        data = get_object_range(key, offset, offset + length - 1) if length else b""
+    except (RuntimeError, waveform.WaveformFormatError) as e:
+        logger.warning("waveform read failed", extra={"key": key, "error": str(e)})
+        raise HTTPException(status_code=502, detail="Waveform unavailable") from e
+    if data is None or len(data) != length:
+        raise HTTPException(status_code=404, detail="Waveform not ready")
+    return Response(
+        content=waveform.extract_level(bits, sample_rate, levels[level], data),
+        media_type="application/octet-stream",
+        headers={
+            # Derived from immutable audio content: never changes for a given s3_key.
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{waveform_key(song.s3_key)}:{level}"',
+        },
+    )
+
+
+# Public – cover art thumbnail (content-addressed, shared by every file with the same art)
+@router.get("/{song_id}/cover")
+@query_budget(1)
+def get_song_cover(
+    song_id: int,
+    request: Request,
+    size: int = Query(covers.THUMBNAIL_SIZES[1]),
+    db: Session = Depends(get_db),
+):
+    if size not in covers.THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"size must be one of {list(covers.THUMBNAIL_SIZES)}",
+        )
+    song = _get_public_song(db, song_id)
+    if song.cover_hash is None:
+        raise HTTPException(status_code=404, detail="No cover art")
+    etag = f'"{song.cover_hash}:{size}"'
+    headers = {
+        # Keyed by the art's hash: the bytes behind this ETag never change.
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": etag,
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    key = covers.cover_key(song.cover_hash, size)
+    try:
+        data = get_object_bytes(key)
+    except RuntimeError as e:
+        logger.warning("cover read failed", extra={"key": key, "error": str(e)})
+        raise HTTPException(status_code=502, detail="Cover unavailable") from e
+    if data is None:
+        raise HTTPException(status_code=404, detail="No cover art")
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+# Public – HLS playlist of byte-range segments over the original MP3 (CDN-cacheable ranges)
+@router.get("/{song_id}/playlist.m3u8")
+@query_budget(2)
+def song_hls_playlist(
+    song_id: int,
+    db: Session = Depends(get_db),
+):
+    song = _get_public_song(db, song_id)
+    index = load_frame_index(db, song.s3_key)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Audio index not ready")
+    file_url = song_to_response(song).file_url
+    if not file_url:
+        raise HTTPException(status_code=404, detail="Song file not available")
+
+    segments = index.segments(HLS_SEGMENT_SECONDS)
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:4",  # EXT-X-BYTERANGE
+        f"#EXT-X-TARGETDURATION:{math.ceil(max(d for d, _, _ in segments))}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for duration, offset, length in segments:
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(f"#EXT-X-BYTERANGE:{length}@{offset}")
+        lines.append(file_url)
+    lines.append("#EXT-X-ENDLIST")
+    return Response(
+        content="\n".join(lines) + "\n",
+        media_type="application/vnd.apple.mpegurl",
+        # Presigned file URLs expire after 1 hour; keep the playlist cache well below that.
+        headers={"Cache-Control": "public, max-age=300"},
+    )
 
 
 @router.post(
@@ -166,6 +535,7 @@ def get_song(
     response_model=CheckFileResponse,
     status_code=status.HTTP_200_OK,
 )
+@query_budget(2)
 def check_file(
     payload: CheckFileRequest,
     db: Session = Depends(get_db),
@@ -179,6 +549,7 @@ def check_file(
         db.query(Song)
         .filter(
             Song.file_hash == payload.file_hash,
+            Song.hash_verified.is_(True),
             Song.s3_key.isnot(None),
         )
         .order_by(Song.created_at.asc())
@@ -214,6 +585,7 @@ def check_file(
     response_model=UploadUrlResponse,
     status_code=status.HTTP_200_OK,
 )
+@query_budget(3)
 def get_upload_url(
     payload: UploadUrlRequest,
     db: Session = Depends(get_db),
@@ -223,6 +595,8 @@ def get_upload_url(
     Generate presigned URL for uploading an audio file to S3.
     Only content_type "audio/mpeg" is allowed.
     If a file with the same SHA256 hash already exists, reuse its S3 object.
+    Otherwise the upload must fit the user's quota (403); size_bytes, when given, counts
+    towards it and is signed into the URL.
     """
     if payload.content_type != ALLOWED_UPLOAD_CONTENT_TYPE:
         logger.warning(
@@ -245,6 +619,7 @@ def get_upload_url(
         db.query(Song)
         .filter(
             Song.file_hash == payload.file_hash,
+            Song.hash_verified.is_(True),
             Song.s3_key.isnot(None),
         )
         .order_by(Song.created_at.asc())
@@ -273,12 +648,18 @@ def get_upload_url(
             already_exists=True,
         )
 
+    try:
+        library_stats.check_quota(db, current_user.id, new_bytes=payload.size_bytes or 0)
+    except library_stats.QuotaExceeded as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e)) from e
+
     object_key = build_s3_key(payload.filename)
     try:
         upload_url = generate_presigned_upload_url(
             object_key=object_key,
             content_type=ALLOWED_UPLOAD_CONTENT_TYPE,
             expires_in=3600,
+            content_length=payload.size_bytes,
         )
         file_url = get_file_url(object_key)
         logger.info(
@@ -305,20 +686,26 @@ def get_upload_url(
 # Auth – confirm upload: save metadata to DB after client uploaded file to S3
 @router.post(
     "/confirm-upload",
-    response_model=SongResponse,
+    response_model=ConfirmUploadResponse,
     status_code=status.HTTP_201_CREATED,
 )
+@query_budget(10)
 def confirm_upload(
     payload: ConfirmUploadRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> SongResponse:
+) -> ConfirmUploadResponse:
     """
     After client uploads file to S3 using upload-url, call this to save metadata.
     Verifies file exists in S3 (head_object). DB stores only s3_key; URL generated at response time.
+    The object's size is checked against the storage quota (403) and counted in user_stats,
+    in the same transaction as the song.
+    Post-upload processing is queued in the same transaction; processing_status tracks it.
+    With report_duplicates, the file is fingerprinted inline and acoustically similar
+    songs (re-encodes, re-tagged copies) are listed in likely_duplicates.
     """
     try:
-        exists = object_exists(payload.key)
+        size = head_object_size(payload.key)
     except RuntimeError as e:
         logger.error(
             "confirm-upload S3 infra error",
@@ -328,7 +715,7 @@ def confirm_upload(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="S3 check failed",
         ) from e
-    if not exists:
+    if size is None:
         logger.warning(
             "confirm-upload file not found in S3",
             extra={"key": payload.key, "user_id": current_user.id},
@@ -337,26 +724,45 @@ def confirm_upload(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File not found in S3. Upload the file first.",
         )
-    existing = db.query(Song).filter(Song.s3_key == payload.key).first()
-    if existing:
-        logger.info(
-            "confirm-upload duplicate key, returning existing",
-            extra={"key": payload.key, "user_id": current_user.id},
-        )
-        return song_to_response(existing)
-    # Do NOT store presigned URL in DB; only s3_key. file_url generated at response time.
-    song = Song(
-        title=payload.title or None,
-        s3_key=payload.key,
-        file_url=None,
-        audio_url="",
-        is_public=True,
-        owner_id=current_user.id,
-    )
-    db.add(song)
+    # Row lock: concurrent confirms of one user are checked one after the other. A retry
+    # of a confirmed upload is over quota by its own song: decide after the insert.
+    try:
+        library_stats.check_quota(db, current_user.id, new_bytes=size, lock=True)
+        over_quota = None
+    except library_stats.QuotaExceeded as e:
+        over_quota = e
     try:
+        # Do NOT store presigned URL in DB; only s3_key. file_url generated at response time.
+        song = _insert_song(
+            db,
+            title=payload.title or None,
+            s3_key=payload.key,
+            file_url=None,
+            audio_url="",
+            is_public=True,
+            owner_id=current_user.id,
+            size_bytes=size,
+            processing_status=enqueue_jobs(db, payload.key, rerun=("verify_hash",)),
+        )
+        if song is None:
+            db.rollback()
+            logger.info(
+                "confirm-upload duplicate key, returning existing",
+                extra={"key": payload.key, "user_id": current_user.id},
+            )
+            return song_to_response(_existing_original(db, payload.key, current_user))
+        if over_quota is not None:
+            db.rollback()
+            logger.warning(
+                "confirm-upload over quota",
+                extra={"key": payload.key, "user_id": current_user.id, "bytes": size},
+            )
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(over_quota))
+        library_stats.adjust_stats(db, current_user.id, library_stats.song_usage(size, False))
         db.commit()
         db.refresh(song)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             "confirm-upload DB insert failed",
@@ -367,11 +773,83 @@ def confirm_upload(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error",
         ) from e
+    _reindex_song(song)
     logger.info(
         "confirm-upload success",
         extra={"key": payload.key, "user_id": current_user.id, "song_id": song.id},
     )
-    return song_to_response(song)
+    response = ConfirmUploadResponse(**song_to_response(song).model_dump())
+    if payload.report_duplicates:
+        # Opt-in analysis of the stored song (decode, index sync, lookup): not counted
+        # against the upload's query budget.
+        with untracked():
+            response.likely_duplicates = _find_likely_duplicates(db, song, current_user)
+    _publish_song_created(song, response)
+    return response
+
+
+def _insert_song(db: Session, **values) -> Song | None:
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING against uq_songs_s3_key_original (one live
+    non-deduplicated song per object): None when the object already has one, e.g. a
+    client retrying a request whose response it never got. Deduplicated rows never conflict.
+    """
+    return db.scalars(
+        pg_insert(Song)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[Song.s3_key], index_where=ORIGINAL_SONG_WHERE)
+        .returning(Song)
+    ).first()
+
+
+def _existing_original(db: Session, s3_key: str, current_user: User) -> Song:
+    """The song that made _insert_song conflict: mine (a retry) or a 409."""
+    song = db.scalars(select(Song).where(Song.s3_key == s3_key, ORIGINAL_SONG_WHERE)).first()
+    if song is None or song.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Object already used by another song")
+    return song
+
+
+def _find_likely_duplicates(db: Session, song: Song, current_user: User) -> list[DuplicateMatch]:
+    """Fingerprint song's object now and look it up in the LSH index (other objects only)."""
+    try:
+        sig = fingerprint_audio(song.s3_key)
+    except AudioDecodeError as e:
+        # The queued fingerprint job retries; the upload itself still succeeds.
+        logger.warning("confirm-upload fingerprint failed", extra={"key": song.s3_key, "error": str(e)})
+        return []
+    sync_fingerprint_index(db)
+    similarity = {
+        key: score
+        for key, score in fingerprint_index.query(sig)
+        if key != song.s3_key
+    }
+    if not similarity:
+        return []
+    # Only songs the caller may see; oldest song per object.
+    candidates = (
+        db.query(Song)
+        .filter(
+            Song.s3_key.in_(list(similarity)),
+            Song.is_deleted.is_(False),
+            or_(Song.is_public.is_(True), Song.owner_id == current_user.id),
+        )
+        .order_by(Song.created_at.asc())
+        .all()
+    )
+    matches: dict[str, DuplicateMatch] = {}
+    for candidate in candidates:
+        if candidate.s3_key not in matches:
+            matches[candidate.s3_key] = DuplicateMatch(
+                song_id=candidate.id,
+                s3_key=candidate.s3_key,
+                similarity=round(similarity[candidate.s3_key], 3),
+            )
+    logger.info(
+        "confirm-upload near-duplicate check",
+        extra={"key": song.s3_key, "user_id": current_user.id, "matches": len(matches)},
+    )
+    return sorted(matches.values(), key=lambda m: m.similarity, reverse=True)
 
 
 # S3 key pattern (songs/{8-hex}.mp3) — must match upload flow
@@ -399,8 +877,10 @@ def _s3_key_from_audio_url(audio_url: str) -> str | None:
     response_model=SongResponse,
     status_code=status.HTTP_201_CREATED,
 )
+@query_budget(9)
 def create_song(
     payload: SongCreate,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -412,11 +892,13 @@ def create_song(
         s3_key = _s3_key_from_audio_url(payload.audio_url)
 
     # If file_hash is provided, try to reuse existing S3 object (dedup safety net).
+    existing = None
     if payload.file_hash:
         existing = (
             db.query(Song)
             .filter(
                 Song.file_hash == payload.file_hash,
+                Song.hash_verified.is_(True),
                 Song.s3_key.isnot(None),
             )
             .order_by(Song.created_at.asc())
@@ -430,27 +912,157 @@ def create_song(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="object_key required when creating song (or audio_url must be a valid S3 URL from upload)",
         )
-    song = Song(
+    # A dedup hit stores nothing new; otherwise the size is added by the verify_hash job.
+    size = existing.size_bytes if existing else None
+    try:
+        library_stats.check_quota(db, current_user.id, lock=True)
+        over_quota = None
+    except library_stats.QuotaExceeded as e:
+        over_quota = e  # unless this is a retry (conflict below)
+    # A fresh object: the insert conflicts if it already has its song (retry, or taken).
+    song = _insert_song(
+        db,
         title=payload.title,
         artist=payload.artist,
         s3_key=s3_key,
         file_hash=payload.file_hash,
+        # Reusing a verified object: its hash is already server-checked.
+        hash_verified=existing is not None,
         audio_url=payload.audio_url or "",
         is_public=payload.is_public,
         owner_id=current_user.id,
+        size_bytes=size,
+        deduped=existing is not None,
+        processing_status=enqueue_jobs(
+            db, s3_key, rerun=() if existing is not None else ("verify_hash",)
+        ),
     )
-
-    db.add(song)
+    if song is None:
+        db.rollback()
+        response.status_code = status.HTTP_200_OK
+        return song_to_response(_existing_original(db, s3_key, current_user))
+    if over_quota is not None:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(over_quota))
+    library_stats.adjust_stats(db, current_user.id, library_stats.song_usage(size, existing is not None))
     db.commit()
     db.refresh(song)
+    _reindex_song(song)
+
+    created = song_to_response(song)
+    _publish_song_created(song, created)
+    return created
+
+
+def _bulk_where(payload: SongBulkSelect, owner_id: int) -> list:
+    """My live songs, by id list (one = ANY(:ids) array parameter) or by filter."""
+    conditions = [Song.owner_id == owner_id, Song.is_deleted.is_(False)]
+    if payload.ids is not None:
+        conditions.append(Song.id == any_(bindparam("ids", payload.ids, type_=ARRAY(Integer))))
+    else:
+        f = payload.filter
+        if f.q:
+            conditions.append(or_(Song.title.ilike(f"%{f.q}%"), Song.artist.ilike(f"%{f.q}%")))
+        if f.artist is not None:
+            conditions.append(Song.artist == f.artist)
+        if f.is_public is not None:
+            conditions.append(Song.is_public.is_(f.is_public))
+    return conditions
+
+
+def _bulk_results(
+    db: Session,
+    payload: SongBulkSelect,
+    hit_ids: list[int],
+    done: str,
+    owner_id: int,
+) -> list[SongBulkOutcome]:
+    """Per-id outcomes; missed ids are told apart like PUT/DELETE /{id} do (404 vs 403)."""
+    if payload.ids is None:
+        return [SongBulkOutcome(id=song_id, status=done) for song_id in sorted(hit_ids)]
+    hit = set(hit_ids)
+    missing = set(payload.ids) - hit
+    others: set[int] = set()
+    if missing:
+        others = set(db.scalars(
+            select(Song.id).where(
+                Song.id.in_(missing),
+                Song.is_deleted.is_(False),
+                Song.owner_id != owner_id,
+            )
+        ))
+    results = []
+    for song_id in dict.fromkeys(payload.ids):
+        if song_id in hit:
+            outcome = done
+        else:
+            outcome = "forbidden" if song_id in others else "not_found"
+        results.append(SongBulkOutcome(id=song_id, status=outcome))
+    return results
+
+
+# Auth + ownership – same changes for many songs in one UPDATE ... RETURNING
+@router.patch("", response_model=SongBulkResponse)
+@query_budget(3)
+def bulk_update_songs(
+    payload: SongBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    owner_id = current_user.id  # read before commit expires the instance
+    rows = db.execute(
+        update(Song)
+        .where(*_bulk_where(payload, owner_id))
+        .values(**payload.changes.model_dump(exclude_unset=True))
+        .returning(Song.id, Song.title, Song.artist, Song.is_public)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    songs_changed(
+        [r.id for r in rows],
+        upserts=[(r.id, r.title, r.artist) for r in rows if r.is_public],
+        removals=[r.id for r in rows if not r.is_public],
+    )
+    logger.info("bulk update", extra={"user_id": owner_id, "affected": len(rows)})
+    return SongBulkResponse(
+        affected=len(rows),
+        results=_bulk_results(db, payload, [r.id for r in rows], "updated", owner_id),
+    )
 
-    return song_to_response(song)
+
+# Auth + ownership – soft delete many songs in one UPDATE ... RETURNING
+@router.delete("", response_model=SongBulkResponse)
+@query_budget(4)
+def bulk_delete_songs(
+    payload: SongBulkSelect,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    owner_id = current_user.id  # read before commit expires the instance
+    rows = db.execute(
+        update(Song)
+        .where(*_bulk_where(payload, owner_id))
+        .values(is_deleted=True)
+        .returning(Song.id, Song.size_bytes, Song.deduped)
+        .execution_options(synchronize_session=False)
+    ).all()
+    deleted = [r.id for r in rows]
+    removed = sum((library_stats.song_usage(r.size_bytes, r.deduped) for r in rows), library_stats.Usage())
+    library_stats.adjust_stats(db, owner_id, removed, sign=-1)
+    db.commit()
+    songs_changed(deleted, removals=deleted)
+    logger.info("bulk delete", extra={"user_id": owner_id, "affected": len(deleted)})
+    return SongBulkResponse(
+        affected=len(deleted),
+        results=_bulk_results(db, payload, deleted, "deleted", owner_id),
+    )
 
 
 @router.put(
     "/{song_id}",
     response_model=SongResponse,
 )
+@query_budget(4)
 def update_song(
     song_id: int,
     payload: SongUpdate,
@@ -473,11 +1085,13 @@ def update_song(
 
     db.commit()
     db.refresh(song)
+    _reindex_song(song)
 
     return song_to_response(song)
 
 # Auth + ownership
 @router.delete("/{song_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(4)
 def delete_song(
     song_id: int,
     db: Session = Depends(get_db),
@@ -494,5 +1108,45 @@ def delete_song(
     if song.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    song.is_deleted = True
+    # UPDATE ... RETURNING: the size as of the delete (the verify_hash job may have set it)
+    removed = db.execute(
+        update(Song)
+        .where(Song.id == song_id, Song.is_deleted.is_(False))
+        .values(is_deleted=True)
+        .returning(Song.size_bytes, Song.deduped)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if removed is not None:
+        library_stats.adjust_stats(db, song.owner_id, library_stats.song_usage(*removed), sign=-1)
     db.commit()
+    songs_changed([song_id], removals=[song_id])
+
+
+# Auth + ownership – undo a delete, also once the song was archived (app.services.archive)
+@router.post("/{song_id}/restore", response_model=SongResponse)
+@query_budget(8)
+def restore_song(
+    song_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    owner_id = current_user.id  # read before commit expires the instance
+    try:
+        restored = archive.restore_songs(db, [song_id], owner_id=owner_id)
+    except IntegrityError as e:
+        # An upload (which does not take the restore lock) made the object a live original
+        # meanwhile; a retry restores the song as deduplicated.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Song's file changed meanwhile, retry") from e
+    if not restored:
+        raise HTTPException(status_code=404, detail="Deleted song not found")
+    try:
+        # The restored song is already counted: check the totals as they now stand.
+        library_stats.check_quota(db, owner_id, new_songs=0)
+    except library_stats.QuotaExceeded as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e)) from e
+    db.commit()
+    song = db.get(Song, song_id)
+    _reindex_song(song)
+    return song_to_response(song)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.schemas.user import UserStatsResponse
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.db.query_budget import query_budget
+from app.db.session import get_db
+from app.models.user import User
+from app.models.user_stats import UserStats
+
+router = APIRouter()
+
+
+# Auth – library usage from the user_stats counters (one primary-key lookup)
+@router.get("/me/stats", response_model=UserStatsResponse)
+@query_budget(2)
+def get_my_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> UserStatsResponse:
+    stats = db.get(UserStats, current_user.id)
+    if stats is None:
+        # No song written yet (row created by the first upload or the reconciler)
+        stats = UserStats(song_count=0, bytes_stored=0, deduped_bytes=0)
+    return UserStatsResponse(
+        song_count=stats.song_count,
+        bytes_stored=stats.bytes_stored,
+        deduped_bytes=stats.deduped_bytes,
+        uploaded_bytes=stats.bytes_stored - stats.deduped_bytes,
+        max_songs=settings.QUOTA_MAX_SONGS or None,
+        max_bytes=settings.QUOTA_MAX_BYTES or None,
+        updated_at=stats.updated_at,
+        reconciled_at=stats.reconciled_at,
+    )
@@ -0,0 +1,425 @@
+"""
+Operator commands.
+
+    python -m app.cli import <dir | manifest.csv | manifest.jsonl> --owner EMAIL [options]
+
+import: bulk catalog onboarding without going through the public upload API.
+  1. Files are hashed (sha256, streamed) in a process pool, running ahead of the uploader.
+  2. Per batch, one query finds hashes already in the catalog; those songs reuse the
+     existing object instead of uploading it again.
+  3. New files are uploaded with bounded concurrency: --upload-workers files at a time,
+     each multipart with --part-concurrency parts in flight.
+  4. Song rows and their post-upload jobs are inserted per batch (executemany).
+  5. A checkpoint file records uploaded objects and imported files, so an interrupted
+     import resumes where it stopped without hashing or uploading the same files again.
+A manifest is CSV (header: path,title,artist) or JSON lines with the same keys; paths are
+relative to the manifest. Empty title / artist are filled from ID3 tags by the metadata job.
+
+    python -m app.cli migrate [--status]
+
+migrate: apply pending backend/migrations (deploy step; see MIGRATE_ON_STARTUP).
+
+    python -m app.cli reconcile-stats [--fill-sizes N]
+
+reconcile-stats: recompute every user's user_stats counters from songs now (job workers
+also do it every STATS_RECONCILE_INTERVAL_SECONDS), after backfilling up to N missing
+object sizes.
+
+    python -m app.cli archive-songs [--older-than-days D] [--batch-size N] [--max-batches N]
+    python -m app.cli restore-songs ID [ID ...] [--owner EMAIL]
+
+archive-songs: move songs soft-deleted more than D days ago to songs_archive now, in batches
+(job workers also do it every SONG_ARCHIVE_INTERVAL_SECONDS); the first run on an existing
+catalog can be spread out with --max-batches. restore-songs: undelete songs, archived or
+not (of EMAIL only, if given); typeahead suggestions pick them up on the next API start.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+import app.db.init_db  # noqa: F401 - registers every model with the ORM mapper
+from app.db.migrate import discover, migrate, pending_migrations
+from app.db.session import SessionLocal, engine
+from app.models.song import Song
+from app.models.user import User
+from app.services import archive, library_stats, s3
+from app.services.jobs import POST_UPLOAD_JOBS, enqueue_jobs_many, object_statuses
+
+HASH_READ_SIZE = 1024 * 1024
+CONTENT_TYPE = "audio/mpeg"
+# The importer hashes the exact bytes it uploads, so the server-side re-check is skipped.
+IMPORT_JOBS = tuple(t for t in POST_UPLOAD_JOBS if t != "verify_hash")
+MB = 1024 * 1024
+
+
+@dataclass
+class ImportEntry:
+    path: str  # absolute
+    title: str | None = None
+    artist: str | None = None
+
+
+@dataclass
+class ImportStats:
+    total: int
+    skipped: int = 0  # already imported according to the checkpoint
+    imported: int = 0
+    deduplicated: int = 0  # imported by reusing an existing object
+    hashed_bytes: int = 0
+    uploaded_files: int = 0
+    uploaded_bytes: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines, fsynced per batch:
+    {"uploaded": s3_key, "hash": sha256} once an object is in S3,
+    {"imported": path, "song_id": id} once its song row is committed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.imported: set[str] = set()
+        self.uploaded: dict[str, str] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted run
+                    if "imported" in record:
+                        self.imported.add(record["imported"])
+                    elif "uploaded" in record:
+                        self.uploaded[record["hash"]] = record["uploaded"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records: list[dict]) -> None:
+        if not records:
+            return
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_entries(source: Path) -> list[ImportEntry]:
+    if source.is_dir():
+        return [
+            ImportEntry(str(p.resolve()))
+            for p in sorted(source.rglob("*"))
+            if p.is_file() and p.suffix.lower() == ".mp3"
+        ]
+    with open(source, newline="", encoding="utf-8") as f:
+        if source.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [
+        ImportEntry(
+            str((source.parent / row["path"]).resolve()),
+            (row.get("title") or "").strip()[:255] or None,
+            (row.get("artist") or "").strip() or None,
+        )
+        for row in rows
+    ]
+
+
+def hash_file(path: str) -> tuple[str | None, int, str | None]:
+    """(sha256 hex, size, error) of a local file; runs in the hashing processes."""
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_READ_SIZE):
+                h.update(chunk)
+                size += len(chunk)
+    except OSError as e:
+        return None, 0, str(e)
+    return h.hexdigest(), size, None
+
+
+def _new_keys(db: Session, count: int, taken: set[str]) -> list[str]:
+    """Fresh songs/<8 hex>.mp3 keys; the short random part can collide at catalog scale."""
+    keys: set[str] = set()
+    while len(keys) < count:
+        candidates = {s3.build_s3_key("import.mp3") for _ in range(count - len(keys))}
+        candidates -= taken | keys
+        used = set(db.scalars(select(Song.s3_key).where(Song.s3_key.in_(candidates))))
+        keys |= candidates - used
+    return list(keys)
+
+
+def _import_batch(
+    db: Session,
+    batch: list[tuple[ImportEntry, str, int]],
+    owner: User,
+    args: argparse.Namespace,
+    client,
+    uploaders: ThreadPoolExecutor,
+    checkpoint: Checkpoint,
+    stats: ImportStats,
+) -> None:
+    hashes = list({digest for _, digest, _ in batch})
+    object_for_hash: dict[str, str] = {}
+    rows = db.execute(
+        select(Song.file_hash, Song.s3_key)
+        .where(Song.file_hash.in_(hashes), Song.hash_verified.is_(True))
+        .order_by(Song.created_at.asc())
+    )
+    for file_hash, s3_key in rows:
+        object_for_hash.setdefault(file_hash, s3_key)
+    known = set(object_for_hash)
+
+    to_upload: dict[str, tuple[ImportEntry, int]] = {}
+    for entry, digest, size in batch:
+        if digest in object_for_hash:
+            continue
+        if digest in checkpoint.uploaded:  # uploaded by an interrupted run
+            object_for_hash[digest] = checkpoint.uploaded[digest]
+            continue
+        to_upload.setdefault(digest, (entry, size))
+
+    keys = _new_keys(db, len(to_upload), set(checkpoint.uploaded.values()))
+    futures: dict[str, tuple[str, int, Future]] = {}
+    for (digest, (entry, size)), key in zip(to_upload.items(), keys):
+        futures[digest] = (key, size, uploaders.submit(
+            s3.upload_file,
+            entry.path,
+            key,
+            CONTENT_TYPE,
+            client,
+            args.part_size_mb * MB,
+            args.part_concurrency,
+        ))
+    upload_errors: dict[str, str] = {}
+    uploaded: dict[str, str] = {}
+    for digest, (key, size, future) in futures.items():
+        try:
+            future.result()
+        except RuntimeError as e:
+            upload_errors[digest] = str(e)
+            continue
+        uploaded[digest] = key
+        stats.uploaded_files += 1
+        stats.uploaded_bytes += size
+    checkpoint.write([{"uploaded": key, "hash": digest} for digest, key in uploaded.items()])
+    checkpoint.uploaded.update(uploaded)
+    object_for_hash.update(uploaded)
+
+    songs = []
+    paths = []
+    added = library_stats.Usage()
+    for entry, digest, size in batch:
+        if digest in upload_errors:
+            stats.failed.append((entry.path, upload_errors[digest]))
+            continue
+        deduped = digest in known or to_upload.get(digest, (None,))[0] is not entry
+        if deduped:
+            stats.deduplicated += 1
+        added += library_stats.song_usage(size, deduped)
+        songs.append({
+            "title": entry.title,
+            "artist": entry.artist,
+            "s3_key": object_for_hash[digest],
+            "file_hash": digest,
+            "hash_verified": True,
+            "audio_url": "",
+            "is_public": not args.private,
+            "owner_id": owner.id,
+            "size_bytes": size,
+            "deduped": deduped,
+        })
+        paths.append(entry.path)
+    if not songs:
+        return
+    s3_keys = [song["s3_key"] for song in songs]
+    enqueue_jobs_many(db, s3_keys, IMPORT_JOBS)
+    statuses = object_statuses(db, s3_keys)
+    for song in songs:
+        song["processing_status"] = statuses[song["s3_key"]]
+    song_ids = db.scalars(
+        insert(Song).returning(Song.id, sort_by_parameter_order=True),
+        songs,
+    ).all()
+    library_stats.adjust_stats(db, owner.id, added)
+    db.commit()
+    checkpoint.write([{"imported": path, "song_id": song_id} for path, song_id in zip(paths, song_ids)])
+    stats.imported += len(song_ids)
+
+
+def _report(stats: ImportStats, started: float, final: bool = False) -> None:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    line = (
+        f"{stats.imported + stats.skipped}/{stats.total} files"
+        f" | {stats.imported / elapsed:.1f} files/s"
+        f" | hashed {stats.hashed_bytes / MB / elapsed:.1f} MB/s"
+        f" | uploaded {stats.uploaded_bytes / MB / elapsed:.1f} MB/s"
+        f" ({stats.uploaded_files} new objects, {stats.deduplicated} deduplicated)"
+    )
+    if final:
+        line = (
+            f"done in {elapsed:.1f}s: {stats.imported} imported, {stats.skipped} already imported,"
+            f" {len(stats.failed)} failed\n{line}"
+        )
+    print(line, file=sys.stderr, flush=True)
+
+
+def import_catalog(args: argparse.Namespace) -> int:
+    source = Path(args.source)
+    if not source.exists():
+        print(f"error: {source} not found", file=sys.stderr)
+        return 2
+    entries = read_entries(source)
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else source.with_name(
+        source.name + ".checkpoint.jsonl"
+    )
+    checkpoint = Checkpoint(checkpoint_path)
+    pending = [e for e in entries if e.path not in checkpoint.imported]
+    stats = ImportStats(total=len(entries), skipped=len(entries) - len(pending))
+
+    db = SessionLocal()
+    try:
+        owner = db.scalar(select(User).where(User.email == args.owner))
+        if owner is None:
+            print(f"error: no user with email {args.owner}", file=sys.stderr)
+            return 2
+        client = s3.get_s3_client(
+            max_pool_connections=args.upload_workers * args.part_concurrency + 2
+        )
+        started = time.perf_counter()
+        # spawn: hashing processes must not inherit this process's open DB connection.
+        with ProcessPoolExecutor(
+            args.hash_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as hashers, ThreadPoolExecutor(args.upload_workers) as uploaders:
+            hashed = hashers.map(hash_file, [e.path for e in pending], chunksize=8)
+            batch: list[tuple[ImportEntry, str, int]] = []
+            for entry, (digest, size, error) in zip(pending, hashed):
+                if error:
+                    stats.failed.append((entry.path, error))
+                    continue
+                stats.hashed_bytes += size
+                batch.append((entry, digest, size))
+                if len(batch) >= args.batch_size:
+                    _import_batch(db, batch, owner, args, client, uploaders, checkpoint, stats)
+                    batch = []
+                    _report(stats, started)
+            if batch:
+                _import_batch(db, batch, owner, args, client, uploaders, checkpoint, stats)
+        _report(stats, started, final=True)
+    finally:
+        db.close()
+        checkpoint.close()
+    for path, error in stats.failed:
+        print(f"failed: {path}: {error}", file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def run_migrations(args: argparse.Namespace) -> int:
+    if args.status:
+        pending = {m.version for m in pending_migrations(engine)}
+        for m in discover():
+            print(f"{m.version:04d}_{m.name}: {'pending' if m.version in pending else 'applied'}")
+        return 0
+    applied = migrate(engine)
+    for m in applied:
+        print(f"applied {m.version:04d}_{m.name}", file=sys.stderr)
+    print(f"schema up to date ({len(applied)} applied)", file=sys.stderr)
+    return 0
+
+
+def reconcile_stats(args: argparse.Namespace) -> int:
+    drifted = library_stats.reconcile_stats(fill_sizes=args.fill_sizes)
+    if drifted is None:
+        print("error: a reconciliation is already running", file=sys.stderr)
+        return 1
+    print(f"user_stats reconciled ({drifted} users corrected)", file=sys.stderr)
+    return 0
+
+
+def archive_songs(args: argparse.Namespace) -> int:
+    moved = archive.archive_songs(
+        older_than_days=args.older_than_days,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+    )
+    if moved is None:
+        print("error: an archival is already running", file=sys.stderr)
+        return 1
+    print(f"{moved} songs archived", file=sys.stderr)
+    return 0
+
+
+def restore_songs(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        owner_id = None
+        if args.owner:
+            owner_id = db.scalar(select(User.id).where(User.email == args.owner))
+            if owner_id is None:
+                print(f"error: no user with email {args.owner}", file=sys.stderr)
+                return 1
+        restored = archive.restore_songs(db, args.ids, owner_id=owner_id)
+        db.commit()
+    missing = sorted(set(args.ids) - set(restored))
+    print(f"{len(restored)} songs restored", file=sys.stderr)
+    if missing:
+        print(f"not deleted or not found: {' '.join(map(str, missing))}", file=sys.stderr)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="MUZICC operator commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    imp = commands.add_parser("import", help="bulk import a directory of MP3s or a manifest")
+    imp.add_argument("source", help="directory (recursive *.mp3) or manifest (.csv / .jsonl)")
+    imp.add_argument("--owner", required=True, help="email of the user who will own the songs")
+    imp.add_argument("--private", action="store_true", help="import songs as private")
+    imp.add_argument("--hash-workers", type=int, default=os.cpu_count() or 2)
+    imp.add_argument("--upload-workers", type=int, default=8, help="files uploaded concurrently")
+    imp.add_argument("--part-concurrency", type=int, default=4, help="multipart parts in flight per file")
+    imp.add_argument("--part-size-mb", type=int, default=s3.UPLOAD_PART_SIZE // MB)
+    imp.add_argument("--batch-size", type=int, default=500, help="songs per lookup / insert batch")
+    imp.add_argument("--checkpoint", help="checkpoint file (default: <source>.checkpoint.jsonl)")
+    imp.set_defaults(func=import_catalog)
+
+    mig = commands.add_parser("migrate", help="apply pending schema migrations")
+    mig.add_argument("--status", action="store_true", help="list migrations without applying")
+    mig.set_defaults(func=run_migrations)
+
+    rec = commands.add_parser("reconcile-stats", help="recompute per-user library counters")
+    rec.add_argument("--fill-sizes", type=int, default=1000, help="max missing object sizes to backfill")
+    rec.set_defaults(func=reconcile_stats)
+
+    arc = commands.add_parser("archive-songs", help="move old soft-deleted songs to songs_archive")
+    arc.add_argument("--older-than-days", type=float, help="default: SONG_ARCHIVE_AFTER_DAYS")
+    arc.add_argument("--batch-size", type=int, help="songs per transaction (default: SONG_ARCHIVE_BATCH_SIZE)")
+    arc.add_argument("--max-batches", type=int, help="stop after N batches (default: until done)")
+    arc.set_defaults(func=archive_songs)
+
+    res = commands.add_parser("restore-songs", help="undelete songs, archived or not")
+    res.add_argument("ids", type=int, nargs="+", help="song ids")
+    res.add_argument("--owner", help="only songs of the user with this email")
+    res.set_defaults(func=restore_songs)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
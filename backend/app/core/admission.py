@@ -0,0 +1,210 @@
+"""
+Admission control: adaptive in-flight limits per route class, shedding load with 503.
+
+Sync routes share one threadpool and one DB pool; when Postgres slows down, requests pile
+up behind both until they all time out together. Instead, each route class (browse,
+write, auth, upload) admits at most `limit` requests at once. Excess requests wait in a
+FIFO queue up to the class's queue_timeout_ms, then get 503 + Retry-After.
+
+The limit adapts to observed service time (AIMD against a per-class latency target):
+- a request slower than target_ms shrinks the limit by BACKOFF, at most once per target_ms
+  (one "round trip"), so a burst of slow responses counts as one congestion signal;
+- a request within target while the limit is in use grows it by 1 / limit (about +1 per round).
+A uniformly slower database alone does not shed anything while requests still finish within
+target. Once they queue on the threadpool / DB pool past it, the limit falls back to what
+the backend sustains, queues hit their deadline and the excess is rejected early. So the
+accepted requests stay within about target_ms + queue_timeout_ms.
+
+Limits are per process, and the middleware runs on the event loop, so no locking is needed.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKOFF = 0.9
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    initial_limit: int
+    max_limit: int
+    target_ms: int  # service time above this is treated as congestion
+    queue_timeout_ms: int
+    min_limit: int = 1
+
+
+ROUTE_CLASSES: dict[str, RouteClass] = {
+    # Public and owner reads: short DB queries
+    "browse": RouteClass(initial_limit=16, max_limit=64, target_ms=300, queue_timeout_ms=100),
+    # Song create / update / delete / bulk
+    "write": RouteClass(initial_limit=8, max_limit=32, target_ms=500, queue_timeout_ms=250),
+    # Login / register: argon2 takes ~0.2 s of CPU per call
+    "auth": RouteClass(initial_limit=os.cpu_count() or 2, max_limit=2 * (os.cpu_count() or 2),
+                       target_ms=1000, queue_timeout_ms=500),
+    # check-file / upload-url / confirm-upload: S3 round trips, fingerprinting
+    "upload": RouteClass(initial_limit=4, max_limit=16, target_ms=2000, queue_timeout_ms=500),
+}
+
+_UPLOAD_PATH = re.compile(r"^/api/songs/(check-file|upload-url|confirm-upload)$")
+# Long-lived streams would hold a slot for minutes; health checks must never be shed.
+_EXEMPT_PATH = re.compile(r"^/api/(health(/.*)?|songs/(events|export))$")
+
+
+def classify(method: str, path: str) -> str | None:
+    """Route class of a request, or None when it bypasses admission control."""
+    path = path.rstrip("/") or "/"
+    if _EXEMPT_PATH.match(path):
+        return None
+    if path.startswith("/api/auth/"):
+        return "auth"
+    if _UPLOAD_PATH.match(path):
+        return "upload"
+    if path in ("/api/songs", "/api/playlists") or path.startswith(
+        ("/api/songs/", "/api/playlists/", "/api/users/")
+    ):
+        return "browse" if method in ("GET", "HEAD") else "write"
+    return None
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, route_class: RouteClass) -> None:
+        self.name = name
+        self.min_limit = route_class.min_limit
+        self.max_limit = settings.ADMISSION_LIMITS.get(name, route_class.max_limit)
+        self.limit = float(min(route_class.initial_limit, self.max_limit))
+        self.target = route_class.target_ms / 1000
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS.get(
+            name, route_class.queue_timeout_ms
+        ) / 1000
+        self.in_flight = 0
+        self.rejected = 0
+        self.last_logged = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._rtt_avg = 0.0
+        self._last_backoff = 0.0
+
+    async def acquire(self) -> bool:
+        """True when admitted (call release() afterwards); False when shed."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= max(1, int(self.limit)):
+            return self._reject()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if waiter.done():
+            return True  # slot handed over by release()
+        self._abandon(waiter)
+        return self._reject()
+
+    def release(self, rtt: float) -> None:
+        self.in_flight -= 1
+        self._update_limit(rtt)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is likely drained."""
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(backlog * self._rtt_avg / max(self.limit, 1)))
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self.release(0.0)  # got a slot but will not use it; not a latency sample
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> bool:
+        self.rejected += 1
+        return False
+
+    def _update_limit(self, rtt: float) -> None:
+        if rtt <= 0:
+            return
+        self._rtt_avg = rtt if self._rtt_avg == 0 else 0.9 * self._rtt_avg + 0.1 * rtt
+        old = int(self.limit)
+        if rtt > self.target:
+            now = time.monotonic()
+            if now - self._last_backoff >= self.target:
+                self._last_backoff = now
+                self.limit = max(self.min_limit, self.limit * BACKOFF)
+        elif self.in_flight + 1 >= self.limit / 2:  # only grow a limit that is being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if int(self.limit) != old:
+            logger.debug("Admission limit %s: %d -> %d", self.name, old, int(self.limit))
+
+
+limiters: dict[str, AdaptiveLimiter] = {
+    name: AdaptiveLimiter(name, route_class) for name, route_class in ROUTE_CLASSES.items()
+}
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware (no response buffering); see the module docstring."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        limiter = limiters[name]
+        if not await limiter.acquire():
+            now = time.monotonic()
+            if now - limiter.last_logged >= 1:  # at most one line per second per class
+                limiter.last_logged = now
+                logger.warning(
+                    "Shedding load: class=%s limit=%d rejected=%d",
+                    name,
+                    int(limiter.limit),
+                    limiter.rejected,
+                    extra={"route_class": name, "in_flight": limiter.in_flight},
+                )
+            await _send_overloaded(send, limiter.retry_after())
+            return
+        admitted = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - admitted)
+
+
+async def _send_overloaded(send, retry_after: int) -> None:
+    body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
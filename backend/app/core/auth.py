@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, status, Header
-from jose import JWTError, jwt
+from jose.exceptions import JWTError
 from sqlalchemy.orm import Session
 from typing import Annotated
 
-from app.core.config import settings
+from app.core.security import decode_access_token
 from app.db.session import get_db
 from app.models.user import User
 
@@ -29,11 +29,7 @@ def get_current_user(
         raise credentials_exception
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
+        payload = decode_access_token(token)
         sub: str | None = payload.get("sub")
         if sub is None:
             raise credentials_exception
@@ -46,3 +42,13 @@ def get_current_user(
         raise credentials_exception
 
     return user
+
+
+def get_optional_user(
+    authorization: Annotated[str | None, Header()] = None,
+    db: Session = Depends(get_db),
+) -> User | None:
+    """Anonymous requests get None; a bad or unknown token is still a 401."""
+    if not authorization:
+        return None
+    return get_current_user(authorization, db)
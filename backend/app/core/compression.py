@@ -0,0 +1,166 @@
+"""
+Negotiated response compression (Accept-Encoding: br, gzip) as pure ASGI middleware.
+
+- Only text-like payloads (JSON, NDJSON, msgpack, HLS playlists, plain text / CSV / HTML);
+  images, audio byte ranges, waveforms and SSE (text/event-stream) pass through untouched.
+- Complete bodies under COMPRESSION_MIN_BYTES go out as-is: the headers would eat the gain.
+- Streamed bodies (export) are compressed chunk by chunk, flushed after each chunk so the
+  client can decode as it downloads; the response stays streamed (no Content-Length).
+- Responses that already carry Content-Encoding (export?gzip=true), partial content and
+  304 / 204 are left alone. Strong ETags become weak, since the bytes differ per encoding.
+
+brotli is optional (br is offered only when the module is installed); gzip is zlib.
+"""
+import zlib
+from functools import lru_cache
+from typing import Any
+
+from app.core.config import settings
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/vnd.apple.mpegurl",
+    # Not a bare "text/": that would take in text/event-stream and hold a compressor per
+    # idle SSE connection.
+    "text/plain",
+    "text/csv",
+    "text/html",
+)
+_SKIP_STATUS = {204, 206, 304}
+
+
+@lru_cache(maxsize=1)
+def _brotli() -> Any:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """br or gzip as the client accepts them (q > 0), br first; None for identity."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if _brotli() is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = _brotli().Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 -> gzip container
+            self._gz = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so everything sent so far is decodable."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware (streaming-safe); see the module docstring."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        encoding = choose_encoding(accept_encoding.decode("latin-1")) if accept_encoding else None
+        await self.app(scope, receive, _CompressingSend(send, encoding).send)
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str | None) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.start: dict | None = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: dict) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = message.get("headers", [])
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+            if (
+                message["status"] in _SKIP_STATUS
+                or _header(headers, b"content-encoding") is not None
+                or _header(headers, b"content-range") is not None
+                or not content_type.startswith(_COMPRESSIBLE_TYPES)
+            ):
+                self.passthrough = True
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            # First body chunk: decide now that the size (or streaming) is known.
+            headers = [(k, v) for k, v in self.start.get("headers", []) if k.lower() != b"vary"]
+            vary = _header(self.start.get("headers", []), b"vary")
+            headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            if self.encoding is None or (not more_body and len(body) < settings.COMPRESSION_MIN_BYTES):
+                self.passthrough = True
+                await self._send({**self.start, "headers": headers})
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag")]
+            etag = _header(self.start["headers"], b"etag")
+            if etag is not None:
+                headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+            headers.append((b"content-encoding", self.encoding.encode()))
+            if not more_body:
+                compressed = self.compressor.finish(body)
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                await self._send({**self.start, "headers": headers})
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send({**self.start, "headers": headers})
+        if more_body:
+            data = self.compressor.chunk(body) if body else b""
+            if data:
+                await self._send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            await self._send({"type": "http.response.body", "body": self.compressor.finish(body)})
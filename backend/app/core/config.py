@@ -5,6 +5,50 @@ class Settings(BaseSettings):
     SECRET_KEY: str = ""
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Apply pending backend/migrations on API startup; turn off when a deploy step runs
+    # python -m app.cli migrate, so pods boot without touching the schema.
+    MIGRATE_ON_STARTUP: bool = True
+
+    # Startup warm-up and GET /api/health/ready
+    WARMUP_DB_CONNECTIONS: int = 4  # pool connections opened before reporting ready
+    READY_CHECK_TIMEOUT_SECONDS: float = 1.0
+    READY_CACHE_SECONDS: float = 2.0
+
+    # Admission control: adaptive in-flight limits per route class (app.core.admission)
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_LIMITS: dict[str, int] = {}  # max limit overrides, e.g. {"browse": 32}
+    ADMISSION_QUEUE_TIMEOUT_MS: dict[str, int] = {}  # queue deadline overrides per class
+
+    # Per-request SQL accounting (app.db.query_budget): off | log | enforce
+    QUERY_BUDGET_MODE: str = "log"
+    QUERY_REPEAT_THRESHOLD: int = 5  # same statement shape this often in one request = N+1
+
+    # GET /api/songs/{id} response cache per process (app.services.song_cache); size 0 = off
+    SONG_CACHE_SIZE: int = 10000
+    SONG_CACHE_TTL_SECONDS: float = 10.0
+    SONG_CACHE_STALE_SECONDS: float = 10.0  # serve the expired entry while one caller refreshes
+
+    # Response compression (app.core.compression), negotiated by Accept-Encoding
+    COMPRESSION: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024  # smaller complete bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; 4 is fast enough for dynamic responses
+
+    # Per-user library counters and upload quotas (app.services.library_stats); 0 = unlimited
+    QUOTA_MAX_SONGS: int = 0
+    QUOTA_MAX_BYTES: int = 0  # uploaded bytes; dedup hits do not count
+    STATS_RECONCILE_INTERVAL_SECONDS: float = 3600.0  # per job worker process; 0 = off
+
+    # Idempotency-Key replay cache for writes, per process (app.core.idempotency); size 0 = off
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    IDEMPOTENCY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 65536  # larger responses are not kept
+
+    # Archival of soft-deleted songs to songs_archive (app.services.archive)
+    SONG_ARCHIVE_AFTER_DAYS: float = 30.0
+    SONG_ARCHIVE_BATCH_SIZE: int = 1000
+    SONG_ARCHIVE_INTERVAL_SECONDS: float = 3600.0  # per job worker process; 0 = off
 
     # AWS S3 settings (IRSA in production – do NOT use static credentials)
     AWS_ACCESS_KEY_ID: str = ""  # Deprecated: kept only for local/dev overrides
@@ -14,6 +58,25 @@ class Settings(BaseSettings):
     S3_PUBLIC: bool = False  # True = direct S3 URL; False = presigned GET or CloudFront
     # CloudFront: when set, playback uses CDN URL (no presigned GET, S3 stays private)
     CLOUDFRONT_URL: str = ""
+    # Local S3-compatible endpoint (MinIO, benchmarks); empty = AWS
+    S3_ENDPOINT_URL: str = ""
+
+    # SSE new-song feed: "local" (in-process) or "postgres" (NOTIFY/LISTEN, shared by all workers)
+    EVENTS_BACKEND: str = "local"
+
+    # Audio decoding for post-upload analysis (waveform peaks, fingerprints)
+    FFMPEG_BINARY: str = "ffmpeg"
+    # Near-duplicate detection: local .npz snapshot of the fingerprint LSH index ("" = DB only)
+    FINGERPRINT_SNAPSHOT_PATH: str = ""
+
+    # Post-upload job queue (jobs table; workers: python -m app.worker)
+    JOB_WORKER_THREADS: int = 4  # per worker process
+    JOB_EMBEDDED_WORKERS: int = 0  # worker threads inside the API process (local dev)
+    JOB_CONCURRENCY: dict[str, int] = {}  # per-type limit overrides, e.g. {"waveform": 4}
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LEASE_SECONDS: int = 900  # a running job older than this is assumed lost and retried
+    JOB_BACKOFF_BASE_SECONDS: float = 10.0
+    JOB_BACKOFF_MAX_SECONDS: float = 900.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,225 @@
+"""
+Idempotency-Key support for writes (POST / PUT / PATCH / DELETE) as pure ASGI middleware.
+
+A client that retries a write (e.g. after a mobile timeout) sends the same Idempotency-Key
+header. The first completed response for (credentials, method, path, key) is kept in a
+bounded in-process LRU and replayed to retries with Idempotent-Replayed: true, without
+running the route again: no S3 call, no query.
+- Authenticated requests only: entries are scoped by a hash of the Authorization header,
+  so a key guessed by someone else replays nothing.
+- A retry arriving while the first request still runs waits for its response.
+- The same key with a different body is a client bug: 422.
+- 5xx responses and bodies over IDEMPOTENCY_MAX_BODY_BYTES are not kept: the retry runs.
+- Bounded by IDEMPOTENCY_CACHE_SIZE entries and IDEMPOTENCY_CACHE_MAX_BYTES of bodies,
+  entries expire after IDEMPOTENCY_TTL_SECONDS.
+
+Per process: a retry routed to another API worker runs again; song creation is then
+resolved by the unique index on the song's object (see songs._insert_song).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@dataclass
+class _Stored:
+    fingerprint: bytes  # sha256 of the request body
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+
+@dataclass
+class _InFlight:
+    fingerprint: bytes
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class ResponseCache:
+    """LRU of stored responses plus the requests in flight; event-loop only, no locking."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, _Stored] = OrderedDict()
+        self._in_flight: dict[bytes, _InFlight] = {}
+        self.bytes = 0
+        self.replays = 0
+
+    def get(self, key: bytes) -> _Stored | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def in_flight(self, key: bytes) -> _InFlight | None:
+        return self._in_flight.get(key)
+
+    def begin(self, key: bytes, fingerprint: bytes) -> _InFlight:
+        flight = self._in_flight[key] = _InFlight(fingerprint)
+        return flight
+
+    def finish(self, key: bytes, flight: _InFlight, stored: _Stored | None) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if stored is not None:
+            self._drop(key)
+            self._entries[key] = stored
+            self.bytes += len(stored.body)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+        flight.done.set()
+
+    def _drop(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.body)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.IDEMPOTENCY_CACHE_SIZE,
+    max_bytes=settings.IDEMPOTENCY_CACHE_MAX_BYTES,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+)
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+async def _error(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, stored: _Stored) -> None:
+    response_cache.replays += 1
+    await send({
+        "type": "http.response.start",
+        "status": stored.status,
+        "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware; see the module docstring."""
+
+    def __init__(self, app, cache: ResponseCache = response_cache) -> None:
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] not in _METHODS or self.cache.max_entries <= 0:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = _header(scope["headers"], HEADER)
+        authorization = _header(scope["headers"], b"authorization")
+        if idempotency_key is None or authorization is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        # The body is read up front (JSON writes are small) to fingerprint it.
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).digest()
+        key = hashlib.sha256(b"\0".join((
+            authorization,
+            scope["method"].encode(),
+            scope["path"].encode(),
+            scope.get("query_string", b""),
+            idempotency_key,
+        ))).digest()
+
+        while True:
+            stored = self.cache.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    await _error(send, 422, "Idempotency-Key reused with a different request body")
+                else:
+                    await _replay(send, stored)
+                return
+            flight = self.cache.in_flight(key)
+            if flight is None:
+                break
+            if flight.fingerprint != fingerprint:
+                await _error(send, 422, "Idempotency-Key reused with a different request body")
+                return
+            # Same request still running: wait, then replay it (or run if it was not kept).
+            await flight.done.wait()
+
+        flight = self.cache.begin(key, fingerprint)
+        start: dict | None = None
+        captured: list[bytes] | None = []
+        size = 0
+        sent_body = False
+
+        async def replay_receive() -> dict:
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message: dict) -> None:
+            nonlocal start, captured, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body" and captured is not None:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    captured = None
+                else:
+                    captured.append(chunk)
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if start is not None and start["status"] < 500 and captured is not None:
+                stored = _Stored(
+                    fingerprint=fingerprint,
+                    status=start["status"],
+                    headers=list(start.get("headers", [])),
+                    body=b"".join(captured),
+                    expires_at=time.monotonic() + self.cache.ttl,
+                )
+        finally:
+            self.cache.finish(key, flight, stored)
@@ -0,0 +1,78 @@
+"""
+Response format negotiation: MessagePack instead of JSON when the Accept header prefers it.
+
+Used by the song list, get and export endpoints, where long file URLs and repeated keys
+dominate the payload. The JSON path is untouched (FastAPI's response_model); msgpack
+responses carry the same fields, with datetimes as ISO 8601 strings. msgpack is an
+optional dependency: without it every client gets JSON.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+@lru_cache(maxsize=1)
+def _msgpack() -> Any:
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _accept_q(accept: str) -> dict[str, float]:
+    """media type -> q value of an Accept header (malformed q counts as 0)."""
+    result: dict[str, float] = {}
+    for part in accept.split(","):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[media_type.lower()] = max(q, result.get(media_type.lower(), 0.0))
+    return result
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True when Accept names a msgpack type at least as high as application/json."""
+    accept = request.headers.get("accept")
+    if not accept or "msgpack" not in accept or _msgpack() is None:
+        return False
+    q = _accept_q(accept)
+    msgpack_q = max(q.get(t, 0.0) for t in _MSGPACK_TYPES)
+    return msgpack_q > 0 and msgpack_q >= q.get("application/json", 0.0)
+
+
+def packb(content: Any) -> bytes:
+    return _msgpack().packb(content, use_bin_type=True)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def negotiate(request: Request, response: Response, content: Any, model: type[BaseModel]) -> Any:
+    """
+    Return value for a route with response_model=model: content unchanged (FastAPI renders
+    JSON) or a MsgPackResponse of the same fields, as the client's Accept prefers.
+    """
+    response.headers["Vary"] = "Accept"
+    if not wants_msgpack(request):
+        return content
+    if not isinstance(content, model):
+        content = model.model_validate(content)
+    return MsgPackResponse(content.model_dump(mode="json"), headers={"Vary": "Accept"})
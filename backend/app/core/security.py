@@ -1,23 +1,44 @@
 from datetime import datetime, timedelta
-from jose import jwt
-from passlib.context import CryptContext
-from app.core.config import settings
+from functools import lru_cache
+from typing import Any
 
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto"
-)
+from app.core.config import settings
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 
+# jose (crypto backends) and passlib + argon2 load on first use or in preload(),
+# not when the app is imported.
+@lru_cache(maxsize=1)
+def _jwt() -> Any:
+    from jose import jwt
+
+    return jwt
+
+
+@lru_cache(maxsize=1)
+def _pwd_context() -> Any:
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto"
+    )
+
+
+def preload() -> None:
+    """Warm-up: load the JWT and password hashing backends before the first auth request."""
+    _jwt()
+    _pwd_context()
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return _pwd_context().verify(password, hashed)
 
 
 def create_access_token(subject: int) -> str:
@@ -26,4 +47,9 @@ def create_access_token(subject: int) -> str:
         "sub": str(subject),
         "exp": expire,
     }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+    return _jwt().encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_access_token(token: str) -> dict:
+    """Raises jose.exceptions.JWTError on an invalid or expired token."""
+    return _jwt().decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -1,10 +1,15 @@
+from app.db.migrate import migrate
 from app.db.session import engine
-from app.db.base import Base
 
 # Import models để SQLAlchemy biết
 from app.models.user import User
 from app.models.song import Song
+from app.models.audio_index import AudioIndex
+from app.models.audio_fingerprint import AudioFingerprint
+from app.models.job import Job
+from app.models.user_stats import UserStats
+from app.models.playlist import Playlist, PlaylistItem
 
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
@@ -0,0 +1,212 @@
+"""
+Versioned schema migrations: backend/migrations/NNNN_<name>.sql, applied in order, once.
+
+- schema_migrations records each applied file (version, name, checksum, duration).
+- Up to date (every normal pod boot): a single SELECT, no lock, no schema reflection.
+- Otherwise a session-level advisory lock serializes runners, so pods rolling at once
+  queue behind the first one and then find nothing left to do. Waiters poll
+  pg_try_advisory_lock instead of blocking in a statement: CREATE INDEX CONCURRENTLY
+  waits for every open transaction, including a blocked pg_advisory_lock call.
+- A file runs in one transaction together with its version row, unless it uses
+  CONCURRENTLY: Postgres refuses that inside a transaction, so such a file runs statement
+  by statement in autocommit and must be idempotent (IF [NOT] EXISTS). An INVALID index
+  left behind by an interrupted concurrent build is dropped and built again.
+"""
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+# pg_advisory_lock key shared by every runner of this schema
+MIGRATION_LOCK_ID = 0x4D5A4D47
+LOCK_POLL_SECONDS = 0.5
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_CONCURRENTLY_RE = re.compile(r"\bCONCURRENTLY\b", re.IGNORECASE)
+_CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)",
+    re.IGNORECASE,
+)
+
+_CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    duration_ms INTEGER NOT NULL
+)
+"""
+
+
+class MigrationError(RuntimeError):
+    """Raised when the migrations directory is inconsistent or a migration fails."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+    @property
+    def concurrent(self) -> bool:
+        return any(_CONCURRENTLY_RE.search(s) for s in split_statements(self.sql))
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            raise MigrationError(f"Migration file name must be NNNN_name.sql: {path.name}")
+        migrations.append(Migration(int(match[1]), match[2], path.read_text(encoding="utf-8")))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise MigrationError("Duplicate migration version numbers")
+    return migrations
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split on top-level semicolons, skipping comments, quoted strings and $tag$ bodies."""
+    statements: list[str] = []
+    current: list[str] = []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            current.append("\n")
+            continue
+        if ch == "'":
+            end = i + 1
+            while True:
+                end = sql.find("'", end)
+                if end == -1 or not sql.startswith("''", end):
+                    break
+                end += 2
+            end = n if end == -1 else end + 1
+            current.append(sql[i:end])
+            i = end
+            continue
+        dollar = re.match(r"\$\w*\$", sql[i:]) if ch == "$" else None
+        if dollar:
+            tag = dollar.group(0)
+            end = sql.find(tag, i + len(tag))
+            end = n if end == -1 else end + len(tag)
+            current.append(sql[i:end])
+            i = end
+            continue
+        if ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def applied_migrations(conn: Connection) -> dict[int, str] | None:
+    """version -> checksum of applied migrations; None if the version table does not exist."""
+    if conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar() is None:
+        return None
+    return dict(conn.execute(text("SELECT version, checksum FROM schema_migrations")).all())
+
+
+def pending_migrations(engine: Engine, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = discover(directory)
+    with engine.connect() as conn:
+        applied = applied_migrations(conn) or {}
+    for m in migrations:
+        if m.version in applied and applied[m.version] != m.checksum:
+            logger.warning("Applied migration %04d_%s was modified since", m.version, m.name)
+    return [m for m in migrations if m.version not in applied]
+
+
+def _drop_invalid_indexes(conn: Connection, statement: str) -> None:
+    for name in _CONCURRENT_INDEX_RE.findall(statement):
+        valid = conn.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name},
+        ).scalar()
+        if valid is False:
+            logger.warning("Dropping invalid index %s left by an interrupted build", name)
+            conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def _record(conn: Connection, m: Migration, started: float) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO schema_migrations (version, name, checksum, duration_ms)"
+            " VALUES (:version, :name, :checksum, :duration_ms)"
+        ),
+        {
+            "version": m.version,
+            "name": m.name,
+            "checksum": m.checksum,
+            "duration_ms": round((time.perf_counter() - started) * 1000),
+        },
+    )
+
+
+def _apply(engine: Engine, lock_conn: Connection, m: Migration) -> None:
+    started = time.perf_counter()
+    if m.concurrent:
+        for statement in split_statements(m.sql):
+            _drop_invalid_indexes(lock_conn, statement)
+            lock_conn.exec_driver_sql(statement)
+        _record(lock_conn, m, started)
+    else:
+        with engine.begin() as conn:
+            for statement in split_statements(m.sql):
+                conn.exec_driver_sql(statement)
+            _record(conn, m, started)
+    logger.info(
+        "Applied migration %04d_%s in %.0f ms",
+        m.version, m.name, (time.perf_counter() - started) * 1000,
+    )
+
+
+def migrate(engine: Engine, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Apply pending migrations in order; returns those applied by this call."""
+    if not pending_migrations(engine, directory):
+        return []
+    applied_now: list[Migration] = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        while not lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+        ).scalar():
+            time.sleep(LOCK_POLL_SECONDS)
+        try:
+            lock_conn.exec_driver_sql(_CREATE_VERSION_TABLE)
+            # Re-read under the lock: another runner may have finished meanwhile.
+            applied = applied_migrations(lock_conn) or {}
+            for m in discover(directory):
+                if m.version in applied:
+                    continue
+                try:
+                    _apply(engine, lock_conn, m)
+                except Exception as e:
+                    raise MigrationError(f"Migration {m.version:04d}_{m.name} failed: {e}") from e
+                applied_now.append(m)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    return applied_now
@@ -0,0 +1,182 @@
+"""
+Per-request SQL accounting: query counts, statement shapes, budgets and N+1 detection.
+
+A before_cursor_execute listener counts every statement run while a request is in
+flight, grouped by fingerprint (the SQL with bound parameters, literals and IN lists
+normalized). A route declares its budget with @query_budget(n) under the router
+decorator; dependencies (get_db, get_current_user) count towards it.
+
+QUERY_BUDGET_MODE:
+- off      no accounting
+- log      warn after the request when it exceeded its budget, or when one statement
+           shape ran QUERY_REPEAT_THRESHOLD times or more (a loop issuing one query per
+           row, typically a lazy-loaded relationship)
+- enforce  raise QueryBudgetExceeded at the offending statement: the request fails with
+           500. For test runs and benchmarks (QUERY_BUDGET_MODE=enforce), not production.
+
+Sync routes run in the threadpool with a copy of the request's context, so the tracker
+set by the middleware is visible to the session's queries.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in enforce mode when a request exceeds its budget or repeats a statement shape."""
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Declare the most SQL statements one request to this route may run."""
+    def decorate(endpoint: F) -> F:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorate
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: same SQL modulo parameter values, literals and IN-list lengths."""
+    shape = _PARAM_RE.sub("?", statement)
+    shape = _LITERAL_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class QueryTracker:
+    def __init__(self, scope: dict | None = None, enforce: bool = False) -> None:
+        # The router fills scope["endpoint"] once the route matched, before any query runs.
+        self.scope = scope
+        self.enforce = enforce
+        self.count = 0
+        self._statements: Counter[str] = Counter()
+
+    @property
+    def route(self) -> str | None:
+        endpoint = (self.scope or {}).get("endpoint")
+        return getattr(endpoint, "__name__", None)
+
+    @property
+    def budget(self) -> int | None:
+        return getattr((self.scope or {}).get("endpoint"), "__query_budget__", None)
+
+    def shapes(self) -> Counter[str]:
+        """Executions per fingerprint; raw statements are only normalized here."""
+        shapes: Counter[str] = Counter()
+        for statement, n in self._statements.items():
+            shapes[fingerprint(statement)] += n
+        return shapes
+
+    def repeated(self) -> list[tuple[str, int]]:
+        threshold = settings.QUERY_REPEAT_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes().most_common() if n >= threshold]
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self._statements[statement] += 1
+        if not self.enforce:
+            return
+        budget = self.budget
+        if budget is not None and self.count > budget:
+            raise QueryBudgetExceeded(
+                f"{self.route} ran more than {budget} queries; "
+                f"statement {self.count}: {fingerprint(statement)[:200]}"
+            )
+        # Exact-text repeats are enough here; shape merging happens in report().
+        if self._statements[statement] >= settings.QUERY_REPEAT_THRESHOLD:
+            raise QueryBudgetExceeded(
+                f"{self.route} ran the same statement {self._statements[statement]} times "
+                f"(N+1?): {fingerprint(statement)[:200]}"
+            )
+
+    def report(self) -> None:
+        """Log budget overruns and repeated statement shapes of a finished request."""
+        budget = self.budget
+        if budget is not None and self.count > budget:
+            logger.warning(
+                "Query budget exceeded: %s ran %d queries (budget %d)",
+                self.route,
+                self.count,
+                budget,
+                extra={"route": self.route, "queries": self.count, "query_budget": budget},
+            )
+        for shape, n in self.repeated():
+            logger.warning(
+                "Possible N+1: %s ran %d times: %s",
+                self.route,
+                n,
+                shape[:200],
+                extra={"route": self.route, "queries": self.count, "repeats": n},
+            )
+
+
+_tracker: ContextVar[QueryTracker | None] = ContextVar("query_tracker", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def install(engine: Engine) -> None:
+    """Count statements of this engine for the active QueryTracker, if any."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def track_queries(enforce: bool = False) -> Iterator[QueryTracker]:
+    """Count the queries run inside the block (outside requests: scripts, workers, shells)."""
+    tracker = QueryTracker(enforce=enforce)
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Statements in the block are not counted (event bus NOTIFY: not the route's own work)."""
+    token = _tracker.set(None)
+    try:
+        yield
+    finally:
+        _tracker.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware: one QueryTracker per HTTP request; see the module docstring."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        mode = settings.QUERY_BUDGET_MODE
+        if scope["type"] != "http" or mode == "off":
+            await self.app(scope, receive, send)
+            return
+        tracker = QueryTracker(scope, enforce=mode == "enforce")
+        token = _tracker.set(tracker)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _tracker.reset(token)
+            tracker.report()
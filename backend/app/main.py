@@ -1,26 +1,82 @@
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, songs, health
+from app.api import auth, songs, health, playlists, users
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.idempotency import IdempotencyMiddleware
+from app.db import query_budget
 from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+from app.services.events import event_bus
+from app.services.fingerprint import load_fingerprint_index, save_fingerprint_snapshot
+from app.services.jobs import start_workers
+from app.services.readiness import readiness
+from app.services.suggest import load_suggest_index
 
 
 app = FastAPI(title="MUZICC Backend API")
+query_budget.install(engine)
+_stop_embedded_workers = threading.Event()
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     """
-    Ensure DB schema exists when the app starts.
-    Safe to run multiple times; create_all() is idempotent.
+    Apply pending migrations (unless MIGRATE_ON_STARTUP is off); when the schema is
+    current this is one SELECT on schema_migrations.
+    Then build the in-memory typeahead index (GET /api/songs/suggest)
+    and the fingerprint LSH index (near-duplicate check on confirm-upload),
+    and warm up connections and clients; /api/health/ready reports ready after that.
     """
-    init_db()
+    if settings.MIGRATE_ON_STARTUP:
+        init_db()
+    db = SessionLocal()
+    try:
+        load_suggest_index(db)
+        load_fingerprint_index(db)
+    finally:
+        db.close()
+    # Local dev: process upload jobs in this process instead of running python -m app.worker.
+    if settings.JOB_EMBEDDED_WORKERS > 0:
+        start_workers(settings.JOB_EMBEDDED_WORKERS, _stop_embedded_workers)
+    readiness.warm_up()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    readiness.shutdown()
+    _stop_embedded_workers.set()
+    save_fingerprint_snapshot()
+
+
+@app.on_event("startup")
+async def start_event_bus() -> None:
+    """Attach the SSE broadcaster to the running loop and subscribe to the pub/sub backend."""
+    await event_bus.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_bus() -> None:
+    await event_bus.stop()
 
 
 app.include_router(health.router, prefix="/api/health", tags=["health"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(songs.router, prefix="/api/songs", tags=["songs"])
+app.include_router(users.router, prefix="/api/users", tags=["users"])
+app.include_router(playlists.router, prefix="/api/playlists", tags=["playlists"])
 
+# Innermost: shed requests run no queries.
+app.add_middleware(query_budget.QueryBudgetMiddleware)
+# Added before CORS so shed (503) responses still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
+# Outside admission so replays are never shed; inside compression so bodies are kept plain.
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
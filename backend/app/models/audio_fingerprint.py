@@ -0,0 +1,23 @@
+from sqlalchemy import Integer, LargeBinary, String, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AudioFingerprint(Base):
+    """
+    MinHash signature of an S3 object's acoustic landmarks (app.services.fingerprint).
+    id is an insertion cursor: workers catch their in-memory LSH index up with id > last seen.
+    """
+    __tablename__ = "audio_fingerprints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    s3_key: Mapped[str] = mapped_column(String(512), unique=True, nullable=False)
+    # NUM_PERM little-endian uint32 values
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
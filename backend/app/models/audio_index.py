@@ -0,0 +1,27 @@
+from sqlalchemy import Integer, LargeBinary, String, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AudioIndex(Base):
+    """
+    MP3 frame index per S3 object (shared by every Song row with the same s3_key).
+    frame_sizes: little-endian uint16 per audio frame; see app.services.mp3index.
+    """
+    __tablename__ = "audio_indexes"
+
+    s3_key: Mapped[str] = mapped_column(String(512), primary_key=True)
+
+    sample_rate: Mapped[int] = mapped_column(Integer, nullable=False)
+    samples_per_frame: Mapped[int] = mapped_column(Integer, nullable=False)
+    frame_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    first_frame_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    frame_sizes: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
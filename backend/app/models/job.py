@@ -0,0 +1,56 @@
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class Job(Base):
+    """
+    Post-upload processing job (app.services.jobs). One row per (type, s3_key):
+    enqueueing the same work twice is a no-op, so deduplicated uploads share results.
+    Workers claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        UniqueConstraint("type", "s3_key", name="uq_jobs_type_s3_key"),
+        # Claim: status = 'queued' AND type = :t AND run_at <= now() ORDER BY run_at
+        Index(
+            "ix_jobs_claim",
+            "type",
+            "run_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_jobs_s3_key", "s3_key"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    type: Mapped[str] = mapped_column(String(32), nullable=False)
+    s3_key: Mapped[str] = mapped_column(String(512), nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default=JOB_QUEUED, server_default=JOB_QUEUED
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Not before this time (set in the future for retries with backoff)
+    run_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Worker holding the job and when it claimed it; stale leases are reclaimed
+    locked_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    locked_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
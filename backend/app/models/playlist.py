@@ -0,0 +1,71 @@
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import false, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class Playlist(Base):
+    """
+    User playlist. Writes to its tracks take this row FOR UPDATE first, so ordering keys
+    of one playlist are generated one writer at a time (app.api.playlists).
+    """
+    __tablename__ = "playlists"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    owner_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    is_public: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+    )
+    # Entries, kept in step by add / remove (includes songs soft-deleted since)
+    track_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class PlaylistItem(Base):
+    """
+    One entry of a playlist (a song may appear more than once). Entries are ordered by
+    position, a fractional ordering key (app.services.ordering) compared bytewise:
+    moving an entry rewrites only its own position.
+    """
+    __tablename__ = "playlist_items"
+    __table_args__ = (
+        # Keyset pages: playlist_id = :p AND (position, id) > (:pos, :id) ORDER BY position, id
+        Index("ix_playlist_items_order", "playlist_id", "position", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    playlist_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("playlists.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    song_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("songs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    position: Mapped[str] = mapped_column(String(collation="C"), nullable=False)
+    added_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
@@ -1,12 +1,77 @@
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer
-from sqlalchemy.sql import func
+from sqlalchemy import BigInteger, String, Boolean, DateTime, ForeignKey, Index, Integer, Sequence
+from sqlalchemy.sql import column, func, false, literal_column, table, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
+# Global, monotonically increasing change counter: every insert/update of a song row
+# takes the next value, so "changes since token N" is a range scan on change_seq.
+SONG_CHANGE_SEQ = Sequence("songs_change_seq")
+# Values are taken at write time, not at commit: a transaction still open may hold a lower
+# change_seq than rows already committed. True for a row version written by a transaction
+# older than every transaction open at the read (xmin against the snapshot's xmin, as
+# xid age so wraparound and frozen rows compare right); GET /songs/changes stops before
+# the first row this is false for, so its token never passes a change still to come.
+SONG_CHANGE_SETTLED = literal_column(
+    "age(songs.xmin) > age((pg_snapshot_xmin(pg_current_snapshot())::text::bigint % 4294967296)::text::xid)",
+    Boolean,
+)
+
+# Post-upload processing of the song's S3 object (app.services.jobs)
+PROCESSING_PENDING = "pending"
+PROCESSING_READY = "ready"
+PROCESSING_FAILED = "failed"
+
+# At most one live, non-deduplicated song per S3 object (the one that uploaded it):
+# confirm-upload and create insert with ON CONFLICT DO NOTHING against this index.
+ORIGINAL_SONG_WHERE = text("NOT deduped AND NOT is_deleted")
+
+# Soft-deleted songs moved out of songs by app.services.archive: the same columns as songs
+# plus archived_at (columns listed here are the ones queried outside the archive job).
+# A migration adding a column to Song must add it to songs_archive as well: archival
+# copies every Song column and stops with an error while one is missing there.
+SONG_ARCHIVE = table(
+    "songs_archive",
+    column("id"),
+    column("owner_id"),
+    column("change_seq"),
+    column("archived_at"),
+)
+
 
 class Song(Base):
     __tablename__ = "songs"
+    __table_args__ = (
+        # GET /songs/changes: owner_id = :me AND change_seq > :since ORDER BY change_seq
+        Index("ix_songs_owner_change_seq", "owner_id", "change_seq"),
+        # Dedup lookups: file_hash = :h AND hash_verified ORDER BY created_at
+        Index(
+            "ix_songs_file_hash_verified",
+            "file_hash",
+            "created_at",
+            postgresql_where=text("hash_verified"),
+        ),
+        # Hot listings (live rows only): public feed / my library, newest first
+        Index(
+            "ix_songs_live_public_created_at",
+            text("created_at DESC"),
+            postgresql_where=text("is_public AND NOT is_deleted"),
+        ),
+        Index(
+            "ix_songs_live_owner_created_at",
+            "owner_id",
+            text("created_at DESC"),
+            postgresql_where=text("NOT is_deleted"),
+        ),
+        # Archival candidates (app.services.archive): is_deleted AND updated_at < :cutoff
+        Index("ix_songs_deleted_updated_at", "updated_at", postgresql_where=text("is_deleted")),
+        Index(
+            "uq_songs_s3_key_original",
+            "s3_key",
+            unique=True,
+            postgresql_where=ORIGINAL_SONG_WHERE,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
@@ -30,16 +95,46 @@ class Song(Base):
         nullable=True,
         index=True,
     )
+    # True once the server has hashed the S3 object itself and file_hash matches it.
+    # Client-supplied hashes are not trusted for dedup until then.
+    hash_verified: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+    )
+    # S3 ETag of the object version file_hash was computed from (ranged reads pinned to it)
+    verified_etag: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
     audio_url: Mapped[str] = mapped_column(String(2048), nullable=False, default="")
 
+    # sha256 of the embedded cover art; thumbnails at covers/<cover_hash>/<size>.jpg
+    cover_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # pending until every job of the object finished; rows predating the queue are "ready".
+    processing_status: Mapped[str] = mapped_column(
+        String(16),
+        default=PROCESSING_PENDING,
+        server_default=PROCESSING_READY,
+        nullable=False,
+    )
+
+    # Object size (head_object / hashing); NULL until known, then counted in user_stats.
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Reuses an object already in the catalog (dedup hit): counted as deduped_bytes.
+    deduped: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+    )
+
     is_public: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
     is_deleted: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
-        index=True,
     )
 
     owner_id: Mapped[int] = mapped_column(
@@ -53,5 +148,17 @@ class Song(Base):
         DateTime(timezone=True),
         server_default=func.now(),
     )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        SONG_CHANGE_SEQ,
+        server_default=SONG_CHANGE_SEQ.next_value(),
+        onupdate=SONG_CHANGE_SEQ.next_value(),
+        nullable=False,
+    )
 
     owner = relationship("User", back_populates="songs")
@@ -0,0 +1,30 @@
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserStats(Base):
+    """
+    Per-user library counters over live (not deleted) songs, maintained by the song
+    writers in their own transaction (app.services.library_stats) and reconciled
+    periodically. bytes_stored - deduped_bytes is what the user actually uploaded.
+    """
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    song_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    bytes_stored: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    deduped_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    reconciled_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
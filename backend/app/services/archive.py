@@ -0,0 +1,202 @@
+"""
+Hot/cold split of the songs table: archival of soft-deleted songs to songs_archive.
+
+A soft-deleted song stays in songs for SONG_ARCHIVE_AFTER_DAYS (updated_at is the time of
+the delete), then archive_songs() moves it to songs_archive. Each batch is one short
+transaction over at most SONG_ARCHIVE_BATCH_SIZE rows (DELETE ... RETURNING feeding an
+INSERT), claimed with FOR UPDATE SKIP LOCKED: no long lock, writers never wait on more than
+one batch, and the first run on a large backlog is just more batches. songs then holds live
+rows plus recent deletes, which the partial indexes of hot listings skip.
+- GET /songs/changes still reports archived songs as deleted (tombstones from the archive).
+- Playlist entries of an archived song are dropped (the song was already hidden in them);
+  track_count is kept in step.
+- restore_songs() undeletes songs, archived or not. A song whose object has gained another
+  live original in the meantime comes back as deduplicated. Restores lock the objects
+  first (advisory, per s3_key), so two restores of one object decide this in turn.
+Live songs are never archived, however old: listings and sync serve them.
+songs_archive must have every Song column (migration 0013 copied the list once); a run
+checks that first and fails with the missing columns instead of moving anything.
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.song import Song
+from app.services import library_stats
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key: one archival run at a time across workers
+ARCHIVE_LOCK_ID = 0x4D5A4152
+# pg_advisory_xact_lock(RESTORE_LOCK_CLASS, hashtext(s3_key)): restores of one object in turn
+RESTORE_LOCK_CLASS = 0x4D5A5253
+# Between batches: lets replicas and autovacuum keep up with a large first run
+BATCH_PAUSE_SECONDS = 0.05
+
+_COLUMNS = [c.name for c in Song.__table__.columns]
+_COLUMN_LIST = ", ".join(_COLUMNS)
+# Restored as live, with a new change_seq / updated_at so delta sync picks them up again;
+# deduplicated if the object has another live original by now (uq_songs_s3_key_original).
+_RESTORED = {
+    "is_deleted": "false",
+    "updated_at": "now()",
+    "change_seq": "nextval('songs_change_seq')",
+    "deduped": (
+        "r.deduped OR EXISTS (SELECT 1 FROM songs o WHERE o.s3_key = r.s3_key"
+        " AND o.id <> r.id AND NOT o.deduped AND NOT o.is_deleted)"
+    ),
+}
+_IDS = bindparam("ids", type_=ARRAY(Integer))
+
+_CLAIM = text("""
+    SELECT id FROM songs
+    WHERE is_deleted AND updated_at < :cutoff
+    ORDER BY updated_at
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+""")
+_DROP_PLAYLIST_ENTRIES = text("""
+    WITH gone AS (
+        DELETE FROM playlist_items WHERE song_id = ANY(:ids) RETURNING playlist_id
+    )
+    UPDATE playlists p
+    SET track_count = p.track_count - g.n, updated_at = now()
+    FROM (SELECT playlist_id, count(*) AS n FROM gone GROUP BY playlist_id) g
+    WHERE p.id = g.playlist_id
+""").bindparams(_IDS)
+_MOVE_TO_ARCHIVE = text(f"""
+    WITH moved AS (
+        DELETE FROM songs WHERE id = ANY(:ids) RETURNING {_COLUMN_LIST}
+    )
+    INSERT INTO songs_archive ({_COLUMN_LIST})
+    SELECT {_COLUMN_LIST} FROM moved
+""").bindparams(_IDS)
+# Sorted: two restores sharing objects take their locks in the same order.
+_LOCK_OBJECTS = text("""
+    SELECT pg_advisory_xact_lock(:lock_class, hashtext(k.s3_key))
+    FROM (
+        SELECT s3_key FROM songs WHERE id = ANY(:ids) AND is_deleted
+        UNION
+        SELECT s3_key FROM songs_archive WHERE id = ANY(:ids)
+        ORDER BY s3_key
+    ) k
+""").bindparams(_IDS)
+_RESTORE_FROM_ARCHIVE = text(f"""
+    WITH r AS (
+        DELETE FROM songs_archive
+        WHERE id = ANY(:ids) AND (CAST(:owner_id AS INTEGER) IS NULL OR owner_id = :owner_id)
+        RETURNING {_COLUMN_LIST}
+    )
+    INSERT INTO songs ({_COLUMN_LIST})
+    SELECT {", ".join(_RESTORED.get(c, f"r.{c}") for c in _COLUMNS)} FROM r
+    RETURNING id, owner_id, size_bytes, deduped
+""").bindparams(_IDS)
+_RESTORE_IN_PLACE = text(f"""
+    UPDATE songs r
+    SET {", ".join(f"{c} = {expr}" for c, expr in _RESTORED.items())}
+    WHERE r.id = ANY(:ids) AND r.is_deleted
+        AND (CAST(:owner_id AS INTEGER) IS NULL OR r.owner_id = :owner_id)
+    RETURNING r.id, r.owner_id, r.size_bytes, r.deduped
+""").bindparams(_IDS)
+
+
+class ArchiveSchemaError(RuntimeError):
+    """songs_archive lacks columns of songs: a migration added them to songs only."""
+
+
+def check_archive_columns(conn) -> None:
+    archived = set(conn.execute(text(
+        "SELECT column_name FROM information_schema.columns"
+        " WHERE table_schema = current_schema() AND table_name = 'songs_archive'"
+    )).scalars())
+    missing = [c for c in _COLUMNS if c not in archived]
+    if missing:
+        raise ArchiveSchemaError(
+            f"songs_archive is missing columns of songs: {', '.join(missing)};"
+            " add them to songs_archive in the migration that added them to songs"
+        )
+
+
+def _archive_batch(db: Session, cutoff: datetime, limit: int) -> int:
+    ids = db.scalars(_CLAIM, {"cutoff": cutoff, "limit": limit}).all()
+    if ids:
+        db.execute(_DROP_PLAYLIST_ENTRIES, {"ids": ids})
+        db.execute(_MOVE_TO_ARCHIVE, {"ids": ids})
+    db.commit()
+    return len(ids)
+
+
+def archive_songs(
+    older_than_days: float | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int | None:
+    """
+    Move songs soft-deleted more than older_than_days ago to songs_archive, batch by batch
+    (up to max_batches). Returns the number of songs moved; None if another process holds
+    the archival lock.
+    """
+    days = settings.SONG_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    limit = batch_size or settings.SONG_ARCHIVE_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    started = time.perf_counter()
+    moved = batches = 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": ARCHIVE_LOCK_ID}).scalar():
+            return None
+        try:
+            check_archive_columns(lock_conn)
+            while max_batches is None or batches < max_batches:
+                with SessionLocal() as db:
+                    n = _archive_batch(db, cutoff, limit)
+                moved += n
+                batches += 1
+                if n < limit:
+                    break
+                time.sleep(BATCH_PAUSE_SECONDS)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ARCHIVE_LOCK_ID})
+    logger.info(
+        "songs archived in %.1f s",
+        time.perf_counter() - started,
+        extra={"songs": moved, "batches": batches, "cutoff": cutoff.isoformat()},
+    )
+    return moved
+
+
+def restore_songs(db: Session, song_ids: list[int], owner_id: int | None = None) -> list[int]:
+    """
+    Undelete songs (of owner_id, if given), whether still in songs or archived, and add
+    them back to their owners' user_stats. Returns the ids restored; the caller commits.
+    Holds a lock per object until then: a concurrent restore of the same object waits,
+    then sees this one's song as the live original.
+    """
+    check_archive_columns(db)
+    params = {"ids": list(song_ids), "owner_id": owner_id}
+    db.execute(_LOCK_OBJECTS, {"ids": params["ids"], "lock_class": RESTORE_LOCK_CLASS})
+    rows = [
+        *db.execute(_RESTORE_IN_PLACE, params).all(),
+        *db.execute(_RESTORE_FROM_ARCHIVE, params).all(),
+    ]
+    added: dict[int, library_stats.Usage] = defaultdict(library_stats.Usage)
+    for row in rows:
+        added[row.owner_id] += library_stats.song_usage(row.size_bytes, row.deduped)
+    for user_id, usage in added.items():
+        library_stats.adjust_stats(db, user_id, usage)
+    return [row.id for row in rows]
+
+
+def run_archiver(stop) -> None:
+    """Worker thread: archive every SONG_ARCHIVE_INTERVAL_SECONDS until stop is set."""
+    while not stop.wait(settings.SONG_ARCHIVE_INTERVAL_SECONDS):
+        try:
+            archive_songs()
+        except Exception:
+            logger.exception("song archival failed")
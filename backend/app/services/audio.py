@@ -0,0 +1,86 @@
+"""
+Audio decoding for post-upload analysis (waveform peaks, fingerprints).
+MP3 -> mono signed 16-bit PCM through an ffmpeg subprocess, streamed both ways
+so neither the MP3 nor the PCM is ever held in memory as a whole.
+"""
+import logging
+import subprocess
+import threading
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PCM_CHUNK_BYTES = 256 * 1024
+
+
+class AudioDecodeError(RuntimeError):
+    """The source could not be read or decoded (S3 error, ffmpeg missing or failing)."""
+
+
+def decode_pcm(chunks: Iterable[bytes], sample_rate: int) -> Iterator[np.ndarray]:
+    """
+    Decode an MP3 byte stream into int16 mono sample blocks at `sample_rate`.
+    Raises AudioDecodeError if the source fails or ffmpeg is missing or fails.
+    """
+    cmd = [
+        settings.FFMPEG_BINARY,
+        "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as e:
+        raise AudioDecodeError(f"ffmpeg not found: {settings.FFMPEG_BINARY}") from e
+
+    feed_error: list[BaseException] = []
+
+    def feed() -> None:
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; reported through its return code
+        except BaseException as e:  # S3 read errors surface in the caller
+            feed_error.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="ffmpeg-feed", daemon=True)
+    feeder.start()
+    stderr = b""
+    try:
+        carry = b""
+        while True:
+            data = proc.stdout.read(PCM_CHUNK_BYTES)
+            if not data:
+                break
+            data = carry + data
+            usable = len(data) & ~1  # whole int16 samples only
+            carry = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype="<i2")
+        stderr = proc.stderr.read()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        feeder.join()
+    if feed_error:
+        raise AudioDecodeError(f"Audio source failed: {feed_error[0]}") from feed_error[0]
+    if proc.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg failed ({proc.returncode}): {stderr.decode(errors='replace')[:200]}")
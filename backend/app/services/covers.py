@@ -0,0 +1,43 @@
+"""
+Cover art thumbnails. Embedded art is resized once into a few JPEG sizes stored under a
+content-addressed prefix (covers/<sha256 of the art>/<size>.jpg), so every file carrying
+the same picture - dedup copies or other tracks of an album - shares one set.
+Pillow is imported by make_thumbnails only: the API serves stored thumbnails, workers make them.
+"""
+import hashlib
+import io
+
+THUMBNAIL_SIZES = (96, 300, 600)  # bounding square, px; art is never upscaled
+JPEG_QUALITY = 85
+
+
+class CoverError(ValueError):
+    """Raised when embedded art cannot be decoded as an image."""
+
+
+def cover_hash(picture: bytes) -> str:
+    return hashlib.sha256(picture).hexdigest()
+
+
+def cover_key(digest: str, size: int) -> str:
+    return f"covers/{digest}/{size}.jpg"
+
+
+def make_thumbnails(picture: bytes) -> dict[int, bytes]:
+    """JPEG thumbnail per THUMBNAIL_SIZES entry."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        img = Image.open(io.BytesIO(picture))
+        # JPEG: let the decoder downscale by 1/2..1/8 while loading.
+        img.draft("RGB", (THUMBNAIL_SIZES[-1], THUMBNAIL_SIZES[-1]))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise CoverError(f"Unreadable cover art: {e}") from e
+    thumbnails = {}
+    for size in sorted(THUMBNAIL_SIZES, reverse=True):
+        img.thumbnail((size, size), Image.LANCZOS)  # largest first, each from the previous
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        thumbnails[size] = out.getvalue()
+    return thumbnails
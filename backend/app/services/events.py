@@ -0,0 +1,238 @@
+"""
+Server-sent events for new public songs (GET /songs/events).
+
+Routes publish through a PubSub backend; every worker subscribes to it and fans
+events out to its own SSE connections through the Broadcaster.
+- EVENTS_BACKEND=local: in-process only (single worker / dev).
+- EVENTS_BACKEND=postgres: NOTIFY/LISTEN on the app DB, so all workers (and pods)
+  sharing the database see every event.
+Internal events (EventBus.on, e.g. app.services.song_sync) travel the same way but are
+handled in each worker instead of being sent to SSE clients.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Any, AsyncIterator, Callable
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.query_budget import untracked
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "muzicc_song_events"
+SUBSCRIBER_QUEUE_SIZE = 64  # events buffered per connection before it counts as slow
+KEEPALIVE_SECONDS = 15.0
+# NOTIFY payloads are capped at 8000 bytes by Postgres.
+MAX_PAYLOAD_BYTES = 7900
+
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+
+class Broadcaster:
+    """
+    Fan-out of encoded SSE frames to every connected client of this worker.
+    One small bounded queue per connection; a client that falls
+    SUBSCRIBER_QUEUE_SIZE events behind is dropped instead of buffering for it.
+    All methods except dispatch_threadsafe run on the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: set[_Subscriber] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def dispatch(self, frame: str) -> None:
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def dispatch_threadsafe(self, frame: str) -> None:
+        """Entry point for publishers running outside the loop (threadpool, LISTEN thread)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.dispatch, frame)
+
+    def _drop(self, sub: _Subscriber) -> None:
+        self._subscribers.discard(sub)
+        # Free the backlog and wake the consumer with the close sentinel.
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+        logger.info("SSE slow consumer dropped (%d subscribers left)", len(self._subscribers))
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Yield SSE frames for one connection until it disconnects or is dropped."""
+        sub = _Subscriber()
+        self._subscribers.add(sub)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies/load balancers from closing idle streams.
+                    yield ": keepalive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(sub)
+
+
+def encode_event(event: str, data: str, event_id: Any = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class LocalPubSub:
+    """In-process pub/sub: events reach only the SSE clients of the publishing worker."""
+
+    def __init__(self) -> None:
+        self._callback: Callable[[str], None] | None = None
+
+    def start(self, callback: Callable[[str], None]) -> None:
+        self._callback = callback
+
+    def stop(self) -> None:
+        self._callback = None
+
+    def publish(self, payload: str) -> None:
+        if self._callback is not None:
+            self._callback(payload)
+
+
+class PostgresPubSub:
+    """
+    Cross-worker pub/sub over Postgres NOTIFY/LISTEN.
+    publish() runs one NOTIFY on a pooled connection; a daemon thread holds a
+    dedicated LISTEN connection and hands payloads to the callback.
+    """
+
+    def __init__(self, poll_seconds: float = 5.0) -> None:
+        self._callback: Callable[[str], None] | None = None
+        self._poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, callback: Callable[[str], None]) -> None:
+        self._callback = callback
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="sse-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._callback = None
+
+    def publish(self, payload: str) -> None:
+        from app.db.session import engine
+
+        with untracked(), engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+    def _listen(self) -> None:
+        from app.db.session import engine
+
+        while not self._stop.is_set():
+            try:
+                raw = engine.raw_connection()
+                try:
+                    dbapi_conn = raw.driver_connection
+                    dbapi_conn.autocommit = True
+                    with dbapi_conn.cursor() as cur:
+                        cur.execute(f"LISTEN {CHANNEL}")
+                    while not self._stop.is_set():
+                        if select.select([dbapi_conn], [], [], self._poll_seconds) == ([], [], []):
+                            continue
+                        dbapi_conn.poll()
+                        while dbapi_conn.notifies:
+                            notify = dbapi_conn.notifies.pop(0)
+                            callback = self._callback
+                            if callback is not None:
+                                callback(notify.payload)
+                finally:
+                    raw.invalidate()
+            except Exception:
+                logger.exception("SSE LISTEN connection failed; reconnecting")
+                self._stop.wait(self._poll_seconds)
+
+
+class EventBus:
+    """Publisher-facing facade: PubSub backend -> Broadcaster."""
+
+    def __init__(self, pubsub: LocalPubSub | PostgresPubSub) -> None:
+        self.pubsub = pubsub
+        self.broadcaster = Broadcaster()
+        self._handlers: dict[str, Callable[[dict[str, Any]], None]] = {}
+
+    def on(self, event: str, handler: Callable[[dict[str, Any]], None]) -> None:
+        """
+        Handle `event` in every worker with handler(data) instead of sending it to SSE
+        clients. Runs on the LISTEN thread (or the publisher's, with the local backend).
+        """
+        self._handlers[event] = handler
+
+    async def start(self) -> None:
+        self.broadcaster.bind(asyncio.get_running_loop())
+        self.pubsub.start(self._on_message)
+
+    async def stop(self) -> None:
+        self.pubsub.stop()
+
+    def _on_message(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            handler = self._handlers.get(message["event"])
+            if handler is not None:
+                try:
+                    handler(message["data"])
+                except Exception:
+                    logger.exception("Handler for %s event failed", message["event"])
+                return
+            frame = encode_event(message["event"], json.dumps(message["data"]), message.get("id"))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed event payload")
+            return
+        self.broadcaster.dispatch_threadsafe(frame)
+
+    def publish(self, event: str, data: dict[str, Any], event_id: Any = None) -> None:
+        """Publish after the DB commit. Never raises: events are best effort."""
+        payload = json.dumps({"event": event, "id": event_id, "data": data}, default=str)
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            # Clients can still fetch the full row with GET /songs/{id}.
+            payload = json.dumps({"event": event, "id": event_id, "data": {"id": event_id}})
+        try:
+            self.pubsub.publish(payload)
+        except Exception:
+            logger.exception("Failed to publish %s event", event)
+
+
+def _make_pubsub() -> LocalPubSub | PostgresPubSub:
+    if settings.EVENTS_BACKEND == "postgres":
+        return PostgresPubSub()
+    return LocalPubSub()
+
+
+event_bus = EventBus(_make_pubsub())
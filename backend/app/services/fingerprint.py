@@ -0,0 +1,285 @@
+"""
+Acoustic fingerprints for near-duplicate detection (re-encoded / re-tagged uploads).
+
+1. Decoded mono PCM at 8 kHz -> Hann-windowed STFT (NumPy rfft, vectorized per block).
+2. Spectral peaks: the strongest bin per frequency band per frame, kept if it stands
+   out from the frame's average.
+3. Landmarks: each peak combined with two later peaks -> 32-bit (f1, f2, f3, dt1, dt2)
+   hashes, invariant to time offset, bitrate and tags.
+4. MinHash signature of the landmark set (NUM_PERM x uint32), so the signature
+   agreement rate estimates the Jaccard similarity of two files.
+5. LSH banding over signatures: a query only compares candidates sharing a band
+   instead of scanning the whole catalog.
+"""
+import io
+import logging
+import os
+import threading
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audio_fingerprint import AudioFingerprint
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+FRAME_SIZE = 1024
+HOP = 512
+# Frequency bands (FFT bin ranges) searched for one peak each; ~60 Hz .. 4 kHz.
+BANDS = ((8, 20), (20, 40), (40, 80), (80, 160), (160, 320), (320, 512))
+PEAK_RATIO = 2.0  # peak magnitude vs mean magnitude of its frame
+FAN_OUT = 3
+MAX_DT = 32  # frames (~2 s)
+
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+DUPLICATE_THRESHOLD = 0.35  # estimated Jaccard similarity of landmark sets
+# Ids are assigned at INSERT but rows become visible at COMMIT, possibly out of order;
+# re-reading a window below the cursor catches late commits (add() ignores known keys).
+SYNC_OVERLAP = 1000
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0x4D5A43)  # fixed seed: signatures must be stable across processes
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERM, dtype=np.uint64)
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+
+
+def _frame_peaks(blocks: Iterable[np.ndarray]) -> list[np.ndarray]:
+    """Per STFT frame: array of peak bins (0..len(BANDS) values)."""
+    peaks: list[np.ndarray] = []
+    carry = np.empty(0, dtype=np.float32)
+    for block in blocks:
+        samples = np.concatenate((carry, block.astype(np.float32)))
+        n_frames = 1 + (samples.size - FRAME_SIZE) // HOP if samples.size >= FRAME_SIZE else 0
+        if n_frames <= 0:
+            carry = samples
+            continue
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP][:n_frames]
+        mags = np.abs(np.fft.rfft(frames * _WINDOW, axis=1))
+        mean = mags.mean(axis=1)
+        band_bins = np.stack(
+            [lo + mags[:, lo:hi].argmax(axis=1) for lo, hi in BANDS], axis=1
+        )
+        band_vals = np.take_along_axis(mags, band_bins, axis=1)
+        keep = band_vals > (mean[:, None] * PEAK_RATIO)
+        peaks.extend(bins[mask] for bins, mask in zip(band_bins, keep))
+        carry = samples[n_frames * HOP:]
+    return peaks
+
+
+def landmark_hashes(blocks: Iterable[np.ndarray]) -> np.ndarray:
+    """
+    Unique uint32 landmark hashes. Each anchor peak is combined with two of its next
+    FAN_OUT + 1 later peaks: (f1, f2, f3, dt1, dt2), mixed down to 32 bits.
+    Triplets are far more specific than pairs for music built from a small pitch set.
+    """
+    peaks = _frame_peaks(blocks)
+    if not peaks:
+        return np.empty(0, dtype=np.uint32)
+    times = np.concatenate([np.full(p.size, t, dtype=np.int64) for t, p in enumerate(peaks)])
+    freqs = np.concatenate(peaks).astype(np.uint64)
+    n = times.size
+    hashes = []
+    # Peaks are ordered by time, so "later peaks" are the next indices.
+    for j in range(1, FAN_OUT + 1):
+        for k in range(j + 1, FAN_OUT + 2):
+            if n <= k:
+                continue
+            dt1 = times[j:n - k + j] - times[:n - k]
+            dt2 = times[k:] - times[j:n - k + j]
+            ok = (dt1 > 0) & (dt2 >= 0) & (dt1 + dt2 < MAX_DT)
+            key = (
+                (freqs[:n - k][ok] << np.uint64(28))
+                | (freqs[j:n - k + j][ok] << np.uint64(19))
+                | (freqs[k:][ok] << np.uint64(10))
+                | (dt1[ok].astype(np.uint64) << np.uint64(5))
+                | dt2[ok].astype(np.uint64)
+            )
+            hashes.append(_mix32(key))
+    if not hashes:
+        return np.empty(0, dtype=np.uint32)
+    return np.unique(np.concatenate(hashes))
+
+
+def _mix32(x: np.ndarray) -> np.ndarray:
+    """64 -> 32 bit integer hash (splitmix64 finalizer), vectorized."""
+    x = x.astype(np.uint64)
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+_EMPTY = np.iinfo(np.uint32).max
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """NUM_PERM-value MinHash signature (uint32) of a hash set."""
+    if hashes.size == 0:
+        return np.full(NUM_PERM, _EMPTY, dtype=np.uint32)
+    x = hashes.astype(np.uint64) % _MERSENNE
+    sig = np.empty(NUM_PERM, dtype=np.uint32)
+    # Chunk permutations to bound the temporary (perms x hashes) matrix.
+    for start in range(0, NUM_PERM, 16):
+        a = _PERM_A[start:start + 16, None]
+        b = _PERM_B[start:start + 16, None]
+        sig[start:start + 16] = ((a * x[None, :] + b) % _MERSENNE).min(axis=1)
+    return sig
+
+
+def fingerprint(blocks: Iterable[np.ndarray]) -> np.ndarray:
+    """Decoded 8 kHz PCM blocks -> MinHash signature."""
+    return minhash(landmark_hashes(blocks))
+
+
+def is_empty(sig: np.ndarray) -> bool:
+    """Signature of a file without landmarks (silence, a few seconds): matches every other one."""
+    return bool((sig == _EMPTY).all())
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _band_keys(sig: np.ndarray) -> list[bytes]:
+    return [
+        bytes([band]) + sig[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        for band in range(LSH_BANDS)
+    ]
+
+
+class FingerprintIndex:
+    """
+    In-memory LSH index of MinHash signatures keyed by S3 object key.
+    Empty signatures (is_empty) are neither indexed nor queried. Signatures live in one growing (n, NUM_PERM) uint32 matrix; buckets map
+    band keys to row numbers. Persisted as an .npz snapshot (keys, signatures, last_id),
+    where last_id is the highest audio_fingerprints.id already loaded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._keys: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._sigs = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._size = 0
+        self._buckets: dict[bytes, list[int]] = {}
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: str, sig: np.ndarray) -> None:
+        if is_empty(sig):
+            return
+        with self._lock:
+            if key in self._rows:
+                return
+            if self._size == self._sigs.shape[0]:
+                grown = np.empty((max(1024, self._size * 2), NUM_PERM), dtype=np.uint32)
+                grown[:self._size] = self._sigs[:self._size]
+                self._sigs = grown
+            row = self._size
+            self._sigs[row] = sig
+            self._size += 1
+            self._keys.append(key)
+            self._rows[key] = row
+            for band_key in _band_keys(sig):
+                self._buckets.setdefault(band_key, []).append(row)
+
+    def query(self, sig: np.ndarray, threshold: float = DUPLICATE_THRESHOLD,
+              limit: int = 10) -> list[tuple[str, float]]:
+        """(s3_key, estimated similarity) of indexed objects at or above threshold, best first."""
+        if is_empty(sig):
+            return []
+        with self._lock:
+            candidates: set[int] = set()
+            for band_key in _band_keys(sig):
+                candidates.update(self._buckets.get(band_key, ()))
+            if not candidates:
+                return []
+            rows = np.fromiter(candidates, dtype=np.int64)
+            scores = (self._sigs[rows] == sig[None, :]).sum(axis=1) / NUM_PERM
+            keys = [self._keys[r] for r in rows]
+        order = np.argsort(-scores)
+        return [
+            (keys[i], float(scores[i]))
+            for i in order[:limit]
+            if scores[i] >= threshold
+        ]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def snapshot(self) -> bytes:
+        with self._lock:
+            buf = io.BytesIO()
+            np.savez_compressed(
+                buf,
+                # Fixed-width unicode, not object: the snapshot loads without pickle.
+                keys=np.array(self._keys, dtype=str),
+                sigs=self._sigs[:self._size],
+                last_id=np.array([self.last_id], dtype=np.int64),
+            )
+        return buf.getvalue()
+
+    def load_snapshot(self, data: bytes) -> None:
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            keys = list(npz["keys"])
+            sigs = npz["sigs"]
+            last_id = int(npz["last_id"][0])
+        for key, sig in zip(keys, sigs):
+            self.add(str(key), sig)
+        self.last_id = max(self.last_id, last_id)
+        logger.info("Fingerprint snapshot loaded: %d signatures (last_id=%d)", len(keys), last_id)
+
+
+fingerprint_index = FingerprintIndex()
+
+
+def sync_fingerprint_index(db: Session) -> None:
+    """Load signatures stored (by any worker) since the last sync. One indexed range query."""
+    rows = db.execute(
+        select(AudioFingerprint.id, AudioFingerprint.s3_key, AudioFingerprint.signature)
+        .where(AudioFingerprint.id > fingerprint_index.last_id - SYNC_OVERLAP)
+        .order_by(AudioFingerprint.id)
+        .execution_options(yield_per=5000)
+    )
+    for row in rows:
+        fingerprint_index.add(row.s3_key, np.frombuffer(row.signature, dtype="<u4"))
+        fingerprint_index.last_id = max(fingerprint_index.last_id, row.id)
+
+
+def load_fingerprint_index(db: Session) -> None:
+    """Startup: restore the snapshot (if configured) then catch up from the DB."""
+    path = settings.FINGERPRINT_SNAPSHOT_PATH
+    if path:
+        try:
+            with open(path, "rb") as f:
+                fingerprint_index.load_snapshot(f.read())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError):
+            logger.exception("Ignoring unreadable fingerprint snapshot at %s", path)
+    sync_fingerprint_index(db)
+    logger.info("Fingerprint index ready: %d signatures", len(fingerprint_index))
+
+
+def save_fingerprint_snapshot() -> None:
+    """Shutdown: persist the index so the next boot only replays newer rows."""
+    path = settings.FINGERPRINT_SNAPSHOT_PATH
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(fingerprint_index.snapshot())
+        os.replace(tmp, path)
+    except OSError:
+        logger.exception("Failed to write fingerprint snapshot to %s", path)
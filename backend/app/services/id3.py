@@ -0,0 +1,171 @@
+"""
+ID3v2 tag reader for post-upload metadata: title, artist and embedded cover art.
+Works on the tag bytes alone (fetched with a ranged GET of the file start), never the audio.
+Handles v2.2, v2.3 and v2.4, including unsynchronisation, extended headers and
+zlib-compressed frames; encrypted frames are skipped.
+"""
+import zlib
+from dataclasses import dataclass
+
+from app.services.mp3index import ID3V2_HEADER_SIZE, id3v2_size
+
+# Text encodings by encoding byte; UTF-16 variants end strings with two zero bytes.
+_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+_FRONT_COVER = 3
+
+_TITLE_FRAMES = {"TIT2", "TT2"}
+_ARTIST_FRAMES = {"TPE1", "TP1"}
+_PICTURE_FRAMES = {"APIC", "PIC"}
+
+
+class Id3Error(ValueError):
+    """Raised when the bytes do not start with a readable ID3v2 tag."""
+
+
+@dataclass
+class Id3Tags:
+    title: str | None = None
+    artist: str | None = None
+    picture: bytes | None = None
+    picture_mime: str | None = None
+
+
+def _syncsafe(b: bytes) -> int:
+    value = 0
+    for byte in b:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _remove_unsync(data: bytes) -> bytes:
+    return data.replace(b"\xff\x00", b"\xff")
+
+
+def _split_terminated(data: bytes, encoding: int) -> tuple[bytes, bytes]:
+    """Split at the first string terminator of `encoding`: (string, rest)."""
+    if encoding in (1, 2):
+        i = 0
+        while True:
+            i = data.find(b"\x00\x00", i)
+            if i == -1:
+                return data, b""
+            if i % 2 == 0:
+                return data[:i], data[i + 2:]
+            i += 1
+    i = data.find(b"\x00")
+    if i == -1:
+        return data, b""
+    return data[:i], data[i + 1:]
+
+
+def _decode_text(data: bytes) -> str | None:
+    if not data or data[0] not in _ENCODINGS:
+        return None
+    text = data[1:].decode(_ENCODINGS[data[0]], errors="replace")
+    # v2.4 separates multiple values with NUL; the first one is the display value.
+    text = text.split("\x00", 1)[0].strip()
+    return text or None
+
+
+def _parse_picture(frame_id: str, data: bytes) -> tuple[int, str, bytes] | None:
+    """(picture type, mime type, image bytes) of an APIC / PIC frame."""
+    if len(data) < 2:
+        return None
+    encoding = data[0]
+    if frame_id == "PIC":
+        fmt = data[1:4].decode("latin-1").upper()
+        mime = "image/png" if fmt == "PNG" else "image/jpeg"
+        rest = data[4:]
+    else:
+        raw_mime, rest = _split_terminated(data[1:], 0)
+        mime = raw_mime.decode("latin-1").lower() or "image/jpeg"
+        if "/" not in mime:
+            mime = f"image/{mime}"
+    if not rest:
+        return None
+    picture_type = rest[0]
+    _, image = _split_terminated(rest[1:], encoding)
+    return (picture_type, mime, image) if image else None
+
+
+def _frames(body: bytes, major: int):
+    """Yield (frame id, data) for each frame of the tag body, undoing per-frame transforms."""
+    id_len, header_len = (3, 6) if major == 2 else (4, 10)
+    pos = 0
+    while pos + header_len <= len(body):
+        frame_id = body[pos:pos + id_len]
+        if not frame_id.strip(b"\x00") or not frame_id.isalnum():
+            return  # padding or garbage: end of frames
+        if major == 2:
+            size = int.from_bytes(body[pos + 3:pos + 6], "big")
+            flags = 0
+        elif major == 3:
+            size = int.from_bytes(body[pos + 4:pos + 8], "big")
+            flags = int.from_bytes(body[pos + 8:pos + 10], "big")
+        else:
+            size = _syncsafe(body[pos + 4:pos + 8])
+            flags = int.from_bytes(body[pos + 8:pos + 10], "big")
+        data = body[pos + header_len:pos + header_len + size]
+        pos += header_len + size
+        if len(data) < size:
+            return  # truncated tag
+        try:
+            data = _frame_data(data, major, flags)
+        except zlib.error:
+            continue
+        if data is not None:
+            yield frame_id.decode("latin-1"), data
+
+
+def _frame_data(data: bytes, major: int, flags: int) -> bytes | None:
+    if major == 3:
+        if flags & 0x0040:  # encrypted
+            return None
+        if flags & 0x0020:  # grouping identity byte
+            data = data[1:]
+        if flags & 0x0080:  # zlib, preceded by the decompressed size
+            data = zlib.decompress(data[4:])
+    elif major == 4:
+        if flags & 0x0004:  # encrypted
+            return None
+        if flags & 0x0040:  # grouping identity byte
+            data = data[1:]
+        if flags & 0x0001:  # data length indicator
+            data = data[4:]
+        if flags & 0x0002:
+            data = _remove_unsync(data)
+        if flags & 0x0008:
+            data = zlib.decompress(data)
+    return data
+
+
+def parse_tag(tag: bytes) -> Id3Tags:
+    """Parse a complete ID3v2 tag (header included). Raises Id3Error if there is none."""
+    size = id3v2_size(tag)
+    if not size:
+        raise Id3Error("No ID3v2 tag")
+    if len(tag) < size:
+        raise Id3Error("Truncated ID3v2 tag")
+    major, flags = tag[3], tag[5]
+    if major not in (2, 3, 4):
+        raise Id3Error(f"Unsupported ID3v2.{major}")
+    body = tag[ID3V2_HEADER_SIZE:ID3V2_HEADER_SIZE + _syncsafe(tag[6:10])]
+    if flags & 0x80 and major < 4:  # tag-wide unsynchronisation (v2.4 flags it per frame)
+        body = _remove_unsync(body)
+    if flags & 0x40 and major == 3:
+        body = body[4 + int.from_bytes(body[:4], "big"):]
+    elif flags & 0x40 and major == 4:
+        body = body[_syncsafe(body[:4]):]
+
+    tags = Id3Tags()
+    picture_type = None
+    for frame_id, data in _frames(body, major):
+        if frame_id in _TITLE_FRAMES and tags.title is None:
+            tags.title = _decode_text(data)
+        elif frame_id in _ARTIST_FRAMES and tags.artist is None:
+            tags.artist = _decode_text(data)
+        elif frame_id in _PICTURE_FRAMES and picture_type != _FRONT_COVER:
+            picture = _parse_picture(frame_id, data)
+            if picture is not None and (tags.picture is None or picture[0] == _FRONT_COVER):
+                picture_type, tags.picture_mime, tags.picture = picture
+    return tags
@@ -0,0 +1,270 @@
+"""
+Durable post-upload job queue stored in Postgres (table jobs); no external broker.
+
+- enqueue_jobs(): INSERT ... ON CONFLICT (type, s3_key), so each object is processed
+  once per job type however many songs share it. A job that failed for good (or one
+  listed in `rerun`) is queued again when the same object is enqueued again.
+- Workers claim with SELECT ... FOR UPDATE SKIP LOCKED: any number of worker processes
+  and threads poll the same table without handing out a job twice.
+- Per-type concurrency limits hold across all workers: claiming a type takes a
+  transaction-scoped advisory lock and counts that type's live running jobs first.
+- Failures retry with exponential backoff + jitter up to max_attempts. A running job whose
+  lease expired (worker died mid-job) becomes claimable again.
+- Once every job of an object has finished, its songs get processing_status ready / failed.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, Job
+from app.models.song import PROCESSING_FAILED, PROCESSING_PENDING, PROCESSING_READY, Song
+from app.services import processing
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-int advisory lock; the second is the job type's crc32.
+_CLAIM_LOCK_NAMESPACE = 0x4D5A4A42
+ERROR_MAX_LENGTH = 2000
+
+
+@dataclass(frozen=True)
+class JobType:
+    handler: Callable[[str], object]
+    concurrency: int  # running jobs of this type across all workers
+    max_attempts: int = 5
+
+
+JOB_TYPES: dict[str, JobType] = {
+    "verify_hash": JobType(processing.verify_file_hash, concurrency=4),
+    "metadata": JobType(processing.extract_metadata, concurrency=4),
+    "index_audio": JobType(processing.index_audio, concurrency=4),
+    "waveform": JobType(processing.generate_waveform, concurrency=2),
+    "fingerprint": JobType(processing.fingerprint_audio, concurrency=2),
+}
+POST_UPLOAD_JOBS = tuple(JOB_TYPES)
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    type: str
+    s3_key: str
+    attempts: int
+
+
+def concurrency_limit(job_type: str) -> int:
+    return settings.JOB_CONCURRENCY.get(job_type, JOB_TYPES[job_type].concurrency)
+
+
+def enqueue_jobs(
+    db: Session,
+    s3_key: str,
+    types: tuple[str, ...] = POST_UPLOAD_JOBS,
+    rerun: tuple[str, ...] = (),
+) -> str:
+    """
+    Queue processing of an object in the caller's transaction (committed with the song row)
+    and return the object's processing status for the new song. Types in `rerun` are
+    queued again even if already done (e.g. verify_hash for a new unverified song).
+    """
+    enqueue_jobs_many(db, [s3_key], types, rerun)
+    return object_status(db, s3_key)
+
+
+def enqueue_jobs_many(
+    db: Session,
+    s3_keys: list[str],
+    types: tuple[str, ...] = POST_UPLOAD_JOBS,
+    rerun: tuple[str, ...] = (),
+) -> None:
+    """enqueue_jobs() for many objects in one statement (bulk import)."""
+    # One row per (type, key): ON CONFLICT DO UPDATE rejects duplicates within a statement.
+    keys = list(dict.fromkeys(s3_keys))
+    if not keys or not types:
+        return
+    stmt = pg_insert(Job).values([{"type": t, "s3_key": k} for k in keys for t in types])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_jobs_type_s3_key",
+        set_={
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "run_at": func.now(),
+            "last_error": None,
+        },
+        where=or_(
+            Job.status == JOB_FAILED,
+            and_(Job.status == JOB_DONE, Job.type.in_(rerun)),
+        ),
+    )
+    db.execute(stmt)
+
+
+def object_status(db: Session, s3_key: str) -> str:
+    return object_statuses(db, [s3_key])[s3_key]
+
+
+def object_statuses(db: Session, s3_keys: list[str]) -> dict[str, str]:
+    """Processing status per object (ready when it has no jobs, e.g. legacy rows)."""
+    found: dict[str, set[str]] = {key: set() for key in s3_keys}
+    rows = db.execute(
+        select(Job.s3_key, Job.status).where(Job.s3_key.in_(list(found))).distinct()
+    )
+    for key, job_status in rows:
+        found[key].add(job_status)
+    result = {}
+    for key, statuses in found.items():
+        if statuses & {JOB_QUEUED, JOB_RUNNING}:
+            result[key] = PROCESSING_PENDING
+        elif JOB_FAILED in statuses:
+            result[key] = PROCESSING_FAILED
+        else:
+            result[key] = PROCESSING_READY
+    return result
+
+
+def _lease_cutoff():
+    return func.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def claim_job(db: Session, worker_id: str) -> ClaimedJob | None:
+    """Claim the next runnable job of any type that is below its concurrency limit."""
+    types = list(JOB_TYPES)
+    random.shuffle(types)  # no type starves another when all have work
+    try:
+        for job_type in types:
+            locked = db.execute(
+                select(func.pg_try_advisory_xact_lock(
+                    _CLAIM_LOCK_NAMESPACE, zlib.crc32(job_type.encode()) & 0x7FFFFFFF
+                ))
+            ).scalar()
+            if not locked:
+                continue  # another worker is claiming this type right now
+            running = db.execute(
+                select(func.count()).select_from(Job).where(
+                    Job.type == job_type,
+                    Job.status == JOB_RUNNING,
+                    Job.locked_at >= _lease_cutoff(),
+                )
+            ).scalar()
+            if running >= concurrency_limit(job_type):
+                continue
+            job = db.execute(
+                select(Job)
+                .where(
+                    Job.type == job_type,
+                    or_(
+                        and_(Job.status == JOB_QUEUED, Job.run_at <= func.now()),
+                        and_(Job.status == JOB_RUNNING, Job.locked_at < _lease_cutoff()),
+                    ),
+                )
+                .order_by(Job.run_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar_one_or_none()
+            if job is None:
+                continue
+            job.status = JOB_RUNNING
+            job.locked_by = worker_id
+            job.locked_at = func.now()
+            job.attempts += 1
+            claimed = ClaimedJob(job.id, job.type, job.s3_key, job.attempts)
+            db.commit()
+            return claimed
+        return None
+    finally:
+        # Releases the advisory locks when nothing was claimed.
+        db.rollback()
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(settings.JOB_BACKOFF_MAX_SECONDS, settings.JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def finish_job(db: Session, job: ClaimedJob, worker_id: str, error: BaseException | None = None) -> None:
+    """Record the outcome (only if this worker still holds the lease) and refresh song status."""
+    values: dict = {"locked_by": None, "locked_at": None}
+    if error is None:
+        values.update(status=JOB_DONE, last_error=None)
+    else:
+        values["last_error"] = f"{type(error).__name__}: {error}"[:ERROR_MAX_LENGTH]
+        if job.attempts >= JOB_TYPES[job.type].max_attempts:
+            values["status"] = JOB_FAILED
+        else:
+            values["status"] = JOB_QUEUED
+            values["run_at"] = func.now() + timedelta(seconds=_backoff_seconds(job.attempts))
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == JOB_RUNNING, Job.locked_by == worker_id)
+        .values(**values)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        logger.warning("Job lease lost before finishing", extra={"job_id": job.id, "type": job.type})
+        return
+    status = object_status(db, job.s3_key)
+    db.execute(
+        update(Song)
+        .where(Song.s3_key == job.s3_key, Song.processing_status != status)
+        .values(processing_status=status)
+    )
+    db.commit()
+
+
+def run_job(job: ClaimedJob, worker_id: str) -> None:
+    error = None
+    try:
+        JOB_TYPES[job.type].handler(job.s3_key)
+    except Exception as e:
+        error = e
+        logger.warning(
+            "Job failed",
+            extra={"job_id": job.id, "type": job.type, "s3_key": job.s3_key,
+                   "attempt": job.attempts, "error": str(e)},
+        )
+    db = SessionLocal()
+    try:
+        finish_job(db, job, worker_id, error)
+    finally:
+        db.close()
+
+
+def work(worker_id: str, stop: threading.Event) -> None:
+    """Worker loop: claim and run jobs until `stop` is set; sleep JOB_POLL_INTERVAL when idle."""
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_job(db, worker_id)
+        except Exception:
+            logger.exception("Job claim failed", extra={"worker": worker_id})
+            job = None
+        finally:
+            db.close()
+        if job is None:
+            stop.wait(settings.JOB_POLL_INTERVAL)
+            continue
+        run_job(job, worker_id)
+
+
+def start_workers(threads: int, stop: threading.Event) -> list[threading.Thread]:
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    workers = [
+        threading.Thread(target=work, args=(f"{prefix}:{n}", stop), name=f"job-worker-{n}", daemon=True)
+        for n in range(threads)
+    ]
+    for t in workers:
+        t.start()
+    logger.info("Job workers started", extra={"threads": threads})
+    return workers
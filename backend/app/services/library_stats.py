@@ -0,0 +1,248 @@
+"""
+Per-user library counters (user_stats) and storage quotas.
+
+Writers apply deltas in their own transaction, next to the song rows they insert or
+soft-delete (adjust_stats: one upsert per user and statement), so reading usage is a
+primary-key lookup instead of SUM / COUNT over songs. Counted: live songs, bytes of their
+objects, and the part of those bytes that reuses an object already in the catalog
+(deduped). Quotas apply to song_count and to uploaded bytes (bytes_stored - deduped_bytes).
+
+Sizes not known at insert (songs created with a fresh object_key) are added by the
+verify_hash job. reconcile_stats() recomputes the counters from songs, user by user with
+the user_stats row locked: a writer that has not committed yet waits on that lock and
+applies its delta on top, so reconciliation never loses a concurrent change. It also
+backfills missing sizes (from other rows of the same object, then head_object).
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.song import Song
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.services import s3
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key: one reconciliation at a time across workers
+RECONCILE_LOCK_ID = 0x4D5A5354
+RECONCILE_BATCH_USERS = 500
+
+
+class QuotaExceeded(Exception):
+    """The upload would take the user over QUOTA_MAX_SONGS / QUOTA_MAX_BYTES."""
+
+
+@dataclass
+class Usage:
+    song_count: int = 0
+    bytes_stored: int = 0
+    deduped_bytes: int = 0
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return self.bytes_stored - self.deduped_bytes
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            self.song_count + other.song_count,
+            self.bytes_stored + other.bytes_stored,
+            self.deduped_bytes + other.deduped_bytes,
+        )
+
+
+def song_usage(size_bytes: int | None, deduped: bool) -> Usage:
+    """What one live song adds to its owner's counters."""
+    size = size_bytes or 0
+    return Usage(1, size, size if deduped else 0)
+
+
+def adjust_stats(db: Session, user_id: int, delta: Usage, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) usage in the caller's transaction."""
+    if not (delta.song_count or delta.bytes_stored or delta.deduped_bytes):
+        return
+    values = {
+        "song_count": sign * delta.song_count,
+        "bytes_stored": sign * delta.bytes_stored,
+        "deduped_bytes": sign * delta.deduped_bytes,
+    }
+    stmt = pg_insert(UserStats).values(user_id=user_id, **values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            **{name: getattr(UserStats, name) + getattr(stmt.excluded, name) for name in values},
+            "updated_at": func.now(),
+        },
+    ))
+
+
+def get_usage(db: Session, user_id: int, lock: bool = False) -> Usage:
+    """Counters of one user; lock=True holds the row until commit (serializes quota checks)."""
+    query = select(UserStats.song_count, UserStats.bytes_stored, UserStats.deduped_bytes).where(
+        UserStats.user_id == user_id
+    )
+    if lock:
+        # A user's first song: create the row so there is something to lock.
+        db.execute(
+            pg_insert(UserStats).values(user_id=user_id).on_conflict_do_nothing(index_elements=[UserStats.user_id])
+        )
+        query = query.with_for_update()
+    row = db.execute(query).first()
+    return Usage(*row) if row else Usage()
+
+
+def check_quota(
+    db: Session, user_id: int, new_bytes: int = 0, lock: bool = False, new_songs: int = 1
+) -> Usage:
+    """
+    Raise QuotaExceeded if new_songs more songs of new_bytes (uploaded) do not fit.
+    new_songs=0 checks usage already applied in this transaction.
+    """
+    usage = get_usage(db, user_id, lock=lock)
+    if settings.QUOTA_MAX_SONGS and usage.song_count + new_songs > settings.QUOTA_MAX_SONGS:
+        raise QuotaExceeded(f"Song limit reached ({settings.QUOTA_MAX_SONGS} songs)")
+    if settings.QUOTA_MAX_BYTES and usage.uploaded_bytes + new_bytes > settings.QUOTA_MAX_BYTES:
+        raise QuotaExceeded(f"Storage quota exceeded ({settings.QUOTA_MAX_BYTES} bytes)")
+    return usage
+
+
+def record_object_size(db: Session, s3_key: str, size: int) -> None:
+    """Set the size of songs using s3_key that did not know it, and count it for their owners."""
+    rows = db.execute(
+        update(Song)
+        .where(Song.s3_key == s3_key, Song.size_bytes.is_(None))
+        .values(size_bytes=size)
+        .returning(Song.owner_id, Song.deduped, Song.is_deleted)
+        .execution_options(synchronize_session=False)
+    ).all()
+    per_user: dict[int, Usage] = {}
+    for owner_id, deduped, is_deleted in rows:
+        if not is_deleted:
+            per_user[owner_id] = per_user.get(owner_id, Usage()) + Usage(0, size, size if deduped else 0)
+    for owner_id in sorted(per_user):  # fixed order: no deadlock between concurrent jobs
+        adjust_stats(db, owner_id, per_user[owner_id])
+
+
+def _fill_missing_sizes(limit: int) -> int:
+    """Sizes for live songs without one: copied from a sibling row, else head_object."""
+    filled = 0
+    with SessionLocal() as db:
+        keys = db.scalars(
+            select(Song.s3_key)
+            .where(Song.size_bytes.is_(None), Song.is_deleted.is_(False))
+            .distinct()
+            .limit(limit)
+        ).all()
+        for key in keys:
+            size = db.scalar(
+                select(Song.size_bytes).where(Song.s3_key == key, Song.size_bytes.is_not(None)).limit(1)
+            )
+            if size is None:
+                try:
+                    size = s3.get_object_size(key)
+                except RuntimeError:
+                    logger.warning("Size backfill: head_object failed", extra={"s3_key": key})
+                    continue
+            if size is None:
+                continue
+            # Counters are recomputed right after, but writers may run in between.
+            record_object_size(db, key, size)
+            db.commit()
+            filled += 1
+    return filled
+
+
+def _reconcile_batch(db: Session, user_ids: list[int]) -> int:
+    db.execute(
+        pg_insert(UserStats)
+        .values([{"user_id": user_id} for user_id in user_ids])
+        .on_conflict_do_nothing(index_elements=[UserStats.user_id])
+    )
+    stored = {
+        row.user_id: Usage(row.song_count, row.bytes_stored, row.deduped_bytes)
+        for row in db.execute(
+            select(UserStats)
+            .where(UserStats.user_id.in_(user_ids))
+            .order_by(UserStats.user_id)
+            .with_for_update()
+        ).scalars()
+    }
+    # New statement, new snapshot: every writer that touched these rows has committed.
+    actual = {
+        owner_id: Usage(count, size or 0, deduped or 0)
+        for owner_id, count, size, deduped in db.execute(
+            select(
+                Song.owner_id,
+                func.count(),
+                func.sum(Song.size_bytes),
+                func.sum(Song.size_bytes).filter(Song.deduped.is_(True)),
+            )
+            .where(Song.owner_id.in_(user_ids), Song.is_deleted.is_(False))
+            .group_by(Song.owner_id)
+        )
+    }
+    drifted = [user_id for user_id in user_ids if actual.get(user_id, Usage()) != stored[user_id]]
+    for user_id in drifted:
+        usage = actual.get(user_id, Usage())
+        logger.warning(
+            "user_stats drift corrected",
+            extra={"user_id": user_id, "stored": vars(stored[user_id]), "actual": vars(usage)},
+        )
+        db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(**vars(usage), updated_at=func.now())
+        )
+    db.execute(
+        update(UserStats).where(UserStats.user_id.in_(user_ids)).values(reconciled_at=func.now())
+    )
+    db.commit()
+    return len(drifted)
+
+
+def reconcile_stats(fill_sizes: int = 1000) -> int | None:
+    """
+    Backfill up to fill_sizes missing object sizes, then recompute every user's counters.
+    Returns the number of users whose counters had drifted; None if another process holds
+    the reconciliation lock.
+    """
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": RECONCILE_LOCK_ID}).scalar():
+            return None
+        try:
+            filled = _fill_missing_sizes(fill_sizes) if fill_sizes > 0 else 0
+            drifted = 0
+            last_id = 0
+            while True:
+                with SessionLocal() as db:
+                    user_ids = db.scalars(
+                        select(User.id).where(User.id > last_id).order_by(User.id).limit(RECONCILE_BATCH_USERS)
+                    ).all()
+                    if not user_ids:
+                        break
+                    last_id = user_ids[-1]
+                    drifted += _reconcile_batch(db, list(user_ids))
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": RECONCILE_LOCK_ID})
+    logger.info(
+        "user_stats reconciled in %.1f s",
+        time.perf_counter() - started,
+        extra={"drifted_users": drifted, "sizes_filled": filled},
+    )
+    return drifted
+
+
+def run_reconciler(stop) -> None:
+    """Worker thread: reconcile every STATS_RECONCILE_INTERVAL_SECONDS until stop is set."""
+    while not stop.wait(settings.STATS_RECONCILE_INTERVAL_SECONDS):
+        try:
+            reconcile_stats()
+        except Exception:
+            logger.exception("user_stats reconciliation failed")
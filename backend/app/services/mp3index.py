@@ -0,0 +1,223 @@
+"""
+MP3 frame index: exact time -> byte offset mapping built from frame headers only (no decoding).
+
+Every Layer III frame of a file has the same duration (samples_per_frame / sample_rate),
+so the index only needs each frame's size. Sizes are stored as a uint16 array
+(~2 bytes per 26 ms of audio, ~23 KB for a 5-minute song); offsets are their running sum.
+"""
+import sys
+from array import array
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Iterable
+
+# Layer III bitrates (kbps) by bitrate index; index 0 (free format) and 15 are invalid.
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# Sample rates by version bits: 0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1 (1 is reserved).
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+ID3V2_HEADER_SIZE = 10
+
+
+class Mp3IndexError(ValueError):
+    """Raised when no MPEG audio frames can be found in the stream."""
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int  # version bits: 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    sample_rate: int
+    bitrate_kbps: int
+    frame_length: int
+    samples_per_frame: int
+    mono: bool
+
+
+def parse_frame_header(b: bytes | bytearray, i: int = 0) -> FrameHeader | None:
+    """Parse a Layer III frame header at b[i:i+4]; None if it is not a valid header."""
+    if b[i] != 0xFF or (b[i + 1] & 0xE0) != 0xE0:
+        return None
+    version = (b[i + 1] >> 3) & 0x3
+    layer = (b[i + 1] >> 1) & 0x3
+    bitrate_index = (b[i + 2] >> 4) & 0xF
+    sample_rate_index = (b[i + 2] >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    padding = (b[i + 2] >> 1) & 0x1
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1[bitrate_index]
+        frame_length = 144 * bitrate * 1000 // sample_rate + padding
+        samples = 1152
+    else:
+        bitrate = _BITRATES_V2[bitrate_index]
+        frame_length = 72 * bitrate * 1000 // sample_rate + padding
+        samples = 576
+    mono = (b[i + 3] >> 6) & 0x3 == 3
+    return FrameHeader(version, sample_rate, bitrate, frame_length, samples, mono)
+
+
+def id3v2_size(header: bytes | bytearray) -> int:
+    """Total size of a leading ID3v2 tag (header + body + optional footer), 0 if none."""
+    if len(header) < ID3V2_HEADER_SIZE or header[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in header[6:10]:  # syncsafe integer: 4 x 7 bits
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return ID3V2_HEADER_SIZE + size + footer
+
+
+def _is_xing_frame(b: bytes | bytearray, i: int, header: FrameHeader) -> bool:
+    """Xing/Info (VBR) header frame: carries no audio, players skip it."""
+    if header.version == 3:
+        side_info = 17 if header.mono else 32
+    else:
+        side_info = 9 if header.mono else 17
+    tag = bytes(b[i + 4 + side_info:i + 8 + side_info])
+    return tag in (b"Xing", b"Info")
+
+
+@dataclass
+class FrameIndex:
+    sample_rate: int
+    samples_per_frame: int
+    first_frame_offset: int
+    frame_sizes: array = field(default_factory=lambda: array("H"))
+    _offsets: array | None = field(default=None, repr=False, compare=False)
+    offsets_end: int = field(default=0, repr=False, compare=False)  # end of last frame while building
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frame_sizes)
+
+    @property
+    def frame_duration(self) -> float:
+        return self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frame_count * self.frame_duration
+
+    @property
+    def audio_end(self) -> int:
+        return self.offsets[-1]
+
+    @property
+    def offsets(self) -> array:
+        """frame_count + 1 byte offsets; offsets[i] is the start of frame i, the last one its end."""
+        if self._offsets is None:
+            self._offsets = array("Q", accumulate(self.frame_sizes, initial=self.first_frame_offset))
+        return self._offsets
+
+    def seek(self, seconds: float) -> tuple[int, int]:
+        """(frame number, byte offset) of the frame containing `seconds`."""
+        if self.frame_count == 0:
+            return 0, self.first_frame_offset
+        frame = int(max(seconds, 0.0) / self.frame_duration)
+        frame = min(frame, self.frame_count - 1)
+        return frame, self.offsets[frame]
+
+    def segments(self, target_seconds: float) -> list[tuple[float, int, int]]:
+        """Split into ~target_seconds segments on frame boundaries: (duration, offset, length)."""
+        frames_per_segment = max(1, round(target_seconds / self.frame_duration))
+        offsets = self.offsets
+        out = []
+        for start in range(0, self.frame_count, frames_per_segment):
+            end = min(start + frames_per_segment, self.frame_count)
+            out.append(((end - start) * self.frame_duration, offsets[start], offsets[end] - offsets[start]))
+        return out
+
+    def frame_sizes_bytes(self) -> bytes:
+        sizes = self.frame_sizes
+        if sys.byteorder != "little":
+            sizes = array("H", sizes)
+            sizes.byteswap()
+        return sizes.tobytes()
+
+    @staticmethod
+    def frame_sizes_from_bytes(data: bytes) -> array:
+        sizes = array("H")
+        sizes.frombytes(data)
+        if sys.byteorder != "little":
+            sizes.byteswap()
+        return sizes
+
+
+def build_frame_index(chunks: Iterable[bytes]) -> FrameIndex:
+    """
+    Scan an MP3 byte stream (e.g. S3 body chunks) once and index every audio frame.
+    Memory is bounded by the chunk size plus one frame. Garbage between frames
+    (junk, trailing ID3v1/APE tags) is skipped by resyncing on the next valid header.
+    """
+    buf = bytearray()
+    pos = 0  # absolute offset of buf[0]
+    skip = 0  # bytes still to drop (leading ID3v2 tag)
+    started = False
+    locked: tuple[int, int] | None = None  # (version, sample_rate) of the first frame
+    index: FrameIndex | None = None
+    done = False
+
+    for chunk in chunks:
+        buf += chunk
+        i = 0
+        if not started:
+            if len(buf) < ID3V2_HEADER_SIZE:
+                continue
+            skip = id3v2_size(buf)
+            started = True
+        if skip:
+            dropped = min(skip, len(buf))
+            skip -= dropped
+            i = dropped
+        while len(buf) - i >= 4:
+            header = parse_frame_header(buf, i)
+            if header is None or (
+                locked is not None and (header.version, header.sample_rate) != locked
+            ):
+                nxt = buf.find(b"\xff", i + 1)
+                i = nxt if nxt != -1 else len(buf)
+                continue
+            # The first frame must be followed by another valid header, to reject false syncs.
+            need = header.frame_length + (4 if index is None else 0)
+            if len(buf) - i < need:
+                break
+            if index is None:
+                follower = parse_frame_header(buf, i + header.frame_length)
+                if follower is None or follower.sample_rate != header.sample_rate:
+                    i += 1
+                    continue
+                locked = (header.version, header.sample_rate)
+                if _is_xing_frame(buf, i, header):
+                    i += header.frame_length
+                    continue
+                index = FrameIndex(
+                    sample_rate=header.sample_rate,
+                    samples_per_frame=header.samples_per_frame,
+                    first_frame_offset=pos + i,
+                )
+                index.offsets_end = pos + i
+            else:
+                # Junk between frames is folded into the previous frame so offsets stay exact.
+                gap = pos + i - index.offsets_end
+                if gap:
+                    if index.frame_sizes[-1] + gap > 0xFFFF:
+                        done = True
+                        break
+                    index.frame_sizes[-1] += gap
+            index.frame_sizes.append(header.frame_length)
+            index.offsets_end = pos + i + header.frame_length
+            i += header.frame_length
+        del buf[:i]
+        pos += i
+        if done:
+            break
+
+    if index is None or index.frame_count == 0:
+        raise Mp3IndexError("No MPEG Layer III frames found")
+    return index
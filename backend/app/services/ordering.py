@@ -0,0 +1,145 @@
+"""
+Fractional ordering keys: strings that sort in list order under plain byte comparison
+(Python str order, Postgres COLLATE "C"), with a key available between any two keys.
+Moving an item is then one row update: give it a key between its new neighbours.
+
+Base-62 digits. A key is an integer part, whose first character encodes its length
+(a-z: 2-27 characters, A-Z: the negative side), followed by an optional fraction without
+trailing zeros. Appending or prepending steps the integer part, so keys built one by one
+at either end stay short (about log62 n); inserting repeatedly at the same spot lengthens
+the fraction by one character per ~6 inserts.
+(Algorithm after David Greenspan's "Implementing Fractional Indexing".)
+"""
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_ZERO = DIGITS[0]
+_SMALLEST_INTEGER = "A" + _ZERO * 26
+
+
+class OrderingKeyError(ValueError):
+    """Malformed key, or bounds out of order."""
+
+
+def _midpoint(a: str, b: str | None) -> str:
+    """Fraction strictly between fractions a and b (b None = 1), no trailing zeros."""
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else _ZERO) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise OrderingKeyError(f"invalid key head: {head!r}")
+
+
+def _split(key: str) -> tuple[str, str]:
+    if not key:
+        raise OrderingKeyError("empty key")
+    n = _integer_length(key[0])
+    if n > len(key) or key == _SMALLEST_INTEGER or key.endswith(_ZERO) and len(key) > n:
+        raise OrderingKeyError(f"invalid key: {key!r}")
+    if any(c not in DIGITS for c in key[1:]):
+        raise OrderingKeyError(f"invalid key: {key!r}")
+    return key[:n], key[n:]
+
+
+def _increment(integer: str) -> str | None:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = _ZERO
+    if head == "Z":
+        return "a" + _ZERO
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(_ZERO)
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement(integer: str) -> str | None:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def key_between(a: str | None, b: str | None) -> str:
+    """A key sorting after a and before b; None means no bound on that side."""
+    if a is not None and b is not None and a >= b:
+        raise OrderingKeyError(f"{a!r} >= {b!r}")
+    if a is None:
+        if b is None:
+            return "a" + _ZERO
+        int_b, frac_b = _split(b)
+        if int_b == _SMALLEST_INTEGER:
+            return int_b + _midpoint("", frac_b)
+        if int_b < b:
+            return int_b
+        key = _decrement(int_b)
+        if key is None:
+            raise OrderingKeyError("cannot decrement any more")
+        return key
+    int_a, frac_a = _split(a)
+    if b is None:
+        key = _increment(int_a)
+        return int_a + _midpoint(frac_a, None) if key is None else key
+    int_b, frac_b = _split(b)
+    if int_a == int_b:
+        return int_a + _midpoint(frac_a, frac_b)
+    key = _increment(int_a)
+    if key is None:
+        raise OrderingKeyError("cannot increment any more")
+    return key if key < b else int_a + _midpoint(frac_a, None)
+
+
+def keys_between(a: str | None, b: str | None, n: int) -> list[str]:
+    """n ascending keys between a and b, spread so none is much longer than needed."""
+    if n <= 0:
+        return []
+    if n == 1:
+        return [key_between(a, b)]
+    if b is None:
+        keys = [key_between(a, None)]
+        for _ in range(n - 1):
+            keys.append(key_between(keys[-1], None))
+        return keys
+    if a is None:
+        keys = [key_between(None, b)]
+        for _ in range(n - 1):
+            keys.append(key_between(None, keys[-1]))
+        return keys[::-1]
+    mid = n // 2
+    c = key_between(a, b)
+    return [*keys_between(a, c, mid), c, *keys_between(c, b, n - mid - 1)]
@@ -0,0 +1,239 @@
+"""
+Post-upload processing steps, run by job queue workers (app.services.jobs).
+Steps work per S3 object (shared by deduplicated songs) and are idempotent:
+an object that already has its result is skipped. Transient failures (S3, ffmpeg)
+raise so the queue retries them; input that can never succeed is logged and skipped.
+"""
+import logging
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.audio_fingerprint import AudioFingerprint
+from app.models.audio_index import AudioIndex
+from app.models.song import Song
+from app.services import covers, fingerprint, id3, library_stats, waveform
+from app.services.audio import decode_pcm
+from app.services.mp3index import FrameIndex, Mp3IndexError, build_frame_index, id3v2_size
+from app.services.s3 import (
+    get_object_range,
+    iter_object_chunks,
+    object_exists,
+    put_object_bytes,
+    sha256_object,
+)
+from app.services.song_sync import songs_changed
+
+logger = logging.getLogger(__name__)
+
+# One ranged GET covers typical tags (text + a small cover); larger tags take a second one.
+ID3_PREFETCH = 64 * 1024
+ID3_MAX_SIZE = 16 * 1024 * 1024
+
+def verify_file_hash(s3_key: str) -> None:
+    """
+    Hash the uploaded object server-side and mark every song using it as verified.
+    Dedup lookups ignore unverified rows, so a wrong client-supplied file_hash never
+    redirects other uploaders to this object. On mismatch the stored hash is replaced
+    with the real one (then verified). The object's ETag is stored with it (verified_etag:
+    every part was read pinned to it). The object size is recorded on songs that lack it
+    and counted in their owners' user_stats.
+    """
+    db = SessionLocal()
+    try:
+        pending = (
+            db.query(Song.file_hash)
+            .filter(Song.s3_key == s3_key, Song.hash_verified.is_(False))
+            .distinct()
+            .all()
+        )
+        if not pending:
+            return
+        result = sha256_object(s3_key)
+        if result is None:
+            raise RuntimeError(f"Object missing: {s3_key}")
+        actual, size, etag = result
+        claimed = {h for (h,) in pending if h}
+        if claimed - {actual}:
+            logger.warning(
+                "file_hash mismatch, replacing with server-computed hash",
+                extra={"s3_key": s3_key, "claimed": sorted(claimed), "actual": actual},
+            )
+        db.query(Song).filter(Song.s3_key == s3_key).update(
+            {Song.file_hash: actual, Song.hash_verified: True, Song.verified_etag: etag},
+            synchronize_session=False,
+        )
+        library_stats.record_object_size(db, s3_key, size)
+        db.commit()
+        logger.info("file_hash verified", extra={"s3_key": s3_key, "bytes": size})
+    finally:
+        db.close()
+
+
+def extract_metadata(s3_key: str) -> None:
+    """
+    Read only the ID3v2 tag (ranged GETs of the file start): fill empty title / artist
+    of songs using the object and store cover art thumbnails.
+    """
+    head = get_object_range(s3_key, 0, ID3_PREFETCH - 1)
+    if head is None:
+        raise RuntimeError(f"Object missing: {s3_key}")
+    size = id3v2_size(head)
+    if not size:
+        return
+    if size > ID3_MAX_SIZE:
+        logger.warning("ID3 tag skipped: too large", extra={"s3_key": s3_key, "bytes": size})
+        return
+    if size > len(head):
+        rest = get_object_range(s3_key, len(head), size - 1)
+        if rest is None:
+            raise RuntimeError(f"Object missing: {s3_key}")
+        head += rest
+    try:
+        tags = id3.parse_tag(head[:size])
+    except id3.Id3Error as e:
+        logger.warning("ID3 tag skipped", extra={"s3_key": s3_key, "error": str(e)})
+        return
+
+    digest = None
+    if tags.picture:
+        digest = covers.cover_hash(tags.picture)
+        # The largest size is written last, so its presence means the whole set exists.
+        if not object_exists(covers.cover_key(digest, covers.THUMBNAIL_SIZES[-1]), max_attempts=1):
+            try:
+                thumbnails = covers.make_thumbnails(tags.picture)
+            except covers.CoverError as e:
+                logger.warning("Cover art skipped", extra={"s3_key": s3_key, "error": str(e)})
+                digest = None
+            else:
+                for px in sorted(thumbnails):
+                    put_object_bytes(covers.cover_key(digest, px), thumbnails[px], "image/jpeg")
+
+    db = SessionLocal()
+    try:
+        songs = db.query(Song).filter(Song.s3_key == s3_key)
+        changed = 0
+        if tags.title:
+            changed += songs.filter(or_(Song.title.is_(None), Song.title == "")).update(
+                {Song.title: tags.title[:255]}, synchronize_session=False
+            )
+        if tags.artist:
+            changed += songs.filter(or_(Song.artist.is_(None), Song.artist == "")).update(
+                {Song.artist: tags.artist}, synchronize_session=False
+            )
+        if digest:
+            changed += songs.filter(Song.cover_hash.is_(None)).update(
+                {Song.cover_hash: digest}, synchronize_session=False
+            )
+        db.commit()
+        if changed:
+            # API workers: filled-in titles / artists into typeahead, cached responses out.
+            rows = db.query(Song.id, Song.title, Song.artist, Song.is_public, Song.is_deleted).filter(
+                Song.s3_key == s3_key
+            ).all()
+            songs_changed(
+                [r.id for r in rows],
+                upserts=[(r.id, r.title, r.artist) for r in rows if r.is_public and not r.is_deleted],
+            )
+    finally:
+        db.close()
+    logger.info(
+        "Metadata extracted",
+        extra={"s3_key": s3_key, "tag_bytes": size, "cover": digest is not None},
+    )
+
+
+def index_audio(s3_key: str) -> None:
+    """Stream the object from S3 once and store its MP3 frame index."""
+    db = SessionLocal()
+    try:
+        if db.get(AudioIndex, s3_key) is not None:
+            return
+        try:
+            index = build_frame_index(iter_object_chunks(s3_key))
+        except Mp3IndexError as e:
+            logger.warning("Audio index skipped", extra={"s3_key": s3_key, "error": str(e)})
+            return
+        db.add(AudioIndex(
+            s3_key=s3_key,
+            sample_rate=index.sample_rate,
+            samples_per_frame=index.samples_per_frame,
+            frame_count=index.frame_count,
+            duration_ms=round(index.duration_seconds * 1000),
+            first_frame_offset=index.first_frame_offset,
+            frame_sizes=index.frame_sizes_bytes(),
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Same object indexed concurrently (dedup); the other result is identical.
+            db.rollback()
+            return
+        logger.info(
+            "Audio index stored",
+            extra={"s3_key": s3_key, "frames": index.frame_count},
+        )
+    finally:
+        db.close()
+
+
+def load_frame_index(db: Session, s3_key: str) -> FrameIndex | None:
+    row = db.get(AudioIndex, s3_key)
+    if row is None:
+        return None
+    return FrameIndex(
+        sample_rate=row.sample_rate,
+        samples_per_frame=row.samples_per_frame,
+        first_frame_offset=row.first_frame_offset,
+        frame_sizes=FrameIndex.frame_sizes_from_bytes(row.frame_sizes),
+    )
+
+
+def waveform_key(s3_key: str) -> str:
+    """Waveform blob lives next to the audio: songs/abcd1234.mp3 -> songs/abcd1234.peaks."""
+    return s3_key.rsplit(".", 1)[0] + ".peaks"
+
+
+def generate_waveform(s3_key: str) -> None:
+    """Decode the object once and store its min/max peak pyramid next to it in S3."""
+    key = waveform_key(s3_key)
+    if object_exists(key, max_attempts=1):
+        return
+    peaks = waveform.compute_peaks(
+        decode_pcm(iter_object_chunks(s3_key), waveform.SAMPLE_RATE)
+    )
+    if not peaks.shape[0]:
+        logger.warning("Waveform skipped: no audio decoded", extra={"s3_key": s3_key})
+        return
+    blob = waveform.encode(waveform.build_pyramid(peaks))
+    put_object_bytes(key, blob, "application/octet-stream")
+    logger.info("Waveform stored", extra={"s3_key": s3_key, "bytes": len(blob)})
+
+
+def fingerprint_audio(s3_key: str) -> np.ndarray:
+    """
+    Decode the object, store its acoustic fingerprint and add it to the LSH index.
+    Returns the signature (existing one if already fingerprinted).
+    Raises AudioDecodeError if the object cannot be read or decoded.
+    """
+    db = SessionLocal()
+    try:
+        row = db.query(AudioFingerprint).filter(AudioFingerprint.s3_key == s3_key).first()
+        if row is not None:
+            return np.frombuffer(row.signature, dtype="<u4")
+        sig = fingerprint.fingerprint(
+            decode_pcm(iter_object_chunks(s3_key), fingerprint.SAMPLE_RATE)
+        )
+        db.add(AudioFingerprint(s3_key=s3_key, signature=sig.astype("<u4").tobytes()))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        fingerprint.fingerprint_index.add(s3_key, sig)
+        logger.info("Fingerprint stored", extra={"s3_key": s3_key})
+        return sig
+    finally:
+        db.close()
@@ -0,0 +1,103 @@
+"""
+Startup warm-up and readiness (GET /api/health/ready).
+
+warm_up() runs at the end of startup so the first routed requests do not pay for setup:
+- imports the lazily loaded auth backends (jose, passlib + argon2),
+- opens WARMUP_DB_CONNECTIONS pool connections in parallel,
+- builds the shared S3 client (boto3 import + service model load).
+Readiness is reported only after warm-up, and stops on shutdown so the load balancer
+drains the pod first. Dependency checks are time-bounded (READY_CHECK_TIMEOUT_SECONDS)
+and cached (READY_CACHE_SECONDS): probes from many sources share one check in flight.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from app.core import security
+from app.core.config import settings
+from app.db.session import engine
+from app.services import s3
+
+logger = logging.getLogger(__name__)
+
+
+def _check_database() -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+CHECKS = {"database": _check_database}
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(CHECKS), thread_name_prefix="ready-check")
+        self._in_flight: dict[str, Future] = {}
+        self._cached: tuple[float, dict[str, str]] | None = None
+
+    @property
+    def warmed_up(self) -> bool:
+        return self._ready.is_set()
+
+    def warm_up(self) -> None:
+        started = time.perf_counter()
+        security.preload()
+        n = min(settings.WARMUP_DB_CONNECTIONS, engine.pool.size())
+        if n > 0:
+            # Held together so the pool opens n distinct connections, then returned to it.
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                conns = list(pool.map(lambda _: engine.connect(), range(n)))
+            for conn in conns:
+                conn.close()
+        if settings.S3_BUCKET:
+            s3.get_s3_client()
+        self._ready.set()
+        logger.info(
+            "Warm-up done in %.0f ms",
+            (time.perf_counter() - started) * 1000,
+            extra={"db_connections": n},
+        )
+
+    def shutdown(self) -> None:
+        self._ready.clear()
+
+    def status(self) -> tuple[bool, dict[str, str]]:
+        """(ready, per-check result: "ok" / "timeout" / error class name)."""
+        if not self._ready.is_set():
+            return False, {"warm_up": "pending"}
+        now = time.monotonic()
+        with self._lock:
+            if self._cached and now - self._cached[0] < settings.READY_CACHE_SECONDS:
+                checks = self._cached[1]
+                return all(v == "ok" for v in checks.values()), checks
+            futures = {}
+            for name, check in CHECKS.items():
+                future = self._in_flight.get(name)
+                if future is None or future.done():
+                    # A check stuck past its timeout is not started again until it returns.
+                    future = self._executor.submit(check)
+                    self._in_flight[name] = future
+                futures[name] = future
+        deadline = now + settings.READY_CHECK_TIMEOUT_SECONDS
+        checks = {}
+        for name, future in futures.items():
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+                checks[name] = "ok"
+            except FutureTimeout:
+                checks[name] = "timeout"
+            except Exception as e:
+                checks[name] = type(e).__name__
+        with self._lock:
+            self._cached = (time.monotonic(), checks)
+        ready = all(v == "ok" for v in checks.values())
+        if not ready:
+            logger.warning("Readiness check failed", extra={"checks": checks})
+        return ready, checks
+
+
+readiness = Readiness()
@@ -1,16 +1,19 @@
 """
 S3 integration for Muzicc backend.
 Uses IRSA on EKS (no access keys). Bucket: songs/ prefix.
+boto3 (~120 ms to import) is loaded with the first client, not when the app is imported.
 """
+import hashlib
 import logging
 import re
+import threading
 import time
 import uuid
-from typing import Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Optional
 from urllib.parse import quote
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
@@ -22,22 +25,56 @@ ALLOWED_EXTENSIONS = {"mp3"}
 ALLOWED_CONTENT_TYPES = {"audio/mpeg"}
 DEFAULT_EXT = "mp3"
 PRESIGNED_EXPIRES = 3600  # 1 hour
+STREAM_CHUNK_SIZE = 256 * 1024
+# Server-side hash verification: parallel ranged GETs, at most
+# VERIFY_CONCURRENCY + 1 parts (x VERIFY_PART_SIZE) in memory at once.
+VERIFY_PART_SIZE = 8 * 1024 * 1024
+VERIFY_CONCURRENCY = 8
+# Every part is read with If-Match on the object's ETag; an object overwritten mid-read
+# is hashed again from the start, up to VERIFY_ATTEMPTS times.
+VERIFY_ATTEMPTS = 3
+# Bulk import uploads: multipart above one part, parts uploaded in parallel per file
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_POOL_CONNECTIONS = max(10, VERIFY_CONCURRENCY)
 
+_shared_client: Any = None
+_shared_client_lock = threading.Lock()
 
-def get_s3_client() -> Any:
+
+def get_s3_client(max_pool_connections: int | None = None) -> Any:
     """
-    Create S3 client. Uses IAM Role (IRSA) on EKS; no credentials passed.
+    S3 client. Uses IAM Role (IRSA) on EKS; no credentials passed.
     Production: retries + standard mode.
+    Without arguments: the process-wide shared client (boto3 clients are thread-safe and
+    cost tens of ms to build). With max_pool_connections: a new, dedicated client.
     """
+    global _shared_client
+    if max_pool_connections is not None:
+        return _create_client(max_pool_connections)
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = _create_client(DEFAULT_POOL_CONNECTIONS)
+    return _shared_client
+
+
+def _create_client(max_pool_connections: int) -> Any:
+    import boto3
+    from botocore.config import Config
+
     config = Config(
         signature_version="s3v4",
         region_name=settings.S3_REGION,
         retries={"max_attempts": 3, "mode": "standard"},
+        max_pool_connections=max_pool_connections,
+        # Local S3 stand-ins (MinIO, benchmarks) only support path-style URLs
+        s3={"addressing_style": "path"} if settings.S3_ENDPOINT_URL else None,
     )
     client = boto3.client(
         "s3",
         region_name=settings.S3_REGION,
         config=config,
+        endpoint_url=settings.S3_ENDPOINT_URL or None,
     )
     logger.debug("S3 client created for region=%s", settings.S3_REGION)
     return client
@@ -71,9 +108,11 @@ def generate_presigned_upload_url(
     object_key: str,
     content_type: str,
     expires_in: int = PRESIGNED_EXPIRES,
+    content_length: int | None = None,
 ) -> str:
     """
     Generate presigned URL for put_object. Includes ContentType. Expires in 1 hour.
+    With content_length, the signature also covers the size: S3 rejects a different body.
     """
     logger.info(
         "Generating presigned upload URL: bucket=%s key=%s content_type=%s",
@@ -82,14 +121,17 @@ def generate_presigned_upload_url(
         content_type,
     )
     client = get_s3_client()
+    params = {
+        "Bucket": settings.S3_BUCKET,
+        "Key": object_key,
+        "ContentType": content_type,
+    }
+    if content_length is not None:
+        params["ContentLength"] = content_length
     try:
         url = client.generate_presigned_url(
             "put_object",
-            Params={
-                "Bucket": settings.S3_BUCKET,
-                "Key": object_key,
-                "ContentType": content_type,
-            },
+            Params=params,
             ExpiresIn=expires_in,
         )
         return url
@@ -167,6 +209,30 @@ def get_file_url(object_key: str) -> str:
     return generate_presigned_get_url(object_key)
 
 
+def get_file_urls(object_keys: list[str]) -> dict[str, str | None]:
+    """
+    Batch version of get_file_url for bulk responses (e.g. catalog export).
+    Presigned GET URLs are signed locally with one shared client instead of one client per key.
+    Keys that fail to sign map to None.
+    """
+    base = getattr(settings, "CLOUDFRONT_URL", "").strip()
+    if base or getattr(settings, "S3_PUBLIC", False):
+        return {key: get_file_url(key) for key in object_keys}
+    client = get_s3_client()
+    urls: dict[str, str | None] = {}
+    for key in object_keys:
+        try:
+            urls[key] = client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": settings.S3_BUCKET, "Key": key},
+                ExpiresIn=PRESIGNED_EXPIRES,
+            )
+        except ClientError:
+            logger.warning("Failed to presign GET URL: bucket=%s key=%s", settings.S3_BUCKET, key)
+            urls[key] = None
+    return urls
+
+
 def object_exists(
     object_key: str,
     max_attempts: int = 3,
@@ -177,11 +243,20 @@ def object_exists(
     Returns False when object truly does not exist.
     Raises RuntimeError for infra / permission errors.
     """
+    return head_object_size(object_key, max_attempts, delay_seconds) is not None
+
+
+def head_object_size(
+    object_key: str,
+    max_attempts: int = 3,
+    delay_seconds: float = 0.2,
+) -> int | None:
+    """object_exists() returning the object's ContentLength, None when it does not exist."""
     client = get_s3_client()
     for attempt in range(max_attempts):
         try:
-            client.head_object(Bucket=settings.S3_BUCKET, Key=object_key)
-            return True
+            resp = client.head_object(Bucket=settings.S3_BUCKET, Key=object_key)
+            return int(resp["ContentLength"])
         except ClientError as e:
             code = e.response.get("Error", {}).get("Code", "Unknown")
             if code in ("404", "NoSuchKey"):
@@ -189,7 +264,7 @@ def object_exists(
                 if code == "NoSuchKey" and attempt < max_attempts - 1:
                     time.sleep(delay_seconds)
                     continue
-                return False
+                return None
             logger.warning(
                 "S3 head_object failed: bucket=%s key=%s code=%s",
                 settings.S3_BUCKET,
@@ -200,6 +275,233 @@ def object_exists(
             raise RuntimeError(f"S3 check failed: {code}") from e
 
 
+def iter_object_chunks(object_key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream an object's body in chunks (single GET, never fully in memory).
+    Raises RuntimeError on S3 errors.
+    """
+    client = get_s3_client()
+    try:
+        resp = client.get_object(Bucket=settings.S3_BUCKET, Key=object_key)
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "Unknown")
+        logger.warning(
+            "S3 get_object failed: bucket=%s key=%s code=%s",
+            settings.S3_BUCKET,
+            object_key,
+            code,
+        )
+        raise RuntimeError(f"S3 get failed: {code}") from e
+    body = resp["Body"]
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+class ObjectChangedError(RuntimeError):
+    """The object no longer has the ETag a read was pinned to (overwritten meanwhile)."""
+
+
+def get_object_size(object_key: str) -> int | None:
+    """ContentLength from head_object; None if the object does not exist."""
+    head = get_object_head(object_key)
+    return None if head is None else head[0]
+
+
+def get_object_head(object_key: str) -> tuple[int, str] | None:
+    """(ContentLength, ETag) from head_object; None if the object does not exist."""
+    client = get_s3_client()
+    try:
+        resp = client.head_object(Bucket=settings.S3_BUCKET, Key=object_key)
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "Unknown")
+        if code in ("404", "NoSuchKey"):
+            return None
+        raise RuntimeError(f"S3 check failed: {code}") from e
+    return int(resp["ContentLength"]), resp["ETag"]
+
+
+def iter_object_parts(
+    object_key: str,
+    size: int,
+    part_size: int = VERIFY_PART_SIZE,
+    concurrency: int = VERIFY_CONCURRENCY,
+    etag: str | None = None,
+) -> Iterator[bytes]:
+    """
+    Yield the object's bytes in order, fetched as parallel ranged GETs.
+    Keeps `concurrency` requests in flight ahead of the consumer, so memory is
+    bounded by (concurrency + 1) x part_size whatever the object size.
+    With etag, every part is read with If-Match: ObjectChangedError if the object was
+    overwritten, instead of parts of two versions.
+    """
+    client = get_s3_client()
+    pinned = {"IfMatch": etag} if etag else {}
+
+    def fetch(start: int) -> bytes:
+        end = min(start + part_size, size) - 1
+        try:
+            resp = client.get_object(
+                Bucket=settings.S3_BUCKET,
+                Key=object_key,
+                Range=f"bytes={start}-{end}",
+                **pinned,
+            )
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "Unknown")
+            if code in ("PreconditionFailed", "412"):
+                raise ObjectChangedError(f"S3 object changed during read: {object_key}") from e
+            raise RuntimeError(f"S3 get failed: {code}") from e
+        body = resp["Body"]
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        if len(data) != end - start + 1:
+            raise RuntimeError(f"S3 short read at {start}: {len(data)} bytes")
+        return data
+
+    starts = iter(range(0, size, part_size))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-range") as pool:
+        pending = deque(pool.submit(fetch, start) for _, start in zip(range(concurrency), starts))
+        try:
+            while pending:
+                data = pending.popleft().result()
+                nxt = next(starts, None)
+                if nxt is not None:
+                    pending.append(pool.submit(fetch, nxt))
+                yield data
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def sha256_object(object_key: str, **kwargs: Any) -> tuple[str, int, str] | None:
+    """
+    (sha256 hex, size, ETag) of an S3 object, hashed incrementally from parallel ranged
+    reads pinned to the ETag (VERIFY_ATTEMPTS tries if it is overwritten meanwhile).
+    No temp file; None if the object does not exist. Raises RuntimeError on S3 errors,
+    ObjectChangedError if it kept changing.
+    """
+    attempts_left = VERIFY_ATTEMPTS
+    while True:
+        head = get_object_head(object_key)
+        if head is None:
+            return None
+        size, etag = head
+        digest = hashlib.sha256()
+        try:
+            for part in iter_object_parts(object_key, size, etag=etag, **kwargs):
+                digest.update(part)
+        except ObjectChangedError:
+            attempts_left -= 1
+            if not attempts_left:
+                raise
+            logger.warning("S3 object changed while hashing, retrying", extra={"key": object_key})
+            continue
+        return digest.hexdigest(), size, etag
+
+
+def get_object_range(object_key: str, start: int, end: int) -> bytes | None:
+    """
+    Ranged GET of bytes [start, end] (inclusive, clipped to the object size).
+    Returns None when the object does not exist; raises RuntimeError for other S3 errors.
+    """
+    return _read_object(object_key, Range=f"bytes={start}-{end}")
+
+
+def get_object_bytes(object_key: str) -> bytes | None:
+    """Whole small object (thumbnails...). None if missing; RuntimeError on other S3 errors."""
+    return _read_object(object_key)
+
+
+def _read_object(object_key: str, **kwargs) -> bytes | None:
+    client = get_s3_client()
+    try:
+        resp = client.get_object(
+            Bucket=settings.S3_BUCKET,
+            Key=object_key,
+            **kwargs,
+        )
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "Unknown")
+        if code in ("404", "NoSuchKey"):
+            return None
+        logger.warning(
+            "S3 get_object failed: bucket=%s key=%s code=%s",
+            settings.S3_BUCKET,
+            object_key,
+            code,
+        )
+        raise RuntimeError(f"S3 get failed: {code}") from e
+    body = resp["Body"]
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+
+def put_object_bytes(object_key: str, data: bytes, content_type: str) -> None:
+    """Store a small derived object (waveform, index...). Raises RuntimeError on failure."""
+    client = get_s3_client()
+    try:
+        client.put_object(
+            Bucket=settings.S3_BUCKET,
+            Key=object_key,
+            Body=data,
+            ContentType=content_type,
+        )
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "Unknown")
+        logger.warning(
+            "S3 put_object failed: bucket=%s key=%s code=%s",
+            settings.S3_BUCKET,
+            object_key,
+            code,
+        )
+        raise RuntimeError(f"S3 put failed: {code}") from e
+
+
+def upload_file(
+    local_path: str,
+    object_key: str,
+    content_type: str,
+    client: Any = None,
+    part_size: int = UPLOAD_PART_SIZE,
+    concurrency: int = 4,
+) -> None:
+    """
+    Upload a local file; multipart with up to `concurrency` parts in flight when larger
+    than one part. Raises RuntimeError on failure (after botocore retries).
+    """
+    from boto3.exceptions import S3UploadFailedError
+    from boto3.s3.transfer import TransferConfig
+
+    client = client or get_s3_client()
+    transfer = TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=concurrency,
+    )
+    try:
+        client.upload_file(
+            local_path,
+            settings.S3_BUCKET,
+            object_key,
+            ExtraArgs={"ContentType": content_type},
+            Config=transfer,
+        )
+    except (ClientError, S3UploadFailedError) as e:
+        logger.warning(
+            "S3 upload_file failed: bucket=%s key=%s error=%s",
+            settings.S3_BUCKET,
+            object_key,
+            e,
+        )
+        raise RuntimeError(f"S3 upload failed: {e}") from e
+
+
 def list_songs(prefix: str = S3_PREFIX, max_keys: int = 1000) -> list[str]:
     """
     List object keys under prefix (default: songs/). Only .mp3 keys.
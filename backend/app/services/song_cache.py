@@ -0,0 +1,113 @@
+"""
+In-process cache of GET /api/songs/{id} responses for hot (viral) songs.
+
+- Bounded LRU (SONG_CACHE_SIZE entries, 0 disables) with a TTL (SONG_CACHE_TTL_SECONDS).
+- Singleflight: concurrent misses for one id share a single load (one DB query); the
+  others wait for its result, or its exception (404 included, which is not cached).
+- Stampede protection: for SONG_CACHE_STALE_SECONDS after expiry, one caller refreshes
+  the entry while concurrent callers keep getting the previous value.
+- update / delete / restore (single and bulk) invalidate the ids they changed in every
+  worker (app.services.song_sync); a load that was in flight during an invalidation
+  still answers its waiters but is not stored.
+
+Per process. Without EVENTS_BACKEND=postgres, changes made by other processes show up
+once the entry expires; so do processing_status updates of the job workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Generic, Hashable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.valid = True  # False once invalidated: result is not cached
+
+
+class SingleFlightCache(Generic[T]):
+    def __init__(self, max_entries: int, ttl: float, stale: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale = stale
+        self._lock = threading.Lock()
+        # key -> (value, expires_at); least recently used first
+        self._entries: OrderedDict[Hashable, tuple[T, float]] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        if self.max_entries <= 0:
+            return load()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            elif entry is not None and now < entry[1] + self.stale:
+                self.stale_hits += 1  # refresh in flight; serve the previous value
+                return entry[0]
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.future.result()
+
+        try:
+            value = load()
+        except BaseException as e:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.future.set_exception(e)
+            raise
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if flight.valid:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        flight.future.set_result(value)
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop keys (one lock round for a whole batch); loads in flight are not stored."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                flight = self._flights.pop(key, None)
+                if flight is not None:
+                    flight.valid = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.valid = False
+            self._flights.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+song_cache: SingleFlightCache = SingleFlightCache(
+    max_entries=settings.SONG_CACHE_SIZE,
+    ttl=settings.SONG_CACHE_TTL_SECONDS,
+    stale=settings.SONG_CACHE_STALE_SECONDS,
+)
@@ -0,0 +1,70 @@
+"""
+Keeps per-process song state in step across workers after a committed write: the
+GET /songs/{id} cache (song_cache) and the typeahead index (suggest_index).
+
+songs_changed() applies a change in this process, then publishes it on the event bus
+(SONGS_CHANGED) so every API worker applies it too: a song made private or deleted stops
+being served from another worker's cache, and titles filled in by the job worker reach
+typeahead. Across processes this needs EVENTS_BACKEND=postgres, like the SSE feed; with
+"local" other workers catch up on cache expiry (song_cache) and on restart (typeahead).
+"""
+import json
+from typing import Iterable
+
+from app.core.config import settings
+from app.services.events import MAX_PAYLOAD_BYTES, event_bus
+from app.services.song_cache import song_cache
+from app.services.suggest import suggest_index
+
+SONGS_CHANGED = "songs_changed"
+# Room left in a NOTIFY payload for the event envelope
+_CHUNK_BYTES = MAX_PAYLOAD_BYTES - 200
+
+
+def apply_song_changes(data: dict) -> None:
+    """Event handler: drop the ids from the song cache and update typeahead."""
+    song_cache.invalidate(*data["ids"])
+    suggest_index.apply(
+        upserts=[tuple(u) for u in data.get("upserts", ())],
+        removals=data.get("removals", ()),
+    )
+
+
+def _chunks(
+    ids: list[int], upserts: list[tuple[int, str | None, str | None]], removals: list[int]
+) -> Iterable[dict]:
+    """Split a change into messages that fit a NOTIFY payload (bulk writes)."""
+    chunk: dict = {"ids": [], "upserts": [], "removals": []}
+    size = 0
+    items = [("ids", i) for i in ids] + [("upserts", u) for u in upserts] + [("removals", r) for r in removals]
+    for field, item in items:
+        item_size = len(json.dumps(item).encode()) + 2  # ", " separator
+        if size + item_size > _CHUNK_BYTES and size:
+            yield chunk
+            chunk, size = {"ids": [], "upserts": [], "removals": []}, 0
+        chunk[field].append(item)
+        size += item_size
+    if size:
+        yield chunk
+
+
+def songs_changed(
+    ids: Iterable[int],
+    upserts: Iterable[tuple[int, str | None, str | None]] = (),
+    removals: Iterable[int] = (),
+) -> None:
+    """
+    After commit: songs `ids` changed; upserts (id, title, artist) / removals are their
+    typeahead entries. Applied here at once (read-your-writes), then in every worker.
+    """
+    change = {"ids": list(ids), "upserts": list(upserts), "removals": list(removals)}
+    if not change["ids"]:
+        return
+    apply_song_changes(change)
+    if settings.EVENTS_BACKEND != "postgres":
+        return  # the local bus reaches this process only: already applied
+    for chunk in _chunks(change["ids"], change["upserts"], change["removals"]):
+        event_bus.publish(SONGS_CHANGED, chunk)
+
+
+event_bus.on(SONGS_CHANGED, apply_song_changes)
@@ -0,0 +1,237 @@
+"""
+In-memory prefix index for typeahead suggestions (GET /songs/suggest).
+
+Terms are normalized titles/artists of public, non-deleted songs, kept in one
+sorted list and searched with bisect: a prefix lookup is a binary search plus a
+short forward scan, so it never touches the DB.
+Built once at startup, then updated incrementally by the song write routes.
+Each worker process holds its own copy.
+"""
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.song import Song
+
+logger = logging.getLogger(__name__)
+
+KIND_TITLE = "t"
+KIND_ARTIST = "a"
+KIND_NAMES = {KIND_TITLE: "title", KIND_ARTIST: "artist"}
+
+# Separates the normalized term from "<kind><display text>" inside one entry string.
+# Sorts before any printable character, so "abc" < "abc\x00..." < "abcd".
+_SEP = "\x00"
+MAX_TERM_LENGTH = 100
+# Slot of "no entry" (song without title / artist, or no longer indexed)
+_NO_SLOT = -1
+
+
+def normalize(text: str | None) -> str:
+    """Casefold, strip accents (Tiếng Việt: "Sơn Tùng" -> "son tung") and collapse whitespace."""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())[:MAX_TERM_LENGTH]
+
+
+def _make_entry(kind: str, display: str | None) -> str | None:
+    term = normalize(display)
+    if not term:
+        return None
+    return f"{term}{_SEP}{kind}{display.strip()}"
+
+
+class SuggestIndex:
+    """
+    Sorted array of unique entries "<term>\\0<kind><display>", each with a slot (stable
+    number) holding its refcount. Many songs sharing a title/artist map to one entry, so
+    entries grow with distinct names. Per song only two slots are kept, in parallel
+    int32 arrays sorted by song id (12 bytes a song, against ~200 for a dict of tuples):
+    a song dropped from the index keeps its id with no slots until the next rebuild.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: list[str] = []
+        # entry -> slot; per slot: the entry (None when free) and its refcount
+        self._slots: dict[str, int] = {}
+        self._slot_entries: list[str | None] = []
+        self._refcount = array("i")
+        self._free_slots: list[int] = []
+        self._song_ids = array("i")
+        self._title_slots = array("i")
+        self._artist_slots = array("i")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _acquire_locked(self, entry: str | None) -> int:
+        if entry is None:
+            return _NO_SLOT
+        slot = self._slots.get(entry)
+        if slot is not None:
+            self._refcount[slot] += 1
+            return slot
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_entries[slot] = entry
+            self._refcount[slot] = 1
+        else:
+            slot = len(self._slot_entries)
+            self._slot_entries.append(entry)
+            self._refcount.append(1)
+        self._slots[entry] = slot
+        insort(self._entries, entry)
+        return slot
+
+    def _release_locked(self, slot: int) -> None:
+        if slot == _NO_SLOT:
+            return
+        self._refcount[slot] -= 1
+        if self._refcount[slot]:
+            return
+        entry = self._slot_entries[slot]
+        self._slot_entries[slot] = None
+        del self._slots[entry]
+        self._free_slots.append(slot)
+        i = bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+
+    def _find_locked(self, song_id: int) -> int:
+        """Position of song_id in the song arrays, or where it would be inserted."""
+        ids = self._song_ids
+        if ids and ids[-1] < song_id:
+            return len(ids)  # new songs have the highest ids
+        return bisect_left(ids, song_id)
+
+    def _add_locked(self, song_id: int, title: str | None, artist: str | None) -> None:
+        title_slot = self._acquire_locked(_make_entry(KIND_TITLE, title))
+        artist_slot = self._acquire_locked(_make_entry(KIND_ARTIST, artist))
+        i = self._find_locked(song_id)
+        if i < len(self._song_ids) and self._song_ids[i] == song_id:
+            self._title_slots[i] = title_slot
+            self._artist_slots[i] = artist_slot
+        elif title_slot != _NO_SLOT or artist_slot != _NO_SLOT:
+            self._song_ids.insert(i, song_id)
+            self._title_slots.insert(i, title_slot)
+            self._artist_slots.insert(i, artist_slot)
+
+    def _remove_locked(self, song_id: int) -> None:
+        i = self._find_locked(song_id)
+        if i == len(self._song_ids) or self._song_ids[i] != song_id:
+            return
+        self._release_locked(self._title_slots[i])
+        self._release_locked(self._artist_slots[i])
+        self._title_slots[i] = self._artist_slots[i] = _NO_SLOT
+
+    def rebuild(self, rows: Iterable[tuple[int, str | None, str | None]]) -> None:
+        """Replace the whole index from (song_id, title, artist) rows."""
+        slots: dict[str, int] = {}
+        slot_entries: list[str] = []
+        refcount = array("i")
+
+        def acquire(entry: str | None) -> int:
+            if entry is None:
+                return _NO_SLOT
+            slot = slots.get(entry)
+            if slot is None:
+                slot = slots[entry] = len(slot_entries)
+                slot_entries.append(entry)
+                refcount.append(1)
+            else:
+                refcount[slot] += 1
+            return slot
+
+        song_ids, title_slots, artist_slots = array("i"), array("i"), array("i")
+        ordered = True
+        for song_id, title, artist in rows:
+            title_slot = acquire(_make_entry(KIND_TITLE, title))
+            artist_slot = acquire(_make_entry(KIND_ARTIST, artist))
+            if title_slot != _NO_SLOT or artist_slot != _NO_SLOT:
+                ordered = ordered and (not song_ids or song_ids[-1] < song_id)
+                song_ids.append(song_id)
+                title_slots.append(title_slot)
+                artist_slots.append(artist_slot)
+        if not ordered:
+            order = sorted(range(len(song_ids)), key=song_ids.__getitem__)
+            song_ids = array("i", (song_ids[i] for i in order))
+            title_slots = array("i", (title_slots[i] for i in order))
+            artist_slots = array("i", (artist_slots[i] for i in order))
+        entries = sorted(slot_entries)
+        with self._lock:
+            self._entries = entries
+            self._slots = slots
+            self._slot_entries = slot_entries
+            self._refcount = refcount
+            self._free_slots = []
+            self._song_ids = song_ids
+            self._title_slots = title_slots
+            self._artist_slots = artist_slots
+        logger.info("Suggest index built: %d entries for %d songs", len(entries), len(song_ids))
+
+    def upsert(self, song_id: int, title: str | None, artist: str | None) -> None:
+        """(Re)index a public, non-deleted song."""
+        with self._lock:
+            self._remove_locked(song_id)
+            self._add_locked(song_id, title, artist)
+
+    def remove(self, song_id: int) -> None:
+        """Drop a song that was deleted or made private."""
+        with self._lock:
+            self._remove_locked(song_id)
+
+    def apply(
+        self,
+        upserts: Iterable[tuple[int, str | None, str | None]] = (),
+        removals: Iterable[int] = (),
+    ) -> None:
+        """Batch of upsert() / remove() under one lock acquisition (bulk mutations)."""
+        with self._lock:
+            for song_id in removals:
+                self._remove_locked(song_id)
+            for song_id, title, artist in upserts:
+                self._remove_locked(song_id)
+                self._add_locked(song_id, title, artist)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """Return up to `limit` (display text, kind name) pairs whose term starts with prefix."""
+        term = normalize(prefix)
+        if not term or limit <= 0:
+            return []
+        out: list[tuple[str, str]] = []
+        with self._lock:
+            entries = self._entries
+            i = bisect_left(entries, term)
+            n = len(entries)
+            while i < n and len(out) < limit:
+                entry = entries[i]
+                if not entry.startswith(term):
+                    break
+                rest = entry[entry.index(_SEP) + 1:]
+                out.append((rest[1:], KIND_NAMES[rest[0]]))
+                i += 1
+        return out
+
+
+suggest_index = SuggestIndex()
+
+
+def load_suggest_index(db: Session) -> None:
+    """Build the index from the DB (startup). Streams rows instead of loading ORM objects."""
+    rows = db.execute(
+        select(Song.id, Song.title, Song.artist)
+        .where(Song.is_public.is_(True), Song.is_deleted.is_(False))
+        .order_by(Song.id)  # the index keeps songs by id: no sort after loading
+        .execution_options(yield_per=5000)
+    )
+    suggest_index.rebuild(rows)
@@ -0,0 +1,119 @@
+"""
+Waveform peaks: multi-resolution min/max pyramid stored as one compact binary blob.
+
+Blob layout (little-endian):
+    header  "MZWF" | version u8 | bits u8 | reserved u16 | sample_rate u32 | level_count u32
+    levels  level_count x (samples_per_peak u32 | peak_count u32 | data_offset u32)
+    data    per level: peak_count x (min, max) as int8 (bits=8) or int16 (bits=16)
+Level 0 is the finest; each next level halves the number of peaks.
+A single level cut out with extract_level() is itself a valid one-level blob.
+"""
+import struct
+from typing import Iterable
+
+import numpy as np
+
+MAGIC = b"MZWF"
+VERSION = 1
+SAMPLE_RATE = 22050
+BASE_SAMPLES_PER_PEAK = 256  # ~86 peaks per second at level 0
+MIN_PEAKS = 512  # stop halving below this many peaks
+
+_HEADER = struct.Struct("<4sBBHII")
+_LEVEL = struct.Struct("<III")
+
+
+class WaveformFormatError(ValueError):
+    """Raised when a blob is not a valid waveform."""
+
+
+def compute_peaks(blocks: Iterable[np.ndarray], samples_per_peak: int = BASE_SAMPLES_PER_PEAK) -> np.ndarray:
+    """
+    Reduce streamed int16 PCM blocks to an (n, 2) int16 array of (min, max) per bucket.
+    Vectorized per block; only the remainder of each block is carried over.
+    """
+    parts: list[np.ndarray] = []
+    carry = np.empty(0, dtype=np.int16)
+    for block in blocks:
+        if carry.size:
+            block = np.concatenate((carry, block))
+        usable = block.size - block.size % samples_per_peak
+        carry = block[usable:].copy()
+        if usable:
+            frames = block[:usable].reshape(-1, samples_per_peak)
+            parts.append(np.stack((frames.min(axis=1), frames.max(axis=1)), axis=1))
+    if carry.size:
+        parts.append(np.array([[carry.min(), carry.max()]], dtype=np.int16))
+    if not parts:
+        return np.zeros((0, 2), dtype=np.int16)
+    return np.concatenate(parts).astype(np.int16, copy=False)
+
+
+def build_pyramid(peaks: np.ndarray) -> list[np.ndarray]:
+    """Level 0 = peaks; each next level merges pairs of buckets (min of mins, max of maxes)."""
+    levels = [peaks]
+    while levels[-1].shape[0] >= 2 * MIN_PEAKS:
+        prev = levels[-1]
+        even = prev[: prev.shape[0] - prev.shape[0] % 2].reshape(-1, 2, 2)
+        nxt = np.stack((even[:, :, 0].min(axis=1), even[:, :, 1].max(axis=1)), axis=1)
+        if prev.shape[0] % 2:
+            nxt = np.concatenate((nxt, prev[-1:]))
+        levels.append(nxt)
+    return levels
+
+
+def _quantize(peaks: np.ndarray, bits: int) -> np.ndarray:
+    if bits == 16:
+        return peaks.astype("<i2")
+    return (peaks >> 8).astype(np.int8)
+
+
+def encode(levels: list[np.ndarray], bits: int = 8, sample_rate: int = SAMPLE_RATE,
+           base_samples_per_peak: int = BASE_SAMPLES_PER_PEAK) -> bytes:
+    if bits not in (8, 16):
+        raise ValueError("bits must be 8 or 16")
+    data_start = _HEADER.size + _LEVEL.size * len(levels)
+    table = []
+    payload = []
+    offset = data_start
+    for n, level in enumerate(levels):
+        raw = _quantize(level, bits).tobytes()
+        table.append(_LEVEL.pack(base_samples_per_peak << n, level.shape[0], offset))
+        payload.append(raw)
+        offset += len(raw)
+    header = _HEADER.pack(MAGIC, VERSION, bits, 0, sample_rate, len(levels))
+    return header + b"".join(table) + b"".join(payload)
+
+
+def header_size(level_count: int) -> int:
+    return _HEADER.size + _LEVEL.size * level_count
+
+
+def parse_header(blob: bytes) -> tuple[int, int, list[tuple[int, int, int]]]:
+    """(bits, sample_rate, [(samples_per_peak, peak_count, data_offset), ...]) from the blob start."""
+    if len(blob) < _HEADER.size:
+        raise WaveformFormatError("Truncated waveform header")
+    magic, version, bits, _, sample_rate, level_count = _HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise WaveformFormatError("Not a waveform blob")
+    if len(blob) < header_size(level_count):
+        raise WaveformFormatError("Truncated waveform level table")
+    levels = [
+        _LEVEL.unpack_from(blob, _HEADER.size + n * _LEVEL.size)
+        for n in range(level_count)
+    ]
+    return bits, sample_rate, levels
+
+
+def level_byte_range(bits: int, level: tuple[int, int, int]) -> tuple[int, int]:
+    """(offset, length) of a level's data inside the full blob."""
+    _, peak_count, offset = level
+    return offset, peak_count * 2 * (bits // 8)
+
+
+def extract_level(bits: int, sample_rate: int, level: tuple[int, int, int], data: bytes) -> bytes:
+    """Wrap one level's data as a standalone one-level blob."""
+    samples_per_peak, peak_count, _ = level
+    header = _HEADER.pack(MAGIC, VERSION, bits, 0, sample_rate, 1)
+    table = _LEVEL.pack(samples_per_peak, peak_count, header_size(1))
+    return header + table + data
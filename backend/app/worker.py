@@ -0,0 +1,48 @@
+"""
+Job worker process for post-upload processing (app.services.jobs).
+
+    python -m app.worker [--threads N]
+
+Run as many processes as needed; per-type concurrency limits apply across all of them.
+SIGTERM/SIGINT stop claiming new jobs and let running ones finish.
+Each process also reconciles user_stats every STATS_RECONCILE_INTERVAL_SECONDS (one at a
+time across processes: the others skip their turn), and moves old soft-deleted songs to
+songs_archive every SONG_ARCHIVE_INTERVAL_SECONDS (same rule).
+"""
+import argparse
+import logging
+import signal
+import threading
+
+import app.db.init_db  # noqa: F401 - registers every model with the ORM mapper
+from app.core.config import settings
+from app.services.archive import run_archiver
+from app.services.jobs import start_workers
+from app.services.library_stats import run_reconciler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MUZICC post-upload job worker")
+    parser.add_argument("--threads", type=int, default=settings.JOB_WORKER_THREADS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    workers = start_workers(args.threads, stop)
+    if settings.STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        reconciler = threading.Thread(target=run_reconciler, args=(stop,), name="stats-reconciler", daemon=True)
+        reconciler.start()
+        workers.append(reconciler)
+    if settings.SONG_ARCHIVE_INTERVAL_SECONDS > 0:
+        archiver = threading.Thread(target=run_archiver, args=(stop,), name="song-archiver", daemon=True)
+        archiver.start()
+        workers.append(archiver)
+    stop.wait()
+    for t in workers:
+        t.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Overload behaviour with and without admission control (app.core.admission).
+
+    cd backend && python -m benchmarks.bench_admission --rate 120 --slow-ms 100
+
+Starts the API in a fresh uvicorn process per mode (ADMISSION_CONTROL=false, then true).
+It sends an open-loop stream of GET /api/songs: a fixed arrival rate, whatever the
+response times. The stream runs through three phases:
+  normal    every SQL statement takes --fast-ms extra
+  degraded  every SQL statement takes --slow-ms extra (a slowed-down Postgres)
+  recovery  back to --fast-ms
+Per phase it reports p50 / p99 latency of successful responses, 503s (shed) and client
+timeouts. Needs DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def serve(port: int) -> None:
+    """Server process: the app plus a bench-only route that sets the injected SQL delay."""
+    import uvicorn
+    from sqlalchemy import event
+
+    from app.core import admission
+    from app.db.session import engine
+    from app.main import app
+
+    delay = [0.0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _slow_database(*_args) -> None:
+        time.sleep(delay[0])
+
+    # async: must answer even when every threadpool thread is stuck on the slow database
+    @app.post("/bench/sql-delay")
+    async def set_sql_delay(ms: float) -> dict:
+        delay[0] = ms / 1000
+        return {"browse_limit": int(admission.limiters["browse"].limit)}
+
+    uvicorn.run(app, port=port, log_level="error", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def _phase(client: httpx.AsyncClient, url: str, rate: float, seconds: float, timeout: float) -> dict:
+    ok: list[float] = []
+    counts = {"shed": 0, "timeout": 0, "error": 0}
+
+    async def one() -> None:
+        t0 = time.perf_counter()
+        try:
+            resp = await client.get(url, timeout=timeout)
+        except httpx.TimeoutException:
+            counts["timeout"] += 1
+            return
+        except httpx.HTTPError:
+            counts["error"] += 1
+            return
+        if resp.status_code == 200:
+            ok.append((time.perf_counter() - t0) * 1000)
+        elif resp.status_code == 503:
+            counts["shed"] += 1
+        else:
+            counts["error"] += 1
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one()))
+    await asyncio.gather(*tasks)
+    return {
+        "ok": len(ok),
+        **counts,
+        "p50_ms": round(statistics.median(ok), 1) if ok else None,
+        "p99_ms": round(_percentile(ok, 99), 1) if ok else None,
+    }
+
+
+async def _drive(base: str, enabled: bool, args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=5000, max_keepalive_connections=500)
+    async with httpx.AsyncClient(limits=limits) as client:
+        while True:
+            try:
+                await client.get(f"{base}/api/health/ready")
+                break
+            except httpx.HTTPError:
+                await asyncio.sleep(0.05)
+        for phase, delay_ms in (("normal", args.fast_ms), ("degraded", args.slow_ms), ("recovery", args.fast_ms)):
+            await client.post(f"{base}/bench/sql-delay", params={"ms": delay_ms}, timeout=None)
+            row = await _phase(client, f"{base}/api/songs", args.rate, args.seconds, args.timeout)
+            state = (await client.post(f"{base}/bench/sql-delay", params={"ms": delay_ms}, timeout=None)).json()
+            print(json.dumps({"admission_control": enabled, "phase": phase, **row, **state}), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=float, default=120, help="requests per second")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of each phase")
+    parser.add_argument("--fast-ms", type=float, default=1)
+    parser.add_argument("--slow-ms", type=float, default=100)
+    parser.add_argument("--timeout", type=float, default=5, help="client timeout, seconds")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve)
+        return
+
+    for enabled in (False, True):
+        port = _free_port()
+        env = dict(os.environ, ADMISSION_CONTROL=str(enabled).lower())
+        proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_admission", "--serve", str(port)], env=env)
+        try:
+            asyncio.run(_drive(f"http://127.0.0.1:{port}", enabled, args))
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()  # graceful shutdown waits for every stuck request
+                proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+"""
+End-to-end API benchmark: seeded catalog, per-route scenarios at set concurrency levels.
+
+    cd backend
+    python -m benchmarks.bench_api seed --users 1000 --songs 100000
+    python -m benchmarks.bench_api run --songs 100000 --concurrency 1,8,32 --out before.json
+    python -m benchmarks.bench_api run --songs 100000 --concurrency 1,8,32 --out after.json
+    python -m benchmarks.bench_api compare before.json after.json --threshold 0.1
+
+seed  inserts bench users (bench-user-<n>@example.com) and songs (s3_key bench/<n>.mp3)
+      with generate_series, so 5M songs take minutes, not hours. The data is
+      deterministic: two seeds of the same size produce the same catalog. Seeding is
+      skipped when the catalog already has the requested size; use a dedicated database.
+run   seeds if needed, starts the API in a fresh uvicorn process pointed at the in-process
+      S3 stand-in, then drives each scenario with N closed-loop clients for --seconds
+      (after --warmup). Prints one JSON row per (scenario, concurrency): throughput,
+      p50 / p95 / p99 latency, errors; --out also writes them with the run's metadata.
+compare  flags regressions between two --out files: throughput down or p95 / p99 up by
+      more than --threshold (relative, ignoring latency changes under --min-delta-ms).
+      Exits 1 if any.
+
+Needs DATABASE_URL pointing at Postgres: the schema relies on Postgres sequences, partial
+indexes and the migration runner, so SQLite is not supported. The driver is one asyncio
+process; at high concurrency check its CPU before blaming the server.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+from benchmarks.fake_s3 import FakeS3Server
+
+PASSWORD = "bench-password"
+BUCKET = "bench-bucket"
+SEED_BATCH = 100_000
+# Title words; titles and artists are picked from them deterministically by row number.
+WORDS = (
+    "love night summer blue fire dream heart river city light rain gold shadow moon road "
+    "wild home echo storm ocean stone glass silver winter falling broken electric midnight"
+).split()
+
+
+def _env(**overrides: str) -> dict[str, str]:
+    env = dict(os.environ, **overrides)
+    env.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    env.setdefault("S3_BUCKET", BUCKET)
+    env.setdefault("SECRET_KEY", "bench")
+    return env
+
+
+# ---------------------------------------------------------------- seed
+
+def _count(conn, sql: str) -> int:
+    from sqlalchemy import text
+
+    return conn.execute(text(sql)).scalar()
+
+
+def seed(users: int, songs: int) -> None:
+    for name, value in _env().items():
+        os.environ.setdefault(name, value)
+    from sqlalchemy import text
+
+    from app.core.security import hash_password
+    from app.db.init_db import init_db
+    from app.db.session import engine
+
+    init_db()
+    with engine.begin() as conn:
+        have_users = _count(conn, "SELECT count(*) FROM users WHERE email LIKE 'bench-user-%'")
+        if have_users < users:
+            t0 = time.perf_counter()
+            # One argon2 hash shared by every bench user: hashing 10k passwords would dominate.
+            conn.execute(
+                text(
+                    "INSERT INTO users (email, password_hash)"
+                    " SELECT 'bench-user-' || n || '@example.com', :hash"
+                    " FROM generate_series(:first, :last) AS n"
+                    " ON CONFLICT (email) DO NOTHING"
+                ),
+                {"hash": hash_password(PASSWORD), "first": have_users + 1, "last": users},
+            )
+            print(json.dumps({"seeded": "users", "rows": users - have_users,
+                              "seconds": round(time.perf_counter() - t0, 1)}), flush=True)
+
+    with engine.connect() as conn:
+        have_songs = _count(conn, "SELECT count(*) FROM songs WHERE s3_key LIKE 'bench/%'")
+        user_ids = [
+            r[0] for r in conn.execute(
+                text("SELECT id FROM users WHERE email LIKE 'bench-user-%' ORDER BY id LIMIT :n"),
+                {"n": users},
+            )
+        ]
+    if have_songs >= songs:
+        return
+    t0 = time.perf_counter()
+    for first in range(have_songs + 1, songs + 1, SEED_BATCH):
+        last = min(songs, first + SEED_BATCH - 1)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO songs (title, artist, s3_key, file_hash, hash_verified, audio_url,
+                                       processing_status, is_public, is_deleted, owner_id,
+                                       created_at, updated_at)
+                    SELECT w[1 + n % cardinality(w)] || ' ' || w[1 + (n / 7) % cardinality(w)] || ' ' || n,
+                           'Artist ' || (n * 31 % 5000),
+                           'bench/' || n || '.mp3',
+                           md5(n::text) || md5('bench' || n),
+                           true, '', 'ready',
+                           n % 5 <> 0, false,
+                           (:user_ids)[1 + (n * 7919) % cardinality(:user_ids)],
+                           timestamptz '2024-01-01' + n * interval '1 second',
+                           timestamptz '2024-01-01' + n * interval '1 second'
+                    FROM generate_series(:first, :last) AS n, (SELECT CAST(:words AS text[]) AS w) AS words
+                    """
+                ),
+                {"user_ids": user_ids, "first": first, "last": last, "words": list(WORDS)},
+            )
+        done = last - have_songs
+        elapsed = time.perf_counter() - t0
+        print(json.dumps({"seeded": "songs", "rows": done, "of": songs - have_songs,
+                          "rows_per_s": round(done / elapsed)}), flush=True)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE users"))
+        conn.execute(text("ANALYZE songs"))
+
+
+# ---------------------------------------------------------------- scenarios
+
+@dataclass
+class Context:
+    tokens: list[str]
+    # song ids owned by the user of the token at the same index
+    owned: list[list[int]]
+    public_ids: list[int]
+    hashes: list[str]
+
+
+# (method, url, json body, headers), built per request by a scenario
+Request = tuple[str, str, dict | None, dict[str, str]]
+
+
+def _auth(ctx: Context, rng: random.Random) -> tuple[int, dict[str, str]]:
+    i = rng.randrange(len(ctx.tokens))
+    return i, {"Authorization": f"Bearer {ctx.tokens[i]}"}
+
+
+def _list_public(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/api/songs?limit=20&offset={rng.randrange(0, 200, 20)}", None, {}
+
+
+def _search_public(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/api/songs?q={rng.choice(WORDS)}&limit=20", None, {}
+
+
+def _get_song(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/api/songs/{rng.choice(ctx.public_ids)}", None, {}
+
+
+def _get_song_hot(ctx: Context, rng: random.Random) -> Request:
+    # Every client on the same song (a viral one)
+    return "GET", f"/api/songs/{ctx.public_ids[0]}", None, {}
+
+
+def _suggest(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/api/songs/suggest?prefix={rng.choice(WORDS)[:2]}", None, {}
+
+
+def _my_songs(ctx: Context, rng: random.Random) -> Request:
+    _, headers = _auth(ctx, rng)
+    return "GET", "/api/songs/me?limit=20", None, headers
+
+
+def _changes(ctx: Context, rng: random.Random) -> Request:
+    _, headers = _auth(ctx, rng)
+    return "GET", "/api/songs/changes?limit=100", None, headers
+
+
+def _check_file(ctx: Context, rng: random.Random) -> Request:
+    _, headers = _auth(ctx, rng)
+    return "POST", "/api/songs/check-file", {"file_hash": rng.choice(ctx.hashes)}, headers
+
+
+def _upload_url(ctx: Context, rng: random.Random) -> Request:
+    _, headers = _auth(ctx, rng)
+    body = {"filename": "bench.mp3", "content_type": "audio/mpeg", "file_hash": "%064x" % rng.getrandbits(256)}
+    return "POST", "/api/songs/upload-url", body, headers
+
+
+def _update_song(ctx: Context, rng: random.Random) -> Request:
+    i, headers = _auth(ctx, rng)
+    song_id = rng.choice(ctx.owned[i])
+    return "PUT", f"/api/songs/{song_id}", {"artist": f"Artist {rng.randrange(5000)}"}, headers
+
+
+def _login(ctx: Context, rng: random.Random) -> Request:
+    body = {"email": f"bench-user-{rng.randrange(len(ctx.tokens)) + 1}@example.com", "password": PASSWORD}
+    return "POST", "/api/auth/login", body, {}
+
+
+SCENARIOS: dict[str, Callable[[Context, random.Random], Request]] = {
+    "list_public": _list_public,
+    "search_public": _search_public,
+    "get_song": _get_song,
+    "get_song_hot": _get_song_hot,
+    "suggest": _suggest,
+    "my_songs": _my_songs,
+    "changes": _changes,
+    "check_file": _check_file,
+    "upload_url": _upload_url,
+    "update_song": _update_song,
+    "login": _login,
+}
+
+
+def _context(token_users: int, songs: int) -> Context:
+    from sqlalchemy import text
+
+    from app.core.security import create_access_token
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        user_ids = [
+            r[0] for r in conn.execute(
+                text(
+                    "SELECT u.id FROM users u WHERE u.email LIKE 'bench-user-%'"
+                    " AND EXISTS (SELECT 1 FROM songs s WHERE s.owner_id = u.id AND NOT s.is_deleted)"
+                    " ORDER BY u.id LIMIT :n"
+                ),
+                {"n": token_users},
+            )
+        ]
+        owned = [
+            [r[0] for r in conn.execute(
+                text("SELECT id FROM songs WHERE owner_id = :u AND NOT is_deleted LIMIT 50"), {"u": u}
+            )]
+            for u in user_ids
+        ]
+        # Same rows every run: bench song n has s3_key bench/<n>.mp3
+        keys = [f"bench/{n}.mp3" for n in random.Random(42).sample(range(1, songs + 1), min(songs, 1000))]
+        sample = conn.execute(
+            text("SELECT id, file_hash FROM songs WHERE s3_key = ANY(:keys) AND is_public AND NOT is_deleted"),
+            {"keys": keys},
+        ).all()
+    if not user_ids or not sample:
+        raise SystemExit("No bench data: run `python -m benchmarks.bench_api seed` first")
+    return Context(
+        tokens=[create_access_token(u) for u in user_ids],
+        owned=owned,
+        public_ids=[r[0] for r in sample],
+        hashes=[r[1] for r in sample],
+    )
+
+
+# ---------------------------------------------------------------- run
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def _drive(client: httpx.AsyncClient, build, ctx: Context, concurrency: int,
+                 warmup: float, seconds: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    stop = measure_from + seconds
+
+    async def worker(seed_: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed_)
+        while True:
+            method, url, body, headers = build(ctx, rng)
+            t0 = time.perf_counter()
+            if t0 >= stop:
+                return
+            try:
+                resp = await client.request(method, url, json=body, headers=headers)
+                failed = resp.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            t1 = time.perf_counter()
+            if t0 < measure_from:
+                continue
+            if failed:
+                errors += 1
+            else:
+                latencies.append((t1 - t0) * 1000)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    row = {"requests": len(latencies), "errors": errors, "rps": round(len(latencies) / seconds, 1)}
+    for p in (50, 95, 99):
+        row[f"p{p}_ms"] = round(_percentile(latencies, p), 2) if latencies else None
+    if latencies:
+        row["mean_ms"] = round(statistics.fmean(latencies), 2)
+    return row
+
+
+async def _run_scenarios(base: str, ctx: Context, args: argparse.Namespace) -> list[dict]:
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10)
+    rows = []
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        while True:
+            try:
+                if (await client.get("/api/health/ready")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.05)
+        for name, concurrency in itertools.product(args.scenarios, args.concurrency):
+            row = {"scenario": name, "concurrency": concurrency}
+            row.update(await _drive(client, SCENARIOS[name], ctx, concurrency, args.warmup, args.seconds))
+            print(json.dumps(row), flush=True)
+            rows.append(row)
+    return rows
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> None:
+    seed(args.users, args.songs)
+    ctx = _context(args.token_users, args.songs)
+    s3 = FakeS3Server().start()
+    port = _free_port()
+    env = _env(S3_ENDPOINT_URL=s3.url, S3_BUCKET=BUCKET, JOB_EMBEDDED_WORKERS="0",
+               ADMISSION_CONTROL=str(args.admission_control).lower())
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(args.server_workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        rows = asyncio.run(_run_scenarios(f"http://127.0.0.1:{port}", ctx, args))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        s3.stop()
+    if args.out:
+        meta = {
+            "commit": _git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "users": args.users,
+            "songs": args.songs,
+            "seconds": args.seconds,
+            "server_workers": args.server_workers,
+            "admission_control": args.admission_control,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": rows}, f, indent=2)
+
+
+# ---------------------------------------------------------------- compare
+
+def compare(args: argparse.Namespace) -> int:
+    def load(path: str) -> dict[tuple[str, int], dict]:
+        with open(path, encoding="utf-8") as f:
+            return {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    base, new = load(args.base), load(args.new)
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        old_row, new_row = base[key], new[key]
+        flags = []
+        if old_row["rps"] and new_row["rps"] < old_row["rps"] * (1 - args.threshold):
+            flags.append("rps")
+        for metric in ("p95_ms", "p99_ms"):
+            old, cur = old_row.get(metric), new_row.get(metric)
+            if old is None or cur is None:
+                continue
+            if cur > old * (1 + args.threshold) and cur - old >= args.min_delta_ms:
+                flags.append(metric)
+        if new_row["errors"] > old_row["errors"]:
+            flags.append("errors")
+        regressions += bool(flags)
+        print(json.dumps({
+            "scenario": key[0],
+            "concurrency": key[1],
+            "rps": [old_row["rps"], new_row["rps"]],
+            "p95_ms": [old_row.get("p95_ms"), new_row.get("p95_ms")],
+            "p99_ms": [old_row.get("p99_ms"), new_row.get("p99_ms")],
+            "errors": [old_row["errors"], new_row["errors"]],
+            "regression": flags,
+        }))
+    for key in sorted(base.keys() ^ new.keys()):
+        print(json.dumps({"scenario": key[0], "concurrency": key[1], "only_in": "base" if key in base else "new"}))
+    print(json.dumps({"compared": len(base.keys() & new.keys()), "regressions": regressions}))
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_size(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--users", type=int, default=1000)
+        p.add_argument("--songs", type=int, default=10_000)
+
+    add_size(sub.add_parser("seed", help="insert bench users and songs"))
+
+    p_run = sub.add_parser("run", help="seed if needed, then drive every scenario")
+    add_size(p_run)
+    p_run.add_argument("--scenarios", default=",".join(SCENARIOS),
+                       type=lambda s: [x for x in s.split(",") if x],
+                       help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    p_run.add_argument("--concurrency", default=[1, 8, 32], type=lambda s: [int(x) for x in s.split(",")])
+    p_run.add_argument("--seconds", type=float, default=10, help="measured duration per scenario and level")
+    p_run.add_argument("--warmup", type=float, default=2)
+    p_run.add_argument("--token-users", type=int, default=100, help="distinct authenticated users")
+    p_run.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes")
+    p_run.add_argument("--admission-control", action=argparse.BooleanOptionalAction, default=False,
+                       help="keep ADMISSION_CONTROL on (503s count as errors)")
+    p_run.add_argument("--out", help="write results JSON here (input of compare)")
+
+    p_cmp = sub.add_parser("compare", help="flag regressions between two --out files")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="relative change that counts")
+    p_cmp.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore smaller latency changes")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args.users, args.songs)
+    elif args.command == "run":
+        unknown = set(args.scenarios) - SCENARIOS.keys()
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Cold start of the API: import time of app.main, time until GET /api/health/ready answers 200
+for a freshly spawned uvicorn process, and latency of the first requests it serves.
+
+    cd backend && python -m benchmarks.bench_cold_start --runs 5 --warmup-connections 0,4
+
+Needs DATABASE_URL (a real Postgres; the schema is migrated and a bench user is seeded).
+First requests: login (DB, argon2, JWT) then upload-url (JWT, DB, S3 presign; signed
+locally, no S3 traffic). --warmup-connections 0 skips opening pool connections at startup.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+EMAIL = "bench-cold-start@example.com"
+PASSWORD = "bench-password"
+
+
+def _env(**overrides: str) -> dict[str, str]:
+    env = dict(os.environ, **overrides)
+    env.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    env.setdefault("S3_BUCKET", "bench-bucket")
+    env.setdefault("SECRET_KEY", "bench")
+    return env
+
+
+def _seed() -> None:
+    from sqlalchemy import select
+
+    from app.core.security import hash_password
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    init_db()
+    with SessionLocal() as db:
+        if db.scalar(select(User.id).where(User.email == EMAIL)) is None:
+            db.add(User(email=EMAIL, password_hash=hash_password(PASSWORD)))
+            db.commit()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, body: dict | None = None, token: str | None = None) -> tuple[float, int, dict]:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=headers)
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            status, payload = resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        status, payload = e.code, e.read()
+    return (time.perf_counter() - t0) * 1000, status, json.loads(payload or b"{}")
+
+
+def measure_import(env: dict[str, str]) -> float:
+    out = subprocess.check_output(
+        [sys.executable, "-c",
+         "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"],
+        env=env,
+    )
+    return float(out) * 1000
+
+
+def measure_start(env: dict[str, str]) -> dict[str, float]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}/api"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                with urllib.request.urlopen(f"{base}/health/ready", timeout=1) as resp:
+                    if resp.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.005)
+        ready_ms = (time.perf_counter() - t0) * 1000
+        login_ms, status, body = _request(f"{base}/auth/login", {"email": EMAIL, "password": PASSWORD})
+        assert status == 200, f"login failed: {status} {body}"
+        token = body["access_token"]
+        upload = {"filename": "bench.mp3", "content_type": "audio/mpeg", "file_hash": "0" * 64}
+        first_ms, status, body = _request(f"{base}/songs/upload-url", upload, token)
+        assert status == 200, f"upload-url failed: {status} {body}"
+        second_ms, _, _ = _request(f"{base}/songs/upload-url", upload, token)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "ready_ms": ready_ms,
+        "first_login_ms": login_ms,
+        "first_upload_url_ms": first_ms,
+        "second_upload_url_ms": second_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup-connections", default="0,4", help="WARMUP_DB_CONNECTIONS values")
+    args = parser.parse_args()
+
+    _seed()
+    env = _env()
+    imports = [measure_import(env) for _ in range(args.runs)]
+    print(json.dumps({"mode": "import app.main", "median_ms": round(statistics.median(imports), 1)}))
+    for n in args.warmup_connections.split(","):
+        runs = [measure_start(_env(WARMUP_DB_CONNECTIONS=n)) for _ in range(args.runs)]
+        row = {"warmup_connections": int(n)}
+        for metric in runs[0]:
+            row[metric] = round(statistics.median(r[metric] for r in runs), 1)
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
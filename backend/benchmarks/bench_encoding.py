@@ -0,0 +1,96 @@
+"""
+Bytes on the wire and server CPU per response, per format (JSON / msgpack) and encoding.
+
+    cd backend && python -m benchmarks.bench_encoding --songs 20000 --requests 200
+
+Seeds the bench catalog (benchmarks.bench_api seed) and starts the API in a uvicorn
+process with presigned GET URLs (no CloudFront), the worst case for payload size. Then it
+fetches each endpoint sequentially: a list page (limit=100), one song and the full export,
+for every combination of Accept (json, msgpack) and Accept-Encoding (identity, gzip, br).
+body_bytes is the compressed size as received; server_cpu_ms is the uvicorn process's
+user + system CPU time per response, read from /proc (Linux).
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_api import _env, _free_port, seed
+from benchmarks.fake_s3 import FakeS3Server
+
+FORMATS = {"json": "application/json", "msgpack": "application/msgpack"}
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime, stime: fields 14 and 15 of stat, counted after the ")" ending the command name
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--songs", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=200, help="per list / get combination")
+    parser.add_argument("--export-requests", type=int, default=3)
+    args = parser.parse_args()
+
+    seed(args.users, args.songs)
+    s3 = FakeS3Server().start()
+    port = _free_port()
+    env = _env(S3_ENDPOINT_URL=s3.url, CLOUDFRONT_URL="", S3_PUBLIC="false", QUERY_BUDGET_MODE="off")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}/api"
+    try:
+        with httpx.Client(base_url=base, timeout=60) as client:
+            while True:
+                try:
+                    if client.get("/health/ready").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.05)
+            song_id = client.get("/songs?limit=1").json()["items"][0]["id"]
+            endpoints = {
+                "list": ("/songs?limit=100", args.requests),
+                "get": (f"/songs/{song_id}", args.requests),
+                "export": ("/songs/export", args.export_requests),
+            }
+            for (name, (path, n)), fmt, encoding in itertools.product(endpoints.items(), FORMATS, ENCODINGS):
+                headers = {"Accept": FORMATS[fmt], "Accept-Encoding": encoding}
+                client.get(path, headers=headers)  # warm caches and code paths
+                cpu0, t0, wire = _cpu_seconds(proc.pid), time.perf_counter(), 0
+                for _ in range(n):
+                    with client.stream("GET", path, headers=headers) as resp:
+                        resp.raise_for_status()
+                        for _chunk in resp.iter_raw():
+                            pass
+                        wire += resp.num_bytes_downloaded
+                cpu = _cpu_seconds(proc.pid) - cpu0
+                print(json.dumps({
+                    "endpoint": name,
+                    "format": fmt,
+                    "encoding": encoding,
+                    "body_bytes": round(wire / n),
+                    "server_cpu_ms": round(cpu / n * 1000, 3),
+                    "latency_ms": round((time.perf_counter() - t0) / n * 1000, 2),
+                }), flush=True)
+    finally:
+        proc.terminate()
+        proc.wait()
+        s3.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of server-side file_hash verification (app.services.s3.sha256_object)
+against the in-process S3 stand-in, compared with a single streamed GET.
+
+    cd backend && python -m benchmarks.bench_hash_verify --sizes 10,100,500 --concurrency 1,4,8
+
+--latency-ms / --conn-mbps throttle each GET like a real S3 connection; with both at 0
+the run measures local hashing + HTTP overhead only.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from benchmarks.fake_s3 import FakeS3Server
+
+BUCKET = "bench-bucket"
+
+
+def _configure(endpoint: str) -> None:
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    from app.core.config import settings
+
+    settings.S3_ENDPOINT_URL = endpoint
+    settings.S3_BUCKET = BUCKET
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,100,500", help="object sizes in MB")
+    parser.add_argument("--concurrency", default="1,4,8", help="parallel ranged GETs")
+    parser.add_argument("--part-mb", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="first-byte latency per GET")
+    parser.add_argument("--conn-mbps", type=float, default=80.0, help="bandwidth cap per connection, MB/s (0 = none)")
+    args = parser.parse_args()
+
+    server = FakeS3Server(latency_ms=args.latency_ms, per_connection_mbps=args.conn_mbps).start()
+    _configure(server.url)
+    from app.services.s3 import iter_object_chunks, sha256_object
+
+    results = []
+    try:
+        for size_mb in (int(x) for x in args.sizes.split(",")):
+            key = f"songs/bench{size_mb:04d}.mp3"
+            data = os.urandom(size_mb * 1024 * 1024)
+            expected = hashlib.sha256(data).hexdigest()
+            server.put(BUCKET, key, data)
+            del data
+
+            def run(label, fn, **extra):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    digest = fn()
+                    best = min(best, time.perf_counter() - t0)
+                    assert digest == expected, f"hash mismatch for {label}"
+                row = {"size_mb": size_mb, "mode": label, "seconds": round(best, 3),
+                       "mb_per_s": round(size_mb / best, 1), **extra}
+                results.append(row)
+                print(json.dumps(row))
+
+            def single_stream():
+                h = hashlib.sha256()
+                for chunk in iter_object_chunks(key):
+                    h.update(chunk)
+                return h.hexdigest()
+
+            run("single_get", single_stream)
+            for c in (int(x) for x in args.concurrency.split(",")):
+                run(
+                    "parallel_ranges",
+                    lambda: sha256_object(key, part_size=args.part_mb * 1024 * 1024, concurrency=c)[0],
+                    concurrency=c,
+                    part_mb=args.part_mb,
+                )
+            server.objects.clear()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Playlist reorder and read latency at a given playlist size (default 10k entries).
+
+    cd backend && python -m benchmarks.bench_playlist --tracks 10000 --moves 2000
+
+Seeds the bench catalog (benchmarks.bench_api seed), starts the API in a uvicorn process
+and, as one bench user, fills a fresh playlist with public songs through the bulk add
+endpoint (1000 per request). Then, sequentially over one connection:
+- moves: random entry after / before a random other entry; naive_rows_per_move is how many
+  rows an integer position column would have rewritten for the same moves (the entries
+  between the old and new spot), against 1 with ordering keys.
+- hotspot_moves: every move into the same gap, the worst case for key length; the
+  playlist is rebalanced when keys pass MAX_POSITION_LENGTH.
+- reads: first page, and pages starting at random depths (cursor taken from a full scan).
+The playlist is deleted at the end.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_api import _env, _free_port, _percentile, seed
+from benchmarks.fake_s3 import FakeS3Server
+
+ADD_BATCH = 1000
+
+
+def _summary(name: str, latencies: list[float], **extra) -> None:
+    print(json.dumps({
+        "scenario": name,
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        **extra,
+    }), flush=True)
+
+
+def _timed(client: httpx.Client, method: str, path: str, **kwargs) -> tuple[float, dict]:
+    t0 = time.perf_counter()
+    resp = client.request(method, path, **kwargs)
+    elapsed = time.perf_counter() - t0
+    resp.raise_for_status()
+    return elapsed, resp.json() if resp.content else {}
+
+
+def _scan(client: httpx.Client, playlist_id: int, limit: int) -> list[tuple[int, str]]:
+    """(item_id, cursor pointing just before it) of every entry, in order."""
+    entries, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        _, page = _timed(client, "GET", f"/playlists/{playlist_id}/tracks", params=params)
+        for item in page["items"]:
+            entries.append((item["item_id"], cursor))
+            cursor = f"{item['position']}.{item['item_id']}"
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--songs", type=int, default=20_000)
+    parser.add_argument("--tracks", type=int, default=10_000)
+    parser.add_argument("--moves", type=int, default=2000)
+    parser.add_argument("--hotspot-moves", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    seed(args.users, args.songs)
+    from sqlalchemy import text
+
+    from app.core.security import create_access_token
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        user_id = conn.execute(text("SELECT id FROM users WHERE email = 'bench-user-1@example.com'")).scalar()
+        song_ids = [r[0] for r in conn.execute(
+            text("SELECT id FROM songs WHERE s3_key LIKE 'bench/%' AND is_public AND NOT is_deleted"
+                 " ORDER BY id LIMIT :n"),
+            {"n": args.tracks},
+        )]
+    rng = random.Random(42)
+    song_ids = [rng.choice(song_ids) for _ in range(args.tracks)]  # repeats allowed, as in real playlists
+
+    s3 = FakeS3Server().start()
+    port = _free_port()
+    env = _env(S3_ENDPOINT_URL=s3.url, JOB_EMBEDDED_WORKERS="0", QUERY_BUDGET_MODE="off")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}/api", headers=headers, timeout=60) as client:
+            while True:
+                try:
+                    if client.get("/health/ready").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.05)
+            _, playlist = _timed(client, "POST", "/playlists", json={"name": f"bench {time.time():.0f}"})
+            pid = playlist["id"]
+            try:
+                latencies = []
+                for i in range(0, args.tracks, ADD_BATCH):
+                    elapsed, _ = _timed(client, "POST", f"/playlists/{pid}/tracks",
+                                        json={"song_ids": song_ids[i:i + ADD_BATCH]})
+                    latencies.append(elapsed)
+                _summary("bulk_add", latencies, batch=ADD_BATCH, tracks=args.tracks)
+
+                t0 = time.perf_counter()
+                entries = _scan(client, pid, args.page_size)
+                print(json.dumps({"scenario": "full_scan", "entries": len(entries), "page_size": args.page_size,
+                                  "seconds": round(time.perf_counter() - t0, 3)}), flush=True)
+
+                order = [item_id for item_id, _ in entries]
+                latencies, naive_rows, longest = [], 0, 0
+                for _ in range(args.moves):
+                    item, anchor = rng.sample(order, 2)
+                    side = rng.choice(("after_item_id", "before_item_id"))
+                    elapsed, result = _timed(client, "POST", f"/playlists/{pid}/tracks/{item}/move",
+                                             json={side: anchor})
+                    latencies.append(elapsed)
+                    longest = max(longest, len(result["items"][0]["position"]))
+                    old = order.index(item)
+                    order.pop(old)
+                    new = order.index(anchor) + (side == "after_item_id")
+                    order.insert(new, item)
+                    naive_rows += abs(new - old) + 1
+                _summary("move", latencies, rows_per_move=1,
+                         naive_rows_per_move=round(naive_rows / max(args.moves, 1)), max_key_length=longest)
+
+                latencies, longest = [], 0
+                left, right = order[len(order) // 2 - 1], order[len(order) // 2]
+                for n in range(args.hotspot_moves):
+                    item = order[n]
+                    elapsed, result = _timed(client, "POST", f"/playlists/{pid}/tracks/{item}/move",
+                                             json={"after_item_id": left})
+                    latencies.append(elapsed)
+                    longest = max(longest, len(result["items"][0]["position"]))
+                    left = item  # next move lands between this entry and `right` again
+                _summary("hotspot_move", latencies, max_key_length=longest)
+
+                entries = _scan(client, pid, args.page_size)
+                latencies = [_timed(client, "GET", f"/playlists/{pid}/tracks",
+                                    params={"limit": args.page_size})[0] for _ in range(args.reads)]
+                _summary("read_first_page", latencies, page_size=args.page_size)
+                latencies = []
+                for _ in range(args.reads):
+                    _, cursor = rng.choice(entries[len(entries) // 2:])
+                    params = {"limit": args.page_size, **({"cursor": cursor} if cursor else {})}
+                    latencies.append(_timed(client, "GET", f"/playlists/{pid}/tracks", params=params)[0])
+                _summary("read_deep_page", latencies, page_size=args.page_size)
+            finally:
+                client.delete(f"/playlists/{pid}")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        s3.stop()
+
+
+if __name__ == "__main__":
+    main()
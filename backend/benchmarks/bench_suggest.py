@@ -0,0 +1,100 @@
+"""
+Typeahead index (app.services.suggest) memory and latency, in process (no DB, no server).
+
+    cd backend && python -m benchmarks.bench_suggest --songs 1000000 --titles 100000
+
+Builds the index from a synthetic catalog (--titles distinct titles, --artists distinct
+artists, deterministic), measuring with tracemalloc the memory it holds:
+- build: bytes and bytes_per_song of the whole index; marginal_bytes_per_song is the
+  cost of one more song once names repeat (index of --songs minus index of half as many,
+  same names, over the extra songs): what grows with the catalog, not with distinct names.
+- suggest: latency of 2-letter prefix lookups (limit 10), as GET /songs/suggest.
+- update: latency of upsert (retitled song) / remove, as the song write routes.
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from benchmarks.bench_api import WORDS, _percentile
+
+
+def _rows(songs: int, titles: int, artists: int):
+    for n in range(1, songs + 1):
+        t = n % titles
+        yield n, f"{WORDS[t % len(WORDS)]} {WORDS[(t // 7) % len(WORDS)]} {t}", f"Artist {n * 31 % artists}"
+
+
+def _built(songs: int, titles: int, artists: int):
+    from app.services.suggest import SuggestIndex
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    index = SuggestIndex()
+    index.rebuild(_rows(songs, titles, artists))
+    seconds = time.perf_counter() - t0
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return index, held, seconds
+
+
+def _summary(name: str, latencies: list[float], **extra) -> None:
+    print(json.dumps({
+        "scenario": name,
+        "requests": len(latencies),
+        "p50_us": round(_percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(_percentile(latencies, 99) * 1e6, 2),
+        **extra,
+    }), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--songs", type=int, default=1_000_000)
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--artists", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--updates", type=int, default=20_000)
+    args = parser.parse_args()
+
+    half, half_bytes, _ = _built(args.songs // 2, args.titles, args.artists)
+    del half
+    index, held, seconds = _built(args.songs, args.titles, args.artists)
+    print(json.dumps({
+        "scenario": "build",
+        "songs": args.songs,
+        "entries": len(index),
+        "seconds": round(seconds, 2),
+        "bytes": held,
+        "bytes_per_song": round(held / args.songs, 1),
+        "marginal_bytes_per_song": round((held - half_bytes) / (args.songs - args.songs // 2), 1),
+    }), flush=True)
+
+    rng = random.Random(42)
+    latencies = []
+    for _ in range(args.queries):
+        prefix = rng.choice(WORDS)[:2]
+        t0 = time.perf_counter()
+        index.suggest(prefix, 10)
+        latencies.append(time.perf_counter() - t0)
+    _summary("suggest", latencies)
+
+    latencies = []
+    for n in range(args.updates):
+        song_id = rng.randrange(1, args.songs + 1)
+        t0 = time.perf_counter()
+        if n % 2:
+            index.remove(song_id)
+        else:
+            index.upsert(song_id, f"retitled {n}", f"Artist {n % args.artists}")
+        latencies.append(time.perf_counter() - t0)
+    _summary("update", latencies)
+
+
+if __name__ == "__main__":
+    main()
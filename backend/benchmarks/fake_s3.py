@@ -0,0 +1,223 @@
+"""
+Minimal in-process S3 stand-in for benchmarks: path-style HEAD / GET (with Range) / PUT / DELETE
+over HTTP, objects kept in memory. Point the app at it with S3_ENDPOINT_URL.
+Optional first-byte latency and per-connection bandwidth cap approximate real S3,
+where one GET stream tops out well below the host's network bandwidth.
+Also multipart uploads (create / upload part / complete / abort), ETags (MD5 of the body,
+or S3's "<md5 of part md5s>-<parts>" for multipart) and GET If-Match (412 when it differs).
+Not a general S3 emulator: no auth checks or listing.
+"""
+import hashlib
+import itertools
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+_NOT_FOUND = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b"<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message></Error>"
+)
+_PRECONDITION_FAILED = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b"<Error><Code>PreconditionFailed</Code>"
+    b"<Message>At least one of the pre-conditions you specified did not hold</Message></Error>"
+)
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeS3Server"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+        pass
+
+    def _key(self) -> str:
+        return unquote(urlparse(self.path).path.lstrip("/"))
+
+    def _query(self) -> dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query, keep_blank_values=True).items()}
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self, body: bool = True) -> None:
+        self.send_response(404)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(_NOT_FOUND) if body else 0))
+        self.end_headers()
+        if body:
+            self.wfile.write(_NOT_FOUND)
+
+    def do_HEAD(self):
+        data = self.server.objects.get(self._key())
+        if data is None:
+            return self._not_found(body=False)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", self.server.etag(self._key()))
+        self.end_headers()
+
+    def do_GET(self):
+        key = self._key()
+        data = self.server.objects.get(key)
+        if data is None:
+            return self._not_found()
+        etag = self.server.etag(key)
+        if_match = self.headers.get("If-Match")
+        if if_match is not None and if_match != etag:
+            return self._reply(412, _PRECONDITION_FAILED, {"Content-Type": "application/xml"})
+        view = memoryview(data)
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            start_s, end_s = rng[6:].split("-", 1)
+            start = int(start_s)
+            end = min(int(end_s) if end_s else len(data) - 1, len(data) - 1)
+            view = view[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(view)))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self._send_throttled(view)
+
+    def _send_throttled(self, view: memoryview) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        rate = self.server.bytes_per_second
+        if not rate:
+            self.wfile.write(view)
+            return
+        step = 64 * 1024
+        started = time.perf_counter()
+        for sent in range(0, len(view), step):
+            self.wfile.write(view[sent:sent + step])
+            ahead = (sent + step) / rate - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def do_PUT(self):
+        query = self._query()
+        data = self._body()
+        etag = _etag(data)
+        if "uploadId" in query:
+            parts = self.server.uploads.get(query["uploadId"])
+            if parts is None:
+                return self._not_found()
+            parts[int(query["partNumber"])] = data
+        else:
+            self.server.store(self._key(), data, etag)
+        self._reply(200, headers={"ETag": etag})
+
+    def do_POST(self):
+        query = self._query()
+        key = self._key()
+        bucket, _, object_key = key.partition("/")
+        if "uploads" in query:
+            upload_id = f"upload-{next(self.server.upload_ids)}"
+            self.server.uploads[upload_id] = {}
+            body = (
+                "<InitiateMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{object_key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            ).encode()
+            return self._reply(200, body, {"Content-Type": "application/xml"})
+        if "uploadId" in query:
+            parts = self.server.uploads.pop(query["uploadId"], None)
+            if parts is None:
+                return self._not_found()
+            order = [int(n) for n in re.findall(rb"<PartNumber>(\d+)</PartNumber>", self._body())]
+            part_md5s = b"".join(hashlib.md5(parts[n]).digest() for n in order)
+            etag = f'"{hashlib.md5(part_md5s).hexdigest()}-{len(order)}"'
+            self.server.store(key, b"".join(parts[n] for n in order), etag)
+            body = (
+                "<CompleteMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{object_key}</Key><ETag>{etag}</ETag>"
+                "</CompleteMultipartUploadResult>"
+            ).encode()
+            return self._reply(200, body, {"Content-Type": "application/xml"})
+        self._reply(400)
+
+    def do_DELETE(self):
+        query = self._query()
+        if "uploadId" in query:
+            self.server.uploads.pop(query["uploadId"], None)
+        else:
+            self.server.objects.pop(self._key(), None)
+            self.server.etags.pop(self._key(), None)
+        self._reply(204)
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, per_connection_mbps: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.objects: dict[str, bytes] = {}  # "bucket/key" -> body
+        self.etags: dict[str, str] = {}  # "bucket/key" -> ETag, computed once per stored body
+        self.uploads: dict[str, dict[int, bytes]] = {}  # upload id -> part number -> data
+        self.upload_ids = itertools.count(1)
+        self.latency = latency_ms / 1000
+        self.bytes_per_second = per_connection_mbps * 1024 * 1024
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def put(self, bucket: str, key: str, data: bytes) -> None:
+        self.store(f"{bucket}/{key}", data)
+
+    def store(self, key: str, data: bytes, etag: str | None = None) -> None:
+        self.objects[key] = data
+        self.etags[key] = etag or _etag(data)
+
+    def etag(self, key: str) -> str:
+        etag = self.etags.get(key)
+        if etag is None:  # set through .objects directly
+            etag = self.etags[key] = _etag(self.objects[key])
+        return etag
+
+    def start(self) -> "FakeS3Server":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-s3", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the S3 stand-in until interrupted")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--conn-mbps", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeS3Server(port=args.port, latency_ms=args.latency_ms, per_connection_mbps=args.conn_mbps)
+    print(f"S3 stand-in on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
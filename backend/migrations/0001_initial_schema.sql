@@ -0,0 +1,24 @@
+-- Initial schema: users and songs as they were before the first incremental migration.
+-- Later files add the S3, dedup, delta-sync and processing columns.
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR NOT NULL,
+    password_hash VARCHAR NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_users_id ON users (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS songs (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(255),
+    artist VARCHAR,
+    audio_url VARCHAR(2048) NOT NULL,
+    is_public BOOLEAN NOT NULL,
+    is_deleted BOOLEAN NOT NULL,
+    owner_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_songs_id ON songs (id);
+CREATE INDEX IF NOT EXISTS ix_songs_is_deleted ON songs (is_deleted);
+CREATE INDEX IF NOT EXISTS ix_songs_owner_id ON songs (owner_id);
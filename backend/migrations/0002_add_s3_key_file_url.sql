@@ -1,5 +1,4 @@
--- Add S3 metadata columns to songs (run once on existing DB).
--- New DBs get these via create_all() from the model.
+-- Add S3 metadata columns to songs.
 -- PostgreSQL 9.6+: ADD COLUMN IF NOT EXISTS
 
 ALTER TABLE songs ADD COLUMN IF NOT EXISTS s3_key VARCHAR(512);
@@ -0,0 +1,19 @@
+-- Delta sync (GET /api/songs/changes): updated_at + global change sequence on songs.
+-- Every insert/update (incl. soft delete) takes nextval('songs_change_seq').
+
+CREATE SEQUENCE IF NOT EXISTS songs_change_seq;
+
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+
+-- Backfill existing rows
+UPDATE songs SET updated_at = created_at WHERE updated_at IS NULL;
+UPDATE songs SET change_seq = nextval('songs_change_seq') WHERE change_seq IS NULL;
+
+ALTER TABLE songs ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE songs ALTER COLUMN updated_at SET NOT NULL;
+ALTER TABLE songs ALTER COLUMN change_seq SET DEFAULT nextval('songs_change_seq');
+ALTER TABLE songs ALTER COLUMN change_seq SET NOT NULL;
+ALTER SEQUENCE songs_change_seq OWNED BY songs.change_seq;
+
+CREATE INDEX IF NOT EXISTS ix_songs_owner_change_seq ON songs (owner_id, change_seq);
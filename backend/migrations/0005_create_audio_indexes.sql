@@ -0,0 +1,11 @@
+-- MP3 frame index per S3 object (exact seeking + HLS byte-range playlists).
+CREATE TABLE IF NOT EXISTS audio_indexes (
+    s3_key VARCHAR(512) PRIMARY KEY,
+    sample_rate INTEGER NOT NULL,
+    samples_per_frame INTEGER NOT NULL,
+    frame_count INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    first_frame_offset INTEGER NOT NULL,
+    frame_sizes BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,7 @@
+-- Acoustic fingerprints (MinHash signatures) for near-duplicate detection.
+CREATE TABLE IF NOT EXISTS audio_fingerprints (
+    id SERIAL PRIMARY KEY,
+    s3_key VARCHAR(512) NOT NULL UNIQUE,
+    signature BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,10 @@
+-- Server-side file_hash verification: dedup lookups only trust verified rows.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS hash_verified BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Dedup lookup: file_hash = :h AND hash_verified ORDER BY created_at
+-- Built online: CONCURRENTLY does not block writes to songs while it runs.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_songs_file_hash_verified
+    ON songs (file_hash, created_at) WHERE hash_verified;
+
+-- Existing rows start unverified (their hashes came from clients); run
+-- app.services.processing.verify_file_hash per s3_key to re-enable dedup for them.
@@ -0,0 +1,23 @@
+-- Durable post-upload job queue (app.services.jobs) and per-song processing status.
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    type VARCHAR(32) NOT NULL,
+    s3_key VARCHAR(512) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    locked_by VARCHAR(128),
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT uq_jobs_type_s3_key UNIQUE (type, s3_key)
+);
+
+-- Claim: type = :t AND status = 'queued' AND run_at <= now() ORDER BY run_at FOR UPDATE SKIP LOCKED
+CREATE INDEX IF NOT EXISTS ix_jobs_claim
+    ON jobs (type, run_at) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS ix_jobs_s3_key ON jobs (s3_key);
+
+-- Existing songs were processed by in-request background tasks: report them as ready.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS processing_status VARCHAR(16) NOT NULL DEFAULT 'ready';
@@ -0,0 +1,2 @@
+-- Embedded cover art (ID3 APIC) thumbnails: covers/<cover_hash>/<size>.jpg in S3.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS cover_hash VARCHAR(64);
@@ -0,0 +1,19 @@
+-- Per-user library counters (app.services.library_stats), kept in step with songs by the
+-- writers and periodically reconciled. size_bytes is the S3 object size; NULL until known.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS size_bytes BIGINT;
+-- Song reuses an object that was already in the catalog (dedup hit): no bytes uploaded.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS deduped BOOLEAN NOT NULL DEFAULT false;
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    song_count BIGINT NOT NULL DEFAULT 0,
+    bytes_stored BIGINT NOT NULL DEFAULT 0,
+    deduped_bytes BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    reconciled_at TIMESTAMPTZ
+);
+
+-- Existing libraries: song counts now; sizes are filled in by the reconciliation job.
+INSERT INTO user_stats (user_id, song_count)
+SELECT owner_id, count(*) FROM songs WHERE NOT is_deleted GROUP BY owner_id
+ON CONFLICT (user_id) DO NOTHING;
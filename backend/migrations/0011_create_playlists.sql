@@ -0,0 +1,23 @@
+-- Playlists (app.api.playlists). Entries are ordered by a fractional ordering key
+-- (app.services.ordering); COLLATE "C" makes Postgres compare it bytewise, like the app.
+CREATE TABLE IF NOT EXISTS playlists (
+    id SERIAL PRIMARY KEY,
+    owner_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    is_public BOOLEAN NOT NULL DEFAULT false,
+    track_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_playlists_owner_id ON playlists (owner_id);
+
+CREATE TABLE IF NOT EXISTS playlist_items (
+    id BIGSERIAL PRIMARY KEY,
+    playlist_id INTEGER NOT NULL REFERENCES playlists(id) ON DELETE CASCADE,
+    song_id INTEGER NOT NULL REFERENCES songs(id) ON DELETE CASCADE,
+    position VARCHAR COLLATE "C" NOT NULL,
+    added_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+-- Keyset pages: playlist_id = :p AND (position, id) > (:pos, :id) ORDER BY position, id
+CREATE INDEX IF NOT EXISTS ix_playlist_items_order ON playlist_items (playlist_id, position, id);
+CREATE INDEX IF NOT EXISTS ix_playlist_items_song_id ON playlist_items (song_id);
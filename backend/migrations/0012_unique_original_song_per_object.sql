@@ -0,0 +1,34 @@
+-- Retry-safe song creation: confirm-upload and create insert with ON CONFLICT DO NOTHING
+-- against a unique index holding one live, non-deduplicated song per S3 object.
+
+-- Songs created before dedup was recorded share objects with deduped = false: among the
+-- live ones (the rows the index covers), mark every song of an object except the first
+-- created. A deleted original does not count, so its live copies keep one original.
+-- user_stats deduped_bytes follow at the next reconciliation. Runs in id-range batches,
+-- one transaction each, so no duplicate row stays locked for the whole backfill.
+DO $$
+DECLARE
+    batch CONSTANT INTEGER := 10000;
+    lo INTEGER := 0;
+    top INTEGER;
+BEGIN
+    SELECT coalesce(max(id), 0) INTO top FROM songs;
+    WHILE lo <= top LOOP
+        UPDATE songs s
+        SET deduped = true
+        WHERE s.id >= lo AND s.id < lo + batch
+            AND NOT s.deduped AND NOT s.is_deleted
+            AND EXISTS (
+                SELECT 1 FROM songs o
+                WHERE o.s3_key = s.s3_key AND o.id < s.id
+                    AND NOT o.deduped AND NOT o.is_deleted
+            );
+        COMMIT;
+        lo := lo + batch;
+    END LOOP;
+END
+$$;
+
+-- Built online: CONCURRENTLY does not block writes to songs while it runs.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_songs_s3_key_original
+    ON songs (s3_key) WHERE NOT deduped AND NOT is_deleted;
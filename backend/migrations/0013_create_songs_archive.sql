@@ -0,0 +1,26 @@
+-- Hot/cold split of songs (app.services.archive): soft-deleted songs are moved to
+-- songs_archive in small batches once SONG_ARCHIVE_AFTER_DAYS have passed, so songs holds
+-- live rows plus recent deletes. Same columns as songs, plus archived_at; LIKE copies no
+-- foreign keys or indexes.
+-- LIKE copies the column list once: a later migration adding a column to songs must add it
+-- to songs_archive too. Archival moves every Song column and refuses to run (error in the
+-- worker log) while songs_archive lacks one.
+CREATE TABLE IF NOT EXISTS songs_archive (
+    LIKE songs,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id)
+);
+-- GET /songs/changes: tombstones of archived songs, owner_id = :me AND change_seq > :since
+CREATE INDEX IF NOT EXISTS ix_songs_archive_owner_change_seq ON songs_archive (owner_id, change_seq);
+
+-- Built online (CONCURRENTLY: writes to songs go on while they build).
+-- Hot listings read live rows only: public feed and my library, newest first.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_songs_live_public_created_at
+    ON songs (created_at DESC) WHERE is_public AND NOT is_deleted;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_songs_live_owner_created_at
+    ON songs (owner_id, created_at DESC) WHERE NOT is_deleted;
+-- Archival candidates: is_deleted AND updated_at < :cutoff (updated_at = time of delete).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_songs_deleted_updated_at
+    ON songs (updated_at) WHERE is_deleted;
+-- Replaced by the partial indexes above; a boolean index never narrows a hot query.
+DROP INDEX CONCURRENTLY IF EXISTS ix_songs_is_deleted;
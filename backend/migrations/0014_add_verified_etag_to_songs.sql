@@ -0,0 +1,5 @@
+-- ETag of the S3 object version whose sha256 was verified (every ranged read of the
+-- hash was pinned to it with If-Match). NULL for rows verified before this column.
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS verified_etag VARCHAR(128);
+-- songs_archive keeps every column of songs (archival moves them all).
+ALTER TABLE songs_archive ADD COLUMN IF NOT EXISTS verified_etag VARCHAR(128);
@@ -0,0 +1,73 @@
+"""Restoring deleted songs, archived or not, when restores of one object run concurrently."""
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import func, update
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.song import Song
+from app.services import archive
+
+
+def _two_deleted_originals(client, s3, headers) -> tuple[int, int]:
+    """Two deleted songs of one object, neither deduplicated (the object was re-confirmed)."""
+    key = "songs/%08x.mp3" % (uuid.uuid4().int % 2**32)
+    s3.put(settings.S3_BUCKET, key, os.urandom(2048))
+    ids = []
+    for _ in range(2):
+        resp = client.post("/api/songs/confirm-upload", headers=headers, json={"key": key})
+        assert resp.status_code == 201, resp.text
+        ids.append(resp.json()["id"])
+        assert client.delete(f"/api/songs/{ids[-1]}", headers=headers).status_code == 204
+    return ids[0], ids[1]
+
+
+def _deduped(song_ids: list[int]) -> list[bool]:
+    with SessionLocal() as db:
+        return [db.get(Song, song_id).deduped for song_id in song_ids]
+
+
+def test_restore_route(client, s3, auth):
+    me = auth()
+    first, second = _two_deleted_originals(client, s3, me)
+    resp = client.post(f"/api/songs/{first}/restore", headers=me)
+    assert resp.status_code == 200, resp.text
+    resp = client.post(f"/api/songs/{second}/restore", headers=me)
+    assert resp.status_code == 200, resp.text
+    assert _deduped([first, second]) == [False, True]
+
+
+def test_concurrent_restores_of_one_object(client, s3, auth):
+    first, second = _two_deleted_originals(client, s3, auth())
+    # The second one is archived: both restore statements take part.
+    with SessionLocal() as db:
+        db.execute(update(Song).where(Song.id == second).values(updated_at=func.now() - timedelta(days=2)))
+        db.commit()
+    archive.archive_songs(older_than_days=1)
+
+    errors = []
+
+    def restore(song_id: int, started: threading.Event) -> None:
+        with SessionLocal() as db:
+            started.set()
+            try:
+                archive.restore_songs(db, [song_id])
+                db.commit()
+            except Exception as e:  # the assertion below reports it
+                errors.append(e)
+
+    with SessionLocal() as db:
+        archive.restore_songs(db, [first])
+        started = threading.Event()
+        other = threading.Thread(target=restore, args=(second, started))
+        other.start()
+        started.wait()
+        time.sleep(0.3)  # the other restore is now waiting for this one
+        db.commit()
+    other.join(10)
+    assert not errors
+    assert _deduped([first, second]) == [False, True]
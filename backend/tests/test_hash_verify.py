@@ -0,0 +1,59 @@
+"""Server-side hash verification reads one version of the object (If-Match on its ETag)."""
+import hashlib
+import os
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.song import Song
+from app.services import processing, s3 as s3_service
+
+
+def _key() -> str:
+    return "songs/%08x.mp3" % (uuid.uuid4().int % 2**32)
+
+
+def _overwrite_after_head(monkeypatch, s3, key: str, times: int) -> list[bytes]:
+    """The object is replaced right after each of the first `times` HEADs."""
+    versions = []
+    head = s3_service.get_object_head
+
+    def racing_head(object_key: str):
+        result = head(object_key)
+        if len(versions) < times:
+            versions.append(os.urandom(3000))
+            s3.put(settings.S3_BUCKET, key, versions[-1])
+        return result
+
+    monkeypatch.setattr(s3_service, "get_object_head", racing_head)
+    return versions
+
+
+def test_verify_stores_etag(auth, upload, s3):
+    data = os.urandom(5000)
+    song = upload(auth(), data=data)
+    processing.verify_file_hash(song["s3_key"])
+    with SessionLocal() as db:
+        row = db.get(Song, song["id"])
+        assert row.hash_verified
+        assert row.file_hash == hashlib.sha256(data).hexdigest()
+        assert row.verified_etag == s3.etag(f"{settings.S3_BUCKET}/{song['s3_key']}")
+
+
+def test_hash_restarts_when_object_changes(monkeypatch, s3):
+    key = _key()
+    s3.put(settings.S3_BUCKET, key, os.urandom(3000))
+    versions = _overwrite_after_head(monkeypatch, s3, key, times=1)
+    digest, size, etag = s3_service.sha256_object(key, part_size=1024)
+    assert digest == hashlib.sha256(versions[-1]).hexdigest()
+    assert (size, etag) == (3000, s3.etag(f"{settings.S3_BUCKET}/{key}"))
+
+
+def test_hash_gives_up_when_object_keeps_changing(monkeypatch, s3):
+    key = _key()
+    s3.put(settings.S3_BUCKET, key, os.urandom(3000))
+    _overwrite_after_head(monkeypatch, s3, key, times=s3_service.VERIFY_ATTEMPTS)
+    with pytest.raises(s3_service.ObjectChangedError):
+        s3_service.sha256_object(key, part_size=1024)
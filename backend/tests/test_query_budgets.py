@@ -0,0 +1,98 @@
+"""
+Routes stay within their @query_budget on their costliest paths (QUERY_BUDGET_MODE=enforce:
+one statement over the budget fails the request with QueryBudgetExceeded).
+"""
+import numpy as np
+
+from app.api import playlists as playlists_api
+from app.api import songs as songs_api
+from app.services.fingerprint import NUM_PERM
+
+
+def test_bulk_update_reports_missed_ids(client, auth, upload):
+    me, other = auth(), auth()
+    mine = upload(me)["id"]
+    theirs = upload(other)["id"]
+    resp = client.patch(
+        "/api/songs",
+        headers=me,
+        json={"ids": [mine, theirs, 2**31 - 1], "changes": {"title": "renamed"}},
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["affected"] == 1
+    assert [r["status"] for r in resp.json()["results"]] == ["updated", "forbidden", "not_found"]
+
+
+def test_bulk_delete_reports_missed_ids(client, auth, upload):
+    me, other = auth(), auth()
+    mine = upload(me)["id"]
+    theirs = upload(other)["id"]
+    resp = client.request(
+        "DELETE", "/api/songs", headers=me, json={"ids": [mine, theirs, 2**31 - 1]}
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["affected"] == 1
+    assert [r["status"] for r in resp.json()["results"]] == ["deleted", "forbidden", "not_found"]
+
+
+def test_confirm_upload_duplicate_check_undecodable(auth, upload):
+    # No decodable audio (or no ffmpeg): the upload succeeds without matches.
+    song = upload(auth(), report_duplicates=True)
+    assert song["likely_duplicates"] == []
+
+
+def test_confirm_upload_duplicate_check_matches(auth, upload, monkeypatch):
+    me = auth()
+    first = upload(me)
+    sig = np.random.default_rng().integers(1, 2**31, size=NUM_PERM, dtype=np.uint32)
+
+    def fake_fingerprint(s3_key: str) -> np.ndarray:
+        songs_api.fingerprint_index.add(s3_key, sig)
+        return sig
+
+    monkeypatch.setattr(songs_api, "fingerprint_audio", fake_fingerprint)
+    fake_fingerprint(first["s3_key"])
+    song = upload(me, report_duplicates=True)
+    assert [m["song_id"] for m in song["likely_duplicates"]] == [first["id"]]
+
+
+def _playlist(client, headers, song_id: int, tracks: int) -> tuple[int, list[int]]:
+    pid = client.post("/api/playlists", headers=headers, json={"name": "budget"}).json()["id"]
+    resp = client.post(f"/api/playlists/{pid}/tracks", headers=headers, json={"song_ids": [song_id] * tracks})
+    assert resp.status_code == 201, resp.text
+    return pid, [item["item_id"] for item in resp.json()["items"]]
+
+
+def test_move_into_one_gap_rebalances(client, auth, upload, monkeypatch):
+    monkeypatch.setattr(playlists_api, "MAX_POSITION_LENGTH", 6)
+    me = auth()
+    pid, items = _playlist(client, me, upload(me)["id"], 40)
+    left, longest = items[0], 0
+    for item in items[2:]:
+        resp = client.post(f"/api/playlists/{pid}/tracks/{item}/move", headers=me, json={"after_item_id": left})
+        assert resp.status_code == 200, resp.text
+        key = resp.json()["items"][0]["position"]
+        if len(key) < longest:
+            break  # rebalanced
+        longest, left = len(key), item
+    else:
+        raise AssertionError("keys never rebalanced")
+
+
+def test_add_into_one_gap_rebalances(client, auth, upload, monkeypatch):
+    monkeypatch.setattr(playlists_api, "MAX_POSITION_LENGTH", 6)
+    me = auth()
+    song_id = upload(me)["id"]
+    pid, items = _playlist(client, me, song_id, 2)
+    longest = 0
+    for _ in range(40):
+        resp = client.post(
+            f"/api/playlists/{pid}/tracks", headers=me, json={"song_ids": [song_id], "after_item_id": items[0]}
+        )
+        assert resp.status_code == 201, resp.text
+        key = resp.json()["items"][0]["position"]
+        if len(key) < longest:
+            break  # rebalanced
+        longest = len(key)
+    else:
+        raise AssertionError("keys never rebalanced")
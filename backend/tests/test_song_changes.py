@@ -0,0 +1,62 @@
+"""GET /songs/changes: the token never passes a change committed after the read."""
+from app.db.session import SessionLocal
+from app.models.song import Song
+
+
+def _changes(client, headers, since: str) -> dict:
+    resp = client.get("/api/songs/changes", headers=headers, params={"since": since})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _rename(db, song_id: int, title: str) -> int:
+    song = db.get(Song, song_id)
+    song.title = title
+    db.flush()  # UPDATE: takes the next change_seq, uncommitted
+    return song.change_seq
+
+
+def test_token_waits_for_open_writer(client, auth, upload):
+    me = auth()
+    first, second = upload(me)["id"], upload(me)["id"]
+    token = client.get("/api/songs/changes", headers=me).json()["next_token"]
+
+    slow, fast = SessionLocal(), SessionLocal()
+    try:
+        slow_seq = _rename(slow, first, "slow")
+        fast_seq = _rename(fast, second, "fast")
+        fast.commit()
+        assert slow_seq < fast_seq
+        # fast is committed, but slow (lower change_seq) is still open: nothing past it yet.
+        page = _changes(client, me, token)
+        assert page["changes"] == []
+        assert page["next_token"] == token
+
+        slow.commit()
+        page = _changes(client, me, token)
+        assert [(c["id"], c["change_seq"]) for c in page["changes"]] == [(first, slow_seq), (second, fast_seq)]
+        assert page["next_token"] == str(fast_seq)
+    finally:
+        slow.close()
+        fast.close()
+
+
+def test_open_writer_after_committed_change(client, auth, upload):
+    me = auth()
+    first, second = upload(me)["id"], upload(me)["id"]
+    token = client.get("/api/songs/changes", headers=me).json()["next_token"]
+
+    done, open_ = SessionLocal(), SessionLocal()
+    try:
+        done_seq = _rename(done, first, "done")
+        done.commit()
+        _rename(open_, second, "open")
+        # The committed change comes through; the open one is invisible and later.
+        page = _changes(client, me, token)
+        assert [c["id"] for c in page["changes"]] == [first]
+        assert page["next_token"] == str(done_seq)
+        open_.commit()
+        assert [c["id"] for c in _changes(client, me, str(done_seq))["changes"]] == [second]
+    finally:
+        done.close()
+        open_.close()
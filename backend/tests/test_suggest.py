@@ -0,0 +1,36 @@
+"""Typeahead index: entries shared between songs, incremental updates after a rebuild."""
+from app.services.suggest import SuggestIndex
+
+
+def _index(rows) -> SuggestIndex:
+    index = SuggestIndex()
+    index.rebuild(rows)
+    return index
+
+
+def test_shared_entries_are_refcounted():
+    index = _index([(1, "Hello", "Adele"), (2, "Hello", "Lionel Richie"), (3, None, "Adele")])
+    assert len(index) == 3
+    assert index.suggest("hel") == [("Hello", "title")]
+    index.remove(1)
+    assert index.suggest("hel") == [("Hello", "title")]
+    assert index.suggest("ad") == [("Adele", "artist")]
+    index.remove(2)
+    index.remove(3)
+    assert len(index) == 0
+    assert index.suggest("a") == []
+
+
+def test_updates_after_rebuild():
+    # Rows in any order; removed songs come back; ids below, between and above existing ones.
+    index = _index([(20, "Sơn Tùng", None), (10, "Bohemian Rhapsody", "Queen")])
+    index.upsert(10, "Bohemian Rhapsody (Live)", "Queen")
+    assert index.suggest("bohemian") == [("Bohemian Rhapsody (Live)", "title")]
+    index.remove(20)
+    assert index.suggest("son") == []
+    index.upsert(20, "Sơn Tùng", None)
+    index.apply(upserts=[(5, "Queen of Hearts", None), (15, "Quiet", None), (30, "Queue", None)], removals=[10])
+    assert index.suggest("que") == [("Queen of Hearts", "title"), ("Queue", "title")]
+    assert index.suggest("son tung") == [("Sơn Tùng", "title")]
+    index.apply(removals=[5, 15, 20, 30])
+    assert len(index) == 0